@@ -19,6 +19,8 @@ from common.context import (
 )
 from configs.config import local_configs
 from common.decorators import singleton
+from service.sql_stats import SqlStatsPlugin
+from service.sql_explain import SqlExplainPlugin
 
 
 async def context_middleware(
@@ -85,7 +87,10 @@ async def context_middleware(
         plugins=[
             RequestStartTimestampPlugin(),
             RequestIdPlugin(),
+            # 需在 RequestProcessInfoPlugin 之前, 统计结果随请求日志输出
+            *([SqlStatsPlugin()] if local_configs.server.sql_stats.enabled else []),
             RequestProcessInfoPlugin(),
+            *([SqlExplainPlugin()] if local_configs.server.sql_explain.enabled else []),
         ],
     )
 
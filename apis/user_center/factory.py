@@ -8,8 +8,15 @@ from tortoise import Tortoise
 from common.service_api import ServiceApi
 from configs.config import local_configs
 from configs.defines import VersionFilePath, ConnectionNameEnum
+from storages.aredis.scripts import LuaScript
+from storages.aredis.near_cache import NearCacheSubscriber
+from storages.aredis.session import SessionIndex
+from storages.aredis.revocation import RevokedTokenFilter
+from common.encrypt import AsyncPasswordUtil
+from common.route_permission import compile_route_permissions
 from apis.middlewares import roster as middleware_roster
 from common.responses import Resp
+from service.account.helper import AccountCache
 from service.exceptions import roster as exception_handler_roster
 from apis.user_center.v1 import router as v1_router
 from apis.user_center.v2 import router as v2_router
@@ -26,8 +33,30 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     for connection in ConnectionNameEnum:
         await Tortoise.get_connection(connection.value).execute_query("SELECT 1")
 
+    # redis: fork 之后按 worker 创建并预热连接池
+    await app.settings.redis.init_pools()
+    await LuaScript.load_all()
+    # 进程内近端缓存失效订阅
+    await NearCacheSubscriber.start()
+    # 签名 token 吊销列表同步
+    await RevokedTokenFilter.start()
+    # 会话索引后台压缩
+    await SessionIndex.start_compactor()
+    # 路由权限码预编译
+    compile_route_permissions(app)  # type: ignore
+    # 密码哈希进程池, 首次使用时创建
+    AsyncPasswordUtil.configure(
+        app.settings.server.password_hasher.max_workers,
+        app.settings.server.password_hasher.max_pending,
+    )
+
     yield
 
+    await AsyncPasswordUtil.shutdown()
+    await SessionIndex.stop_compactor()
+    await RevokedTokenFilter.stop()
+    await NearCacheSubscriber.stop()
+    await app.settings.redis.close_pools()
     await Tortoise.close_connections()
 
 
@@ -77,4 +106,13 @@ async def health() -> dict[str, str]:
     """
     for connection in ConnectionNameEnum:
         await Tortoise.get_connection(connection.value).execute_query("SELECT 1")
-    return Resp(data={"status": "ok"})
+    return Resp(
+        data={
+            "status": "ok",
+            "redis_pools": [i.model_dump() for i in local_configs.redis.pool_stats()],
+            "near_caches": NearCacheSubscriber.stats(),
+            "account_cache": AccountCache.stats(),
+            "revoked_tokens": RevokedTokenFilter.stats(),
+            "password_hasher": AsyncPasswordUtil.stats(),
+        },
+    )
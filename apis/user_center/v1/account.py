@@ -1,25 +1,34 @@
 from uuid import UUID
 from typing import Annotated
 
-from fastapi import Depends, Request, APIRouter
+from fastapi import Body, Query, Depends, Request, APIRouter
+from fastapi.responses import StreamingResponse
 
 #  tortoise-orm
 from tortoise.queryset import QuerySet
 
 from storages import enums
+from common.enums import ExportFormatEnum, CountStrategyEnum
 from common.utils import datetime_now
+from common.encrypt import AsyncPasswordUtil
 from service.crud import (
+    BulkResp,
     CRUDPager,
+    ExportTaskResp,
     list_view,
     create_obj,
     delete_view,
     detail_view,
     get_all_obj,
+    export_view,
     update_view,
+    bulk_create_objs,
     pagination_factory,
     obj_prefetch_fields,
 )
 from common.responses import Resp, PageData
+from service.auth.helper import logout_cache_redis
+from service.auth.schema import RevokeSessionsResp
 from service.dependencies import api_permission_check
 from service.account.schema import (
     AccountList,
@@ -28,7 +37,7 @@ from service.account.schema import (
     AccountUpdate,
     AccountFilterSchema,
 )
-from storages.relational.models.user_center import Account
+from storages.relational.models.user_center import ACCOUNT_SEARCH_FIELDS, Account
 
 router = APIRouter(dependencies=[Depends(api_permission_check)])
 
@@ -42,10 +51,29 @@ def get_queryset(request: Request) -> QuerySet[Account]:
 
 @router.post("", description=f"创建{Account.Meta.table_description}", summary=f"创建{Account.Meta.table_description}")
 async def create_account(request: Request, schema: AccountCreate) -> Resp:
-    await create_obj(Account, schema.model_dump(exclude_unset=True))
+    data = schema.model_dump(exclude_unset=True)
+    data["password"] = await AsyncPasswordUtil.get_password_hash(data["password"])
+    await create_obj(Account, data)
     return Resp
 
 
+@router.post(
+    "/bulk",
+    description=f"批量导入{Account.Meta.table_description}, 按批提交, 失败时返回出错行号",
+    summary=f"批量导入{Account.Meta.table_description}",
+)
+async def bulk_create_account(
+    request: Request,
+    # 每行一次 bcrypt, 限制单次请求的哈希耗时
+    schemas: Annotated[list[AccountCreate], Body(min_length=1, max_length=200)],
+) -> Resp[BulkResp]:
+    rows = [schema.model_dump(exclude_unset=True) for schema in schemas]
+    passwords = await AsyncPasswordUtil.get_password_hashes([row["password"] for row in rows])
+    for row, password in zip(rows, passwords, strict=True):
+        row["password"] = password
+    return Resp(data=BulkResp(count=await bulk_create_objs(Account, rows)))
+
+
 @router.put(
     "/{pk}", description=f"更新{Account.Meta.table_description}", summary=f"更新{Account.Meta.table_description}"
 )
@@ -59,17 +87,52 @@ async def get_account_list(
     filter_: Annotated[AccountFilterSchema, Depends(AccountFilterSchema.as_query)],
     pager: CRUDPager = pagination_factory(
         db_model=Account,
-        search_fields=set(),
+        search_fields=set(ACCOUNT_SEARCH_FIELDS),
         order_fields={
             "id",
         },
         list_schema=AccountList,
         max_limit=1000,
+        # 大表, 按过滤条件缓存计数; 始终带软删除条件, 执行计划估算偏差大
+        count_strategy=CountStrategyEnum.cached,
     ),
 ) -> Resp[PageData[AccountList]]:
     return await list_view(get_queryset(request), filter_, pager)
 
 
+@router.get(
+    "/export",
+    description=f"导出{Account.Meta.table_description}, 过滤/搜索/排序/字段选择与列表一致, 忽略分页; "
+    "background 为真时后台上传 OSS 并返回任务ID, 通过 /common/export/{task_id} 查询结果",
+    summary=f"导出{Account.Meta.table_description}",
+    response_model=Resp[ExportTaskResp],
+)
+async def export_account(
+    request: Request,
+    filter_: Annotated[AccountFilterSchema, Depends(AccountFilterSchema.as_query)],
+    pager: CRUDPager = pagination_factory(
+        db_model=Account,
+        search_fields=set(ACCOUNT_SEARCH_FIELDS),
+        order_fields={
+            "id",
+        },
+        list_schema=AccountList,
+    ),
+    fmt: ExportFormatEnum = Query(ExportFormatEnum.csv, alias="format", description="文件格式"),
+    background: bool = Query(False, description="是否后台导出"),
+) -> StreamingResponse | Resp[ExportTaskResp]:
+    return await export_view(
+        get_queryset(request),
+        filter_,
+        pager,
+        fmt,
+        Account.Meta.table_description,
+        background,
+        # 路由依赖 api_permission_check 已设置当前账户
+        owner_id=request.scope["user"].id,
+    )
+
+
 @router.get(
     "/{pk}",
     description=f"获取{Account.Meta.table_description}详情",
@@ -84,3 +147,16 @@ async def get_account_detail(request: Request, pk: int) -> Resp[AccountDetail]:
 )
 async def delete_account(request: Request, pk: UUID) -> Resp:
     return await delete_view()
+
+
+@router.delete(
+    "/{pk}/sessions",
+    description="强制下线, 吊销账户所有场景的登录会话",
+    summary="强制下线",
+)
+async def revoke_account_sessions(request: Request, pk: int) -> Resp[RevokeSessionsResp]:
+    account = await get_queryset(request).get_or_none(id=pk)
+    if not account:
+        return Resp.fail(message=f"{Account.Meta.table_description}不存在")
+    revoked = await logout_cache_redis(account)
+    return Resp(data=RevokeSessionsResp(revoked=len(revoked)))
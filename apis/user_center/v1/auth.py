@@ -1,11 +1,11 @@
 from datetime import timedelta
 
-from fastapi import Depends, Request, APIRouter
+from fastapi import Query, Depends, Request, APIRouter
 
 from storages import enums
 from common.utils import datetime_now
 from service.crud import obj_prefetch_fields
-from common.encrypt import PasswordUtil
+from common.encrypt import AsyncPasswordUtil
 from configs.config import local_configs
 from storages.aredis import keys
 from common.responses import Resp
@@ -74,9 +74,10 @@ async def login(request: Request, login_data: CodeLoginSchema) -> Resp[LoginResp
 async def logout(
     request: Request,
     scene: enums.TokenSceneTypeEnum,
+    all_scenes: bool = Query(False, description="是否退出所有场景的登录"),
     account: Account = Depends(token_required),
 ) -> Resp:
-    await logout_cache_redis(account, scene)
+    await logout_cache_redis(account, None if all_scenes else scene)
     return Resp()
 
 
@@ -116,7 +117,7 @@ async def reset_password(request: Request, schema: ResetPasswordIn) -> Resp:
     ):
         return Resp.fail(message="验证码错误")
 
-    account.password = PasswordUtil.get_password_hash(schema.password)
+    account.password = await AsyncPasswordUtil.get_password_hash(schema.password)
     await account.save(update_fields=["password"])
 
     return Resp()
@@ -132,12 +133,14 @@ async def change_password(
     schema: ChangePasswordIn,
     account: Account = Depends(token_required),
 ) -> Resp:
-    if not PasswordUtil.verify_password(
+    # token_required 返回的账户来自缓存, 不含密码哈希
+    password = await Account.filter(id=account.id).first().values_list("password", flat=True)
+    if not password or not await AsyncPasswordUtil.verify_password(
         schema.old_password,
-        account.password,
+        password,  # type: ignore
     ):
         return Resp.fail(message="旧密码错误")
-    account.password = PasswordUtil.get_password_hash(schema.new_password)
+    account.password = await AsyncPasswordUtil.get_password_hash(schema.new_password)
     await account.save(update_fields=["password"])
 
     return Resp()
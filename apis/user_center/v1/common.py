@@ -8,11 +8,15 @@ from captcha.image import ImageCaptcha, random_color  # type: ignore
 from fastapi.responses import StreamingResponse
 
 from storages import enums
+from common.enums import ExportStatusEnum
 from common.regex import EMAIL_REGEX, PHONE_REGEX_CN
 from storages.aredis import keys
 from common.responses import Resp
 from common.exceptions import ApiException
 from storages.aredis.util import generate_captcha_code
+from tasks.asynchronous.export import get_export_task
+from service.sql_explain import SqlExplainRoute, explain_report, clear_explain_report
+from service.dependencies import token_required, super_admin_required
 from storages.relational.models.user_center import Account
 
 router = APIRouter()
@@ -204,3 +208,48 @@ async def captcha_code(
     #         message=(resp.data.detail if hasattr(resp.data, "detail") else resp.message) or "获取验证码失败，未知错误",
     #     )
     return Resp[CaptchaCodeResponse](data={"unique_key": unique_key})
+
+
+class ExportTaskStatus(BaseModel):
+    status: ExportStatusEnum = Field(description=f"任务状态, {ExportStatusEnum._dict}")  # type: ignore
+    count: int | None = Field(None, description="导出行数")
+    url: str | None = Field(None, description="下载地址")
+    message: str | None = Field(None, description="失败原因")
+
+
+@router.get(
+    "/export/{task_id}",
+    summary="后台导出结果",
+    description="查询后台导出任务状态, 成功时返回下载地址, 仅任务创建人可查询",
+)
+async def export_task_status(
+    task_id: str,
+    account: Account = Depends(token_required),
+) -> Resp[ExportTaskStatus]:
+    task = await get_export_task(task_id)
+    if not task or task.get("owner_id") != str(account.id):
+        raise ApiException("导出任务不存在或已过期")
+    return Resp(data=ExportTaskStatus.model_validate(task))
+
+
+@router.get(
+    "/sql-explain",
+    summary="SQL执行计划采样",
+    description="当前 worker 按路由汇总的 SQL 执行计划采样结果(需开启 server.sql_explain), 仅超级管理员可用",
+    dependencies=[Depends(super_admin_required)],
+)
+async def sql_explain_report(
+    flagged_only: bool = Query(default=True, description="只返回有全表扫描/文件排序/临时表等问题的语句"),
+) -> Resp[list[SqlExplainRoute]]:
+    return Resp(data=explain_report(flagged_only))
+
+
+@router.delete(
+    "/sql-explain",
+    summary="清空SQL执行计划采样",
+    description="清空当前 worker 的 SQL 执行计划采样结果, 仅超级管理员可用",
+    dependencies=[Depends(super_admin_required)],
+)
+async def sql_explain_clear() -> Resp:
+    clear_explain_report()
+    return Resp()
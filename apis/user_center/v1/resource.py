@@ -1,10 +1,13 @@
-from fastapi import Query, Depends, Request, APIRouter
+from typing import Annotated
 
-from service.crud import create_obj
+from fastapi import Body, Query, Depends, Request, APIRouter
+
+from service.crud import BulkResp, create_obj, bulk_create_view, bulk_update_view
 from common.responses import Resp
+from service.query_cache import cached_response
 from service.dependencies import api_permission_check
 from service.resource.helper import resource_list_to_trees
-from service.resource.schema import ResourceCreateSchema, ResourceLevelTreeNode
+from service.resource.schema import ResourceOrderUpdate, ResourceCreateSchema, ResourceLevelTreeNode
 from storages.relational.models.user_center import Resource
 
 router = APIRouter(dependencies=[Depends(api_permission_check)])
@@ -16,6 +19,22 @@ async def create_resource(request: Request, schema: ResourceCreateSchema) -> Res
     return Resp()
 
 
+@router.post("/bulk", summary="批量创建系统资源", description="批量创建系统资源, 按批提交, 失败时返回出错行号")
+async def bulk_create_resource(
+    request: Request,
+    schemas: Annotated[list[ResourceCreateSchema], Body(min_length=1, max_length=5000)],
+) -> Resp[BulkResp]:
+    return await bulk_create_view(Resource, schemas)
+
+
+@router.put("/bulk", summary="批量调整菜单顺序", description="批量调整系统资源的父级及排列序号")
+async def bulk_update_resource_order(
+    request: Request,
+    schemas: Annotated[list[ResourceOrderUpdate], Body(min_length=1, max_length=5000)],
+) -> Resp[BulkResp]:
+    return await bulk_update_view(Resource.all(), schemas)
+
+
 @router.get(
     "/trees",
     summary="获取系统的全层级菜单",
@@ -42,8 +61,11 @@ async def resource_trees(
         "enabled": True,
     }
 
-    nodes = await Resource.filter(
-        **filter_,
-        # roles__id=account.role_id,
-    ).order_by("parent_id", "order_num")
-    return Resp(data=resource_list_to_trees(nodes))
+    async def load() -> list[ResourceLevelTreeNode]:
+        nodes = await Resource.filter(
+            **filter_,
+            # roles__id=account.role_id,
+        ).order_by("parent_id", "order_num")
+        return resource_list_to_trees(nodes)
+
+    return await cached_response((Resource,), ("resource_trees", filter_), load)  # type: ignore
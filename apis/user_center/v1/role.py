@@ -2,7 +2,6 @@ from typing import Annotated
 
 from fastapi import Depends, Request, APIRouter
 from tortoise.queryset import QuerySet
-from tortoise.transactions import in_transaction
 
 from service.crud import (
     CRUDPager,
@@ -13,6 +12,7 @@ from service.crud import (
     pagination_factory,
     obj_prefetch_fields,
 )
+from common.enums import CountStrategyEnum
 from common.responses import Resp, PageData
 from common.exceptions import ApiException
 from service.role.schema import (
@@ -22,9 +22,11 @@ from service.role.schema import (
     RoleUpdate,
     RoleFilterSchema,
 )
+from service.query_cache import cached_response
 from service.dependencies import api_permission_check
 from service.resource.helper import resource_list_to_trees
-from storages.relational.models.user_center import Role
+from storages.relational.base.write_hooks import write_transaction
+from storages.relational.models.user_center import Role, Resource
 
 router = APIRouter(dependencies=[Depends(api_permission_check)])
 
@@ -50,6 +52,8 @@ async def get_role_list(
             "created_at",
         },
         max_limit=1000,
+        # 按 accounts__* 过滤时关联去重计数, 按过滤条件缓存
+        count_strategy=CountStrategyEnum.cached,
     ),
 ) -> Resp[PageData[RoleList]]:
     return await list_view(get_queryset(request), filter_, pager)
@@ -61,18 +65,19 @@ async def get_role_list(
     summary=f"获取{Role.Meta.table_description}详情",
 )
 async def get_role_detail(request: Request, pk: int) -> Resp[RoleDetail]:
-    queryset = get_queryset(request)
-    obj: Role = await queryset.get_or_none(
-        **{queryset.model._meta.pk_attr: pk},
-    )
-    if not obj:
-        raise ApiException("对象不存在")
-    obj = await obj_prefetch_fields(obj, RoleDetail)
-    data = RoleDetail.model_validate(obj)
-    data.resources = resource_list_to_trees(await obj.resources.filter(enabled=True))
-    return Resp(
-        data=data,  # type: ignore
-    )
+    async def load() -> RoleDetail:
+        queryset = get_queryset(request)
+        obj: Role = await queryset.get_or_none(
+            **{queryset.model._meta.pk_attr: pk},
+        )
+        if not obj:
+            raise ApiException("对象不存在")
+        obj = await obj_prefetch_fields(obj, RoleDetail)
+        data = RoleDetail.model_validate(obj)
+        data.resources = resource_list_to_trees(await obj.resources.filter(enabled=True))
+        return data
+
+    return await cached_response((Role, Resource), ("role_detail", pk), load)  # type: ignore
 
 
 @router.post(
@@ -81,7 +86,7 @@ async def get_role_detail(request: Request, pk: int) -> Resp[RoleDetail]:
     summary=f"创建{Role.Meta.table_description}",
 )
 async def create_role(request: Request, schema: RoleCreate) -> Resp:
-    async with in_transaction(connection_name=Role.Meta.app):
+    async with write_transaction(Role.Meta.app):
         await create_obj(Role, schema.model_dump(exclude_unset=True))
 
     return Resp()
@@ -1,8 +1,12 @@
+import os
 import hmac
 import base64
+import asyncio
 import secrets
+import multiprocessing
 from typing import Any, Generic, TypeVar
-from collections.abc import Mapping
+from collections.abc import Mapping, Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 
 import orjson
 from jose import jwt, constants
@@ -16,6 +20,7 @@ from Cryptodome.Signature import pkcs1_15 as SIGN_PKCS1_15
 from Cryptodome.Util.Padding import pad, unpad
 
 
+
 class AESUtil:
     """aes 加密与解密."""
 
@@ -226,6 +231,108 @@ class PasswordUtil:
         return cls.pwd_context.hash(plain_password)  # type: ignore
 
 
+class AsyncPasswordUtil:
+    """密码工具, bcrypt 在进程池中执行, 不阻塞事件循环.
+
+    - 进程池在当前进程首次使用时以 spawn 方式创建, 不随 gunicorn fork 继承
+    - 排队及执行中的任务数达到 max_workers + max_pending 时直接拒绝
+    - 批量哈希(get_password_hashes)共用 max_workers - 1 个进程, 保留一个给登录等单次调用
+    """
+
+    max_workers: int = 2
+    max_pending: int = 64
+
+    _executor: ProcessPoolExecutor | None = None
+    _pid: int | None = None
+    _bulk_semaphore: asyncio.Semaphore | None = None
+
+    pending = 0  # 排队及执行中的任务数
+    completed = 0  # 成功完成
+    failed = 0  # 执行出错或被取消
+    rejected = 0
+
+    @classmethod
+    def configure(cls, max_workers: int, max_pending: int) -> None:
+        cls.max_workers = max_workers
+        cls.max_pending = max_pending
+        cls._bulk_semaphore = None
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None or cls._pid != os.getpid():
+            cls._executor = ProcessPoolExecutor(
+                max_workers=cls.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            cls._pid = os.getpid()
+        return cls._executor
+
+    @classmethod
+    async def _run(cls, func: Callable[..., Any], *args: Any) -> Any:  # ruff: noqa: ANN401
+        if cls.pending >= cls.max_workers + cls.max_pending:
+            # 延迟导入, 子进程及脚本导入本模块时不依赖配置
+            from common.enums import ResponseCodeEnum
+            from common.exceptions import ApiException
+
+            cls.rejected += 1
+            raise ApiException(
+                code=ResponseCodeEnum.request_limited.value,
+                message="系统繁忙, 请稍后重试",
+            )
+        cls.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(cls._get_executor(), func, *args)
+        except BaseException:
+            cls.failed += 1
+            raise
+        finally:
+            cls.pending -= 1
+        cls.completed += 1
+        return result
+
+    @classmethod
+    async def verify_password(
+        cls,
+        plain_password: str,
+        hashed_password: str,
+    ) -> bool:
+        return await cls._run(PasswordUtil.verify_password, plain_password, hashed_password)
+
+    @classmethod
+    async def get_password_hash(cls, plain_password: str) -> str:
+        return await cls._run(PasswordUtil.get_password_hash, plain_password)
+
+    @classmethod
+    async def get_password_hashes(cls, plain_passwords: Sequence[str]) -> list[str]:
+        if cls._bulk_semaphore is None:
+            cls._bulk_semaphore = asyncio.Semaphore(max(1, cls.max_workers - 1))
+        semaphore = cls._bulk_semaphore
+
+        async def hash_one(plain_password: str) -> str:
+            async with semaphore:
+                return await cls.get_password_hash(plain_password)
+
+        return await asyncio.gather(*(hash_one(password) for password in plain_passwords))
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """等待管理线程退出后再返回, 避免其向已关闭的管道写入; 在线程中执行, 不阻塞事件循环"""
+        executor, cls._executor = cls._executor, None
+        if executor is not None and cls._pid == os.getpid():
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        return {
+            "max_workers": cls.max_workers,
+            "max_pending": cls.max_pending,
+            "pending": cls.pending,
+            "completed": cls.completed,
+            "failed": cls.failed,
+            "rejected": cls.rejected,
+        }
+
+
 T = TypeVar("T", bound=BaseModel)
 
 
@@ -240,6 +347,21 @@ class JwtUtil(Generic[T]):
                 return key
         return None
 
+    @classmethod
+    def encode(
+        cls,
+        payload: BaseModel,
+        key: str | bytes | Mapping[str, Any],
+        algorithm: str | None = None,
+        headers: dict | None = None,
+    ) -> str:
+        return jwt.encode(
+            claims=payload.model_dump(exclude_none=True),
+            key=key,
+            algorithm=algorithm if algorithm else cls.default_algorithm,
+            headers=headers,
+        )
+
     @classmethod
     def decode(
         cls,
@@ -34,6 +34,8 @@ class ResponseHeaderKeyEnum(StrEnumMore):
 
     request_id = ("X-Request-Id", "请求唯一ID")
     process_time = ("X-Process-Time", "请求处理时间")  # ms
+    sql_count = ("X-Sql-Count", "SQL语句数")
+    sql_time = ("X-Sql-Time", "SQL执行耗时")  # ms
 
 
 @unique
@@ -66,6 +68,8 @@ class ContextKeyEnum(StrEnumMore):
     # custom
     response_code = ("response_code", "响应code")
     response_data = ("response_data", "响应数据")  #  只记录code != 0 的
+    sql_explain = ("sql_explain", "SQL执行计划采样")
+    sql_stats = ("sql_stats", "SQL语句统计")
 
 
 class TokenSceneTypeEnum(StrEnumMore):
@@ -78,3 +82,42 @@ class TokenSceneTypeEnum(StrEnumMore):
     android = ("Android", "Android")
     wmp = ("WMP", "微信小程序")
     unknown = ("Unknown", "未知")
+
+
+@unique
+class CountStrategyEnum(StrEnumMore):
+    """列表总数统计策略"""
+
+    exact = ("exact", "精确计数")
+    cached = ("cached", "按过滤条件缓存计数")
+    estimated = ("estimated", "按执行计划估算")
+    skip = ("skip", "不计数")
+
+
+@unique
+class ExportFormatEnum(StrEnumMore):
+    """导出文件格式"""
+
+    csv = ("csv", "CSV")
+    ndjson = ("ndjson", "NDJSON(每行一个json)")
+    xlsx = ("xlsx", "Excel")
+
+
+@unique
+class ExportStatusEnum(StrEnumMore):
+    """后台导出任务状态"""
+
+    pending = ("pending", "排队中")
+    running = ("running", "导出中")
+    success = ("success", "成功")
+    failed = ("failed", "失败")
+
+
+@unique
+class ExplainIssueEnum(StrEnumMore):
+    """执行计划问题"""
+
+    full_scan = ("full_scan", "全表扫描")
+    full_index_scan = ("full_index_scan", "全索引扫描")
+    filesort = ("filesort", "文件排序")
+    temporary = ("temporary", "临时表")
@@ -9,10 +9,13 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import ResponseValidationError
 from pymysql.converters import escape_item, escape_bytes_prefixed
 from aiomysql.connection import Connection
+from tortoise.backends.mysql.client import MySQLClient, TransactionWrapper
 from tortoise.expressions import RawSQL
 from starlette.concurrency import run_in_threadpool
 
 from common.responses import Resp
+from common.serializer import dump_resp
+from storages.relational.base.instrument import instrument_client
 
 
 def validate(
@@ -74,8 +77,9 @@ async def serialize_response(
     is_coroutine: bool = True,
 ) -> Any:
     if isinstance(response_content, Resp):
-        # 兼容 Resp 和 PageResp
-        value = response_content.model_dump(
+        # 兼容 Resp 和 PageResp; 直接返回 json bytes, 由 AesResponse 原样输出
+        return dump_resp(
+            response_content,
             include=include,
             exclude=exclude,
             by_alias=by_alias,
@@ -83,16 +87,6 @@ async def serialize_response(
             exclude_defaults=exclude_defaults,
             exclude_none=exclude_none,
         )
-        return jsonable_encoder(
-            value,
-            include=include,
-            exclude=exclude,
-            by_alias=by_alias,
-            exclude_unset=exclude_unset,
-            exclude_defaults=exclude_defaults,
-            exclude_none=exclude_none,
-            custom_encoder=response_content.model_config.get("json_encoders"),  # type: ignore
-        )
 
     if field:
         errors = []
@@ -143,3 +137,5 @@ def patch() -> None:
     ModelField.validate = validate  # type: ignore
     Connection.escape = escape  # type: ignore
     routing.serialize_response = serialize_response  # type: ignore
+    # SQL 执行埋点, 见 storages.relational.base.instrument
+    instrument_client(MySQLClient, TransactionWrapper)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import inspect
 from typing import Literal
+from functools import lru_cache
 from datetime import datetime
 from collections.abc import Callable
 
@@ -29,9 +30,22 @@ def optional(*fields: str) -> Callable[[type[pydantic.BaseModel]], type[pydantic
     return dec
 
 
+# 字段子集模型缓存的最大数量
+SUB_FIELDS_MODEL_CACHE_SIZE = 256
+
+
 def create_sub_fields_model(
     base_model: type[pydantic.BaseModel] | type[PydanticModel],
     fields: set[str],
+) -> type[pydantic.BaseModel] | type[PydanticModel]:
+    """base_model 的字段子集模型, 按 (base_model, 字段集合) 缓存"""
+    return _create_sub_fields_model(base_model, frozenset(fields))
+
+
+@lru_cache(maxsize=SUB_FIELDS_MODEL_CACHE_SIZE)
+def _create_sub_fields_model(
+    base_model: type[pydantic.BaseModel] | type[PydanticModel],
+    fields: frozenset[str],
 ) -> type[pydantic.BaseModel] | type[PydanticModel]:
     model_fields = {}
 
@@ -9,7 +9,7 @@ from pydantic import Field, BaseModel, ValidationInfo, field_validator, model_va
 from fastapi.responses import ORJSONResponse
 from starlette_context import context
 
-from common.enums import ResponseCodeEnum
+from common.enums import ResponseCodeEnum, CountStrategyEnum
 from common.utils import datetime_now
 from common.context import ContextKeyEnum
 from common.schemas import Pager, CRUDPager
@@ -17,12 +17,15 @@ from common.pydantic import CommonConfigDict
 
 
 class AesResponse(ORJSONResponse):
-    def render(self, content: dict) -> bytes:
-        """AES加密响应体"""
+    def render(self, content: dict | str | bytes) -> bytes:
+        """AES加密响应体, bytes 视为已编码的 json"""
         # if not get_settings().DEBUG:
         # content = AESUtil(local_configs.AES.SECRET).encrypt_data(
         #       orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS).decode())
-        if isinstance(content, str):
+        if isinstance(content, bytes):
+            dump_content = content
+
+        elif isinstance(content, str):
             dump_content = content.encode()
 
         else:
@@ -108,35 +111,55 @@ class SimpleSuccess(Resp):
 class PageInfo(BaseModel):
     """翻页相关信息."""
 
-    total_page: int
-    total_count: int
+    total_page: int | None = Field(default=None, description="总页数, 不计数时为空")
+    total_count: int | None = Field(default=None, description="总数, 不计数时为空")
     size: int
-    page: int
+    page: int | None = Field(default=None, description="页码, 游标分页时为空")
+    has_more: bool = Field(default=False, description="是否有下一页")
+    count_strategy: CountStrategyEnum = Field(
+        default=CountStrategyEnum.exact,
+        description=f"总数统计策略, {CountStrategyEnum._dict}",  # type: ignore
+    )
 
 
 class PageData(BaseModel, Generic[DataT]):
     page_info: PageInfo
     records: Sequence[DataT]
+    next_cursor: str | None = Field(default=None, description="下一页游标, 没有下一页时为空")
 
     def __init__(
         self,
         records: Sequence[DataT],
-        total_count: int = 0,
+        total_count: int | None = 0,
         pager: Pager | CRUDPager = None,
         page_info: PageInfo | None = None,
+        next_cursor: str | None = None,
+        has_more: bool | None = None,
+        count_strategy: CountStrategyEnum = CountStrategyEnum.exact,
     ) -> None:
         if page_info is None:
-            page_info = generate_page_info(total_count, pager)
+            page_info = generate_page_info(total_count, pager, has_more, count_strategy)
         super().__init__(
             page_info=page_info,
             records=records,
+            next_cursor=next_cursor,
         )
 
 
-def generate_page_info(total_count: int, pager: Pager | CRUDPager) -> PageInfo:
+def generate_page_info(
+    total_count: int | None,
+    pager: Pager | CRUDPager,
+    has_more: bool | None = None,
+    count_strategy: CountStrategyEnum = CountStrategyEnum.exact,
+) -> PageInfo:
+    page = None if getattr(pager, "cursor", None) else pager.offset // pager.limit + 1
+    if has_more is None:
+        has_more = total_count is not None and pager.offset + pager.limit < total_count
     return PageInfo(
-        total_page=ceil(total_count / pager.limit),
+        total_page=None if total_count is None else ceil(total_count / pager.limit),
         total_count=total_count,
         size=pager.limit,
-        page=pager.offset // pager.limit + 1,
+        page=page,
+        has_more=has_more,
+        count_strategy=count_strategy,
     )
@@ -0,0 +1,70 @@
+"""路由权限码预编译
+
+启动时遍历全部路由(含挂载的子应用), 为每个 (root_path, method) 生成候选权限码并挂到路由对象上,
+请求时直接查表; 未预编译的组合(如反向代理附加的 root_path)首次访问时生成并缓存
+"""
+
+from typing import NamedTuple
+
+from fastapi import FastAPI, Request
+from starlette.routing import Mount, Route
+
+
+class RoutePermissionCodes(NamedTuple):
+    """接口候选权限码, 任一命中即通过"""
+
+    account: tuple[str, ...]  # 账户: 全部、服务全部、接口
+    api_key: tuple[str, ...]  # ApiKey: 服务全部、接口
+
+
+def build_permission_codes(app_code: str, method: str, full_path: str) -> RoutePermissionCodes:
+    service_all = f"{app_code}:*"
+    api = f"{app_code}:{method}:{full_path}"
+    return RoutePermissionCodes(
+        account=("*", service_all, api),
+        api_key=(service_all, api),
+    )
+
+
+def _route_table(route: Route) -> dict[tuple[str, str], RoutePermissionCodes]:
+    table = route.__dict__.get("permission_codes")
+    if table is None:
+        table = route.permission_codes = {}  # type: ignore
+    return table
+
+
+def compile_route_permissions(app: FastAPI) -> int:
+    """预编译 app 下全部路由的权限码, 返回编译的条目数"""
+    count = 0
+
+    def walk(_app: FastAPI | Mount, app_code: str | None, prefix: str = "") -> None:
+        nonlocal count
+        for route in _app.routes:
+            if isinstance(route, Route):
+                if not route.methods or not app_code:
+                    continue
+                table = _route_table(route)
+                for method in route.methods:
+                    if method in ["HEAD", "OPTIONS"]:
+                        continue
+                    table[(prefix, method)] = build_permission_codes(app_code, method, f"{prefix}{route.path}")
+                    count += 1
+            elif isinstance(route, Mount):
+                walk(route, getattr(route.app, "code", app_code), prefix=f"{prefix}{route.path}")
+
+    walk(app, getattr(app, "code", None))
+    return count
+
+
+def get_route_permission_codes(request: Request) -> RoutePermissionCodes:
+    root_path: str = request.scope["root_path"]
+    route: Route = request.scope["route"]
+    table = _route_table(route)
+    codes = table.get((root_path, request.method))
+    if codes is None:
+        codes = table[(root_path, request.method)] = build_permission_codes(
+            request.app.code,
+            request.method,
+            f"{root_path}{route.path}",
+        )
+    return codes
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, PositiveInt, conint
 from tortoise.contrib.pydantic import PydanticModel
 
+from common.enums import CountStrategyEnum
+
 
 class Pager(BaseModel):
     limit: PositiveInt = 10
@@ -8,11 +10,16 @@ class Pager(BaseModel):
 
 
 class CRUDPager(Pager):
-    order_by: set[str] = set()
+    order_by: list[str] = []
+    # 游标分页, 设置后忽略 offset
+    cursor: str | None = None
     search: str | None = None
     selected_fields: set[str] | None = None
     available_search_fields: set[str] | None = None
     list_schema: type[PydanticModel | BaseModel]
+    count_strategy: CountStrategyEnum = CountStrategyEnum.exact
+    # cached 策略的缓存时间(秒)
+    count_cache_ttl: PositiveInt = 30
     # available_sort_fields: set[str] | None = None
     # available_search_fields: set[str] | None = None
 
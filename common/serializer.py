@@ -0,0 +1,163 @@
+"""响应序列化
+
+- Resp: model_dump 后由 orjson 一次编码(dump_resp), datetime 等在 json_default 中按 Resp.json_encoders 处理,
+  不再经过 jsonable_encoder, 输出与 model_dump + jsonable_encoder + orjson 一致
+- 列表/详情快速路径: 响应 schema 只包含数据库列时, values() 取 dict, 按预编译的字段计划直接用 orjson 编码,
+  跳过 tortoise 模型实例化、pydantic 校验及 model_dump; 输出与常规路径一致
+"""
+
+import re
+import types
+from enum import Enum
+from uuid import UUID
+from types import GeneratorType
+from typing import Any, Union, NamedTuple, get_args, get_origin
+from decimal import Decimal
+from pathlib import PurePath
+from datetime import date, time, datetime, timedelta
+from functools import lru_cache
+from ipaddress import IPv4Address, IPv4Network, IPv6Address, IPv6Network
+from collections import deque
+from collections.abc import Sequence
+
+import orjson
+import pydantic
+from pydantic_core import Url
+from fastapi.encoders import jsonable_encoder
+from tortoise.contrib.pydantic import PydanticModel
+
+from common.utils import DATETIME_FORMAT_STRING
+from common.pydantic import SUB_FIELDS_MODEL_CACHE_SIZE
+from common.responses import Resp, AesResponse
+
+# values() 取出后 orjson(及 json_default) 编码结果与 jsonable_encoder 一致的类型
+_PLAIN_TYPES = (int, str, bool, float, datetime, date, time, UUID, Decimal, Enum, dict, list)
+
+
+class JsonFieldPlan(NamedTuple):
+    # values() 字段
+    columns: tuple[str, ...]
+    # 输出 key, 与 columns 一一对应
+    keys: tuple[str, ...]
+
+    @property
+    def renamed(self) -> bool:
+        return self.columns != self.keys
+
+    def record(self, row: dict) -> dict:
+        if not self.renamed and len(row) == len(self.columns):
+            return row
+        return {key: row[column] for column, key in zip(self.columns, self.keys, strict=True)}
+
+    def records(self, rows: Sequence[dict]) -> Sequence[dict]:
+        if not rows or (not self.renamed and len(rows[0]) == len(self.columns)):
+            return rows
+        return [self.record(row) for row in rows]
+
+
+def _is_plain(annotation: Any) -> bool:  # ruff: noqa: ANN401
+    if get_origin(annotation) in (Union, types.UnionType):
+        return all(arg is type(None) or _is_plain(arg) for arg in get_args(annotation))
+    annotation = get_origin(annotation) or annotation
+    return isinstance(annotation, type) and issubclass(annotation, _PLAIN_TYPES)
+
+
+@lru_cache(maxsize=SUB_FIELDS_MODEL_CACHE_SIZE)
+def compile_json_plan(schema: type[pydantic.BaseModel]) -> JsonFieldPlan | None:
+    """schema 可走快速路径时返回字段计划, 否则返回 None
+
+    要求: tortoise 生成的 schema, 字段均为数据库列且类型可直接编码, 没有计算字段、自定义校验器和序列化器
+    """
+    orig_model = schema.model_config.get("orig_model")
+    if orig_model is None or schema.model_computed_fields:
+        return None
+    decorators = schema.__pydantic_decorators__
+    if (
+        decorators.validators
+        # tortoise PydanticModel 自带的 _tortoise_convert 只处理关系字段
+        or decorators.field_validators.keys() - PydanticModel.__pydantic_decorators__.field_validators.keys()
+        or decorators.root_validators
+        or decorators.model_validators
+        or decorators.field_serializers
+        or decorators.model_serializers
+    ):
+        return None
+
+    db_fields = orig_model._meta.db_fields
+    columns, keys = [], []
+    for name, field in schema.model_fields.items():
+        if name not in db_fields or not _is_plain(field.annotation):
+            return None
+        columns.append(name)
+        keys.append(field.serialization_alias or field.alias or name)
+    return JsonFieldPlan(tuple(columns), tuple(keys))
+
+
+# jsonable_encoder 中直接转为 str 的类型
+_STR_TYPES = (
+    PurePath,
+    Url,
+    pydantic.AnyUrl,
+    IPv4Address,
+    IPv4Network,
+    IPv6Address,
+    IPv6Network,
+    pydantic.SecretStr,
+    pydantic.SecretBytes,
+)
+
+# 与 AesResponse 一致
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def json_default(value: Any) -> Any:  # ruff: noqa: ANN401
+    # 与 Resp.model_config.json_encoders 及 jsonable_encoder 的处理一致
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT_STRING)
+    if isinstance(value, date | time):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)  # type: ignore
+    if isinstance(value, set | frozenset | deque | GeneratorType):
+        return list(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, re.Pattern):
+        return value.pattern
+    if isinstance(value, _STR_TYPES):
+        return str(value)
+    raise TypeError
+
+
+def dumps(value: Any) -> bytes:  # ruff: noqa: ANN401
+    """编码 model_dump 的结果; json_default 不支持的类型退回 jsonable_encoder"""
+    try:
+        return orjson.dumps(value, default=json_default, option=JSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return orjson.dumps(
+            jsonable_encoder(value, custom_encoder=Resp.model_config.get("json_encoders")),  # type: ignore
+            option=JSON_OPTIONS,
+        )
+
+
+def dump_resp(resp: pydantic.BaseModel, **kwargs: Any) -> bytes:  # ruff: noqa: ANN401
+    """Resp -> json bytes, kwargs 为 model_dump 的 include/exclude/by_alias 等参数"""
+    return dumps(resp.model_dump(**kwargs))
+
+
+def encode_data(data: Any) -> bytes:  # ruff: noqa: ANN401
+    """按 Resp 序列化的结果编码 data, 用于缓存"""
+    if isinstance(data, pydantic.BaseModel):
+        data = data.model_dump(by_alias=True)
+    elif isinstance(data, list | tuple):
+        data = [i.model_dump(by_alias=True) if isinstance(i, pydantic.BaseModel) else i for i in data]
+    return dumps(data)
+
+
+def json_response(data: Any) -> AesResponse:  # ruff: noqa: ANN401
+    """以 Resp 信封返回已是 json 兼容结构的数据, 直接编码为 bytes; 已编码的 data 以 orjson.Fragment 传入"""
+    envelope = Resp().model_dump()
+    envelope["data"] = data
+    return AesResponse(content=dumps(envelope))
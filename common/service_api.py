@@ -18,6 +18,12 @@ from common.utils import merge_dict
 from configs.config import LocalConfig
 from common.responses import AesResponse
 from common.monkey_patch import patch
+from storages.aredis.scripts import LuaScript
+from storages.aredis.near_cache import NearCacheSubscriber
+from storages.aredis.session import SessionIndex
+from storages.aredis.revocation import RevokedTokenFilter
+from common.encrypt import AsyncPasswordUtil
+from common.route_permission import compile_route_permissions
 
 
 class _ConfigRegistry:
@@ -62,8 +68,30 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # tortoise
     await Tortoise.init(config=app.settings.relational.tortoise_orm_config)
 
+    # redis: fork 之后按 worker 创建并预热连接池
+    await app.settings.redis.init_pools()
+    await LuaScript.load_all()
+    # 进程内近端缓存失效订阅
+    await NearCacheSubscriber.start()
+    # 签名 token 吊销列表同步
+    await RevokedTokenFilter.start()
+    # 会话索引后台压缩
+    await SessionIndex.start_compactor()
+    # 路由权限码预编译
+    compile_route_permissions(app)  # type: ignore
+    # 密码哈希进程池, 首次使用时创建
+    AsyncPasswordUtil.configure(
+        app.settings.server.password_hasher.max_workers,
+        app.settings.server.password_hasher.max_pending,
+    )
+
     yield
 
+    await AsyncPasswordUtil.shutdown()
+    await SessionIndex.stop_compactor()
+    await RevokedTokenFilter.stop()
+    await NearCacheSubscriber.stop()
+    await app.settings.redis.close_pools()
     await Tortoise.close_connections()
 
 
@@ -5,15 +5,16 @@ from typing import Self, Literal
 from pathlib import Path
 from zoneinfo import ZoneInfo
 from contextlib import asynccontextmanager
-from functools import lru_cache
 from urllib.parse import unquote
-from collections.abc import AsyncGenerator
+from collections.abc import Callable, AsyncGenerator
 
 from pydantic import HttpUrl, MySQLDsn, RedisDsn, BaseModel, ConfigDict, model_validator
 from redis.retry import Retry
-from redis.asyncio import Redis, ConnectionPool
+from redis.asyncio import Redis
 from redis.backoff import NoBackoff
 
+from storages.aredis.pool import RedisPoolStats, RedisPoolRegistry, StatsBlockingConnectionPool
+
 
 class EnvironmentEnum(str, enum.Enum):
     local = "local"
@@ -110,35 +111,60 @@ class Relational(BaseModel):
         }
 
 
+class NearCacheConfig(BaseModel):
+    """进程内近端缓存"""
+
+    enabled: bool = True
+    maxsize: int = 10000  # 每个缓存的最大条目数
+    ttl: float = 60  # 秒, 失效广播丢失时的兜底过期时间
+
+
 class RedisConfig(BaseModel):
     user_center: RedisDsn
     knowledge_base: RedisDsn
     celery_broker: RedisDsn
     celery_backend: RedisDsn
-    max_connections: int = 10
-
-    def connection_pool(self, service: ConnectionNameEnum) -> ConnectionPool:
-        @lru_cache()
-        def _create_redis_pool(_service: ConnectionNameEnum) -> ConnectionPool:
-            return ConnectionPool.from_url(
-                url=str(getattr(self, _service.value)),
+    max_connections: int = 10  # 每个 worker 每个连接的最大连接数
+    pool_timeout: float = 5  # 连接耗尽时等待可用连接的最大秒数
+    prewarm_connections: int = 2  # worker 启动时预先建立的连接数
+    near_cache: NearCacheConfig = NearCacheConfig()
+
+    def _pool_factory(self, service: ConnectionNameEnum) -> Callable[[], StatsBlockingConnectionPool]:
+        def _create_redis_pool() -> StatsBlockingConnectionPool:
+            return StatsBlockingConnectionPool.from_url(
+                url=str(getattr(self, service.value)),
                 max_connections=self.max_connections,
+                timeout=self.pool_timeout,
                 decode_responses=True,
                 encoding_errors="strict",
                 retry=Retry(NoBackoff(), retries=10),
                 health_check_interval=30,
             )
 
-        return _create_redis_pool(service)
+        return _create_redis_pool
 
+    def connection_pool(self, service: ConnectionNameEnum) -> StatsBlockingConnectionPool:
+        """当前进程的连接池, 首次获取时创建"""
+        return RedisPoolRegistry.get(service.value, self._pool_factory(service))
+
+    async def init_pools(self) -> None:
+        """worker 启动时(fork 之后)创建并预热连接池"""
+        for service in ConnectionNameEnum:
+            await RedisPoolRegistry.prewarm(service.value, self._pool_factory(service), self.prewarm_connections)
+
+    async def close_pools(self) -> None:
+        await RedisPoolRegistry.close()
+
+    def pool_stats(self) -> list[RedisPoolStats]:
+        return RedisPoolRegistry.stats()
 
     @asynccontextmanager
     async def get_redis(self, service: ConnectionNameEnum, **kwargs) -> AsyncGenerator[Redis, None]:  # type: ignore
+        r: Redis = Redis(
+            connection_pool=self.connection_pool(service),
+            **kwargs,
+        )
         try:
-            r: Redis = Redis(
-                connection_pool=self.connection_pool(service),
-                **kwargs,
-            )
             yield r
         finally:
             await r.close()
@@ -179,6 +205,62 @@ class ServiceStringConfig(BaseModel):
     knowledge_base: str
 
 
+class PasswordHasherConfig(BaseModel):
+    """密码哈希进程池, 每个 worker 一个"""
+
+    max_workers: int = 2  # 进程数
+    max_pending: int = 64  # 最大排队数, 超出时直接返回请求限制
+
+
+class ApiKeyConfig(BaseModel):
+    """外部 ApiKey 签名校验"""
+
+    timestamp_tolerance: int = 30  # 时间戳允许误差, 秒
+    require_nonce: bool = False  # 是否强制要求 x-nonce; 重放的签名始终拦截, 不传 nonce 时同一秒内只能发起一个相同请求
+
+
+class TokenModeEnum(str, enum.Enum):
+    """access token 模式"""
+
+    opaque = "opaque"  # 随机串, 每次请求通过 redis 解析
+    jwt = "jwt"  # 签名 token, worker 本地验签
+
+
+class JwtTokenConfig(BaseModel):
+    """签名 access token 配置, token_mode 为 jwt 时生效"""
+
+    private_key_path: Path | None = None  # 相对路径基于项目根目录
+    public_key_path: Path | None = None
+    algorithm: str = "RS256"
+    issuer: str = "UserCenter"
+    revocation_sync_interval: float = 5  # 吊销列表增量同步间隔, 秒
+    revocation_max_staleness: float = 30  # 超过该时长未同步成功时, 逐个回源 redis 校验
+
+    @model_validator(mode="after")
+    def resolve_key_paths(self) -> Self:
+        if self.private_key_path and not self.private_key_path.is_absolute():
+            self.private_key_path = BASE_DIR / self.private_key_path
+        if self.public_key_path and not self.public_key_path.is_absolute():
+            self.public_key_path = BASE_DIR / self.public_key_path
+        return self
+
+
+class SqlExplainConfig(BaseModel):
+    """请求 SQL 执行计划采样, 见 service.sql_explain"""
+
+    enabled: bool = False
+    sample_rate: float = 0.01  # 请求采样比例(0~1), 调试时可设为 1
+    max_statements: int = 20  # 每个采样请求 / 每个路由最多记录的语句(按形状去重)数
+
+
+class SqlStatsConfig(BaseModel):
+    """请求级 SQL 统计, 见 service.sql_stats"""
+
+    enabled: bool = True
+    repeat_threshold: int = 10  # 同一语句形状在单个请求内执行超过该次数时告警(疑似 N+1)
+    response_headers: bool = False  # 是否在响应头返回语句数及耗时, 调试用
+
+
 class Server(BaseModel):
     address: HttpUrl = HttpUrl("http://0.0.0.0:8000")
     cors: CorsConfig = CorsConfig()
@@ -190,12 +272,26 @@ class Server(BaseModel):
     redoc_uri: str = "/redoc"
     openapi_uri: str = "/openapi.json"
     token_expire_seconds: int = 3600 * 24 * 7  # 7天
+    token_mode: TokenModeEnum = TokenModeEnum.opaque
+    session_compact_interval: int = 3600  # 会话索引后台压缩间隔, 秒, 0 为不启用
+    jwt: JwtTokenConfig = JwtTokenConfig()
+    password_hasher: PasswordHasherConfig = PasswordHasherConfig()
+    list_query_concurrency: int = 2  # 列表分页与计数查询的最大并发连接数, 1 为串行; 连接池空闲不足时自动串行
+    api_key: ApiKeyConfig = ApiKeyConfig()
+    sql_explain: SqlExplainConfig = SqlExplainConfig()
+    sql_stats: SqlStatsConfig = SqlStatsConfig()
 
     redirect_openapi_prefix: ServiceStringConfig = ServiceStringConfig(
         user_center="/user",
         knowledge_base="/kb",
     )
 
+    @model_validator(mode="after")
+    def check_jwt_keys(self) -> Self:
+        if self.token_mode == TokenModeEnum.jwt and not (self.jwt.private_key_path and self.jwt.public_key_path):
+            raise ValueError("token_mode 为 jwt 时需配置 jwt.private_key_path 和 jwt.public_key_path")
+        return self
+
 
 class Project(BaseModel):
     unique_code: ServiceStringConfig = ServiceStringConfig(
@@ -0,0 +1,122 @@
+"""列表响应序列化耗时对比: 模型实例 + pydantic 校验 + model_dump vs values() + 字段计划 + orjson
+
+在独立的 benchmark_list_serialize 表中灌入一页(limit 行)数据, 分别以常规路径和快速路径(common.serializer)
+执行 list_view 并完成响应编码, 输出单次请求耗时及每行耗时; 默认使用 sqlite 内存库, 查询本身耗时相同
+
+    python script/benchmark/list_serialize.py --limit 500 --requests 50
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from unittest import mock
+
+sys.path.append(".")  # noqa
+
+from pydantic import BaseModel  # noqa
+from tortoise import Tortoise, fields  # noqa
+from tortoise.utils import generate_schema_for_client  # noqa
+from tortoise.models import Model  # noqa
+from starlette_context import request_cycle_context  # noqa
+from tortoise.contrib.pydantic import pydantic_model_creator  # noqa
+
+from service import crud  # noqa
+from common.schemas import CRUDPager  # noqa
+from common.responses import Resp, AesResponse  # noqa
+from common.monkey_patch import serialize_response  # noqa
+
+
+class BenchmarkSerializeRecord(Model):
+    id = fields.BigIntField(pk=True)
+    category = fields.IntField()
+    name = fields.CharField(max_length=64)
+    remark = fields.CharField(max_length=255, null=True)
+    amount = fields.DecimalField(max_digits=12, decimal_places=2)
+    enabled = fields.BooleanField(default=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "benchmark_list_serialize"
+        ordering = ["-id"]
+
+
+BenchmarkSerializeRecordList = pydantic_model_creator(BenchmarkSerializeRecord, name="BenchmarkSerializeRecordList")
+
+
+class EmptyFilter(BaseModel):
+    pass
+
+
+async def seed(rows: int, batch: int = 5000) -> None:
+    existing = await BenchmarkSerializeRecord.all().count()
+    for start in range(existing, rows, batch):
+        await BenchmarkSerializeRecord.bulk_create(
+            [
+                BenchmarkSerializeRecord(category=i % 50, name=f"record-{i}", remark="remark", amount=i / 100)
+                for i in range(start, min(start + batch, rows))
+            ],
+        )
+
+
+async def render(pager: CRUDPager) -> bytes:
+    with request_cycle_context({}):
+        resp = await crud.list_view(BenchmarkSerializeRecord.all(), EmptyFilter(), pager)
+        if isinstance(resp, Resp):
+            return AesResponse(content=await serialize_response(response_content=resp)).body
+        return resp.body
+
+
+async def run(name: str, limit: int, requests: int) -> bytes:
+    latencies: list[float] = []
+    body = b""
+    for _ in range(requests):
+        pager = CRUDPager(limit=limit, offset=0, list_schema=BenchmarkSerializeRecordList)
+        start = time.perf_counter()
+        body = await render(pager)
+        latencies.append(time.perf_counter() - start)
+    mean = statistics.mean(latencies)
+    print(
+        f"{name:<8} p50: {statistics.median(latencies) * 1000:7.2f}ms  "
+        f"mean: {mean * 1000:7.2f}ms  per row: {mean / limit * 1_000_000:6.1f}us",
+    )
+    return body
+
+
+async def main(db_url: str, limit: int, requests: int) -> None:
+    await Tortoise.init(
+        config={
+            "connections": {"default": db_url, "unused": "sqlite://:memory:"},
+            "apps": {
+                "benchmark": {"models": ["__main__"], "default_connection": "default"},
+                # 业务模型导入时已注册, 指向内存库避免在测试库中建表
+                "user_center": {"models": ["storages.relational.models.user_center"], "default_connection": "unused"},
+                "knowledge_base": {
+                    "models": ["storages.relational.models.knowledge_base"],
+                    "default_connection": "unused",
+                },
+            },
+        },
+    )
+    try:
+        await generate_schema_for_client(Tortoise.get_connection("default"), safe=True)
+        await seed(limit)
+        await run("warmup", limit, 3)
+        with mock.patch.object(crud, "compile_json_plan", return_value=None):
+            normal = await run("normal", limit, requests)
+        fast = await run("fast", limit, requests)
+        # response_time 精确到秒, 跨秒时两者不同
+        print("响应一致:", normal.split(b'"data"')[1] == fast.split(b'"data"')[1])
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="列表响应常规/快速序列化耗时对比")
+    parser.add_argument("--db-url", default="sqlite://:memory:")
+    parser.add_argument("--limit", type=int, default=500, help="每页行数")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.db_url, args.limit, args.requests))
@@ -0,0 +1,83 @@
+"""登录密码校验吞吐对比: 事件循环内同步 bcrypt vs AsyncPasswordUtil 进程池
+
+模拟 concurrency 个并发登录请求, 同时运行一个每 10ms 唤醒一次的心跳任务,
+心跳延迟反映同一 worker 上其他请求被阻塞的程度
+
+    python script/benchmark/password_login.py --requests 64 --concurrency 16 --workers 2
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(".")  # noqa
+
+from common.encrypt import PasswordUtil, AsyncPasswordUtil  # noqa
+
+PASSWORD = "Benchmark@123"
+
+
+async def heartbeat(lags: list[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def sync_login(hashed: str) -> bool:
+    return PasswordUtil.verify_password(PASSWORD, hashed)
+
+
+async def async_login(hashed: str) -> bool:
+    return await AsyncPasswordUtil.verify_password(PASSWORD, hashed)
+
+
+async def run(name: str, login, hashed: str, requests: int, concurrency: int) -> None:  # type: ignore
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            assert await login(hashed)
+            latencies.append(time.perf_counter() - start)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+
+    latencies.sort()
+    lags.sort()
+    print(
+        f"{name:<8} 吞吐: {requests / elapsed:7.1f} req/s  "
+        f"p50: {statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f}ms  "
+        f"心跳延迟 max: {(lags[-1] if lags else elapsed) * 1000:7.1f}ms",
+    )
+
+
+async def main(requests: int, concurrency: int, workers: int) -> None:
+    hashed = PasswordUtil.get_password_hash(PASSWORD)
+    AsyncPasswordUtil.configure(max_workers=workers, max_pending=requests)
+    # 预热进程池, 排除进程启动耗时
+    await asyncio.gather(*[AsyncPasswordUtil.verify_password(PASSWORD, hashed) for _ in range(workers)])
+
+    await run("sync", sync_login, hashed, requests, concurrency)
+    await run("pool", async_login, hashed, requests, concurrency)
+    await AsyncPasswordUtil.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="登录密码校验吞吐对比")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.workers))
@@ -0,0 +1,104 @@
+"""Resp 序列化耗时对比: model_dump + jsonable_encoder + orjson vs model_dump + orjson(common.serializer.dump_resp)
+
+以 PageData 包装 limit 行记录(含 datetime/Decimal/枚举等常见列), 分别按原 serialize_response 的三次遍历和单次编码
+生成响应体, 输出单次耗时及每行耗时, 并校验两者输出一致; 不依赖数据库
+
+    python script/benchmark/resp_serialize.py --limit 1000 --requests 50
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from decimal import Decimal
+from datetime import datetime
+from collections.abc import Callable
+
+sys.path.append(".")  # noqa
+
+from pydantic import Field, BaseModel  # noqa
+from fastapi.encoders import jsonable_encoder  # noqa
+from starlette_context import request_cycle_context  # noqa
+
+from common.enums import ExportStatusEnum  # noqa
+from common.utils import datetime_now  # noqa
+from common.schemas import Pager  # noqa
+from common.pydantic import CommonConfigDict  # noqa
+from common.responses import Resp, PageData, AesResponse  # noqa
+from common.serializer import dump_resp  # noqa
+
+
+class BenchmarkRecord(BaseModel):
+    model_config = CommonConfigDict
+
+    id: int
+    name: str = Field(description="名称")
+    remark: str | None = None
+    amount: Decimal
+    status: ExportStatusEnum
+    enabled: bool = True
+    tags: list[str] = []
+    created_at: datetime
+    updated_at: datetime | None = None
+
+
+def build_resp(limit: int) -> Resp:
+    now = datetime_now()
+    records = [
+        BenchmarkRecord(
+            id=i,
+            name=f"record-{i}",
+            remark="remark" if i % 2 else None,
+            amount=Decimal(i) / 100,
+            status=ExportStatusEnum.success,
+            tags=["a", "b"],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(limit)
+    ]
+    return Resp(data=PageData(records=records, total_count=limit, pager=Pager(limit=limit, offset=0)))
+
+
+def jsonable(resp: Resp) -> bytes:
+    """原 serialize_response + AesResponse.render"""
+    value = resp.model_dump(by_alias=True)
+    return AesResponse(
+        content=jsonable_encoder(value, by_alias=True, custom_encoder=resp.model_config.get("json_encoders")),
+    ).body
+
+
+def single(resp: Resp) -> bytes:
+    return AesResponse(content=dump_resp(resp, by_alias=True)).body
+
+
+def run(name: str, func: Callable[[Resp], bytes], resp: Resp, limit: int, requests: int) -> bytes:
+    latencies: list[float] = []
+    body = b""
+    for _ in range(requests):
+        start = time.perf_counter()
+        body = func(resp)
+        latencies.append(time.perf_counter() - start)
+    mean = statistics.mean(latencies)
+    print(
+        f"{name:<8} p50: {statistics.median(latencies) * 1000:7.2f}ms  "
+        f"mean: {mean * 1000:7.2f}ms  per row: {mean / limit * 1_000_000:6.1f}us",
+    )
+    return body
+
+
+def main(limit: int, requests: int) -> None:
+    with request_cycle_context({}):
+        resp = build_resp(limit)
+    run("warmup", single, resp, limit, 3)
+    before = run("jsonable", jsonable, resp, limit, requests)
+    after = run("single", single, resp, limit, requests)
+    print("响应一致:", before == after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resp 序列化耗时对比")
+    parser.add_argument("--limit", type=int, default=1000, help="每页行数")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    main(args.limit, args.requests)
@@ -7,6 +7,7 @@ from common.encrypt import PasswordUtil
 
 # from storages.enums import GenderEnum
 from common.init_ctx import init_ctx  # noqa
+from service.query_cache import invalidate_query_cache  # noqa
 from storages.relational.models.user_center import Role, Account, Resource  # noqa
 
 accs = []
@@ -24,6 +25,7 @@ async def init_superuser_role():
     role, _ = await Role.update_or_create(label="超级管理员")
     all_res = await Resource.all()
     await role.resources.add(*all_res)
+    await invalidate_query_cache(Role)
     return role
 
 
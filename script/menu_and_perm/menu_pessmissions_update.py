@@ -17,8 +17,10 @@ from common.service_api import ServiceApi
 from common.init_ctx import init_ctx  # noqa
 from apis.entrypoint import factory
 from service.dependencies import token_required, api_permission_check
+from service.role.helper import rebuild_all_permission_cache
+from service.query_cache import invalidate_query_cache
 from script.menu_and_perm.data import MenuAndPerm
-from storages.relational.models.user_center import Account, Resource, Permission
+from storages.relational.models.user_center import Resource, Permission
 
 
 def filter_uri(r: Route | WebSocketRoute | Mount) -> bool:
@@ -133,11 +135,10 @@ async def create_menu_and_perm():
 
 
 async def refresh_permissions():
-    accounts = await Account.filter(deleted_at=0)
-    for acc in accounts:
-        acc: Account
-        logger.info(f"Refreshing permissions for {acc.username}")
-        await acc.update_cache_permissions()
+    role_count, account_count = await rebuild_all_permission_cache()
+    logger.info(f"Refreshed permissions for {role_count} roles and {account_count} accounts")
+    # 直接写库未经过 service.crud, 需手动失效查询缓存
+    await invalidate_query_cache(Resource, Permission)
 
 
 async def main():
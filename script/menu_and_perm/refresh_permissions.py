@@ -0,0 +1,28 @@
+"""分批重建角色权限集合及账户权限指针
+
+    python script/menu_and_perm/refresh_permissions.py --chunk-size 2000
+"""
+
+import sys
+import asyncio
+import argparse
+
+sys.path.append(".")  # noqa
+
+from loguru import logger
+
+from common.init_ctx import init_ctx  # noqa
+from service.role.helper import rebuild_all_permission_cache
+
+
+async def main(chunk_size: int) -> None:
+    await init_ctx()
+    role_count, account_count = await rebuild_all_permission_cache(chunk_size)
+    logger.info(f"Refreshed permissions for {role_count} roles and {account_count} accounts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重建角色权限缓存")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.chunk_size))
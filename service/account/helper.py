@@ -0,0 +1,133 @@
+from enum import Enum
+from typing import Any
+
+import orjson
+from tortoise.models import Model
+from tortoise.signals import post_save
+
+from configs.config import local_configs
+from storages.aredis.keys import UserCenterKey
+from configs.defines import ConnectionNameEnum
+from storages.aredis.near_cache import NearCache
+from storages.relational.base.fields import TimestampField
+from storages.relational.base.write_hooks import on_model_write
+from storages.relational.models.user_center import Account
+
+ACCOUNT_BASE_INFO_EXPIRE_SECONDS = 3600 * 24
+
+
+class AccountCache:
+    """账户基本信息两级缓存
+
+    进程内 NearCache -> redis(UC:Account:BaseInfo:{uuid}, orjson) -> mysql
+    缓存的是数据库行, 每次读取都构造新的 Account 实例, 避免请求间共享可变对象
+    不缓存密码哈希, 由缓存构造的实例为部分加载(_partial), 不含 password, save 时需指定 update_fields
+    """
+
+    # 不出 mysql 的列
+    excluded_fields = frozenset({"password"})
+
+    local: NearCache[dict] = NearCache("AccountBaseInfo")
+    conn_name = ConnectionNameEnum.user_center
+
+    redis_hits = 0
+    redis_misses = 0
+
+    @staticmethod
+    def _key(account_id: Any) -> str:  # ruff: noqa: ANN401
+        return UserCenterKey.AccountBaseInfo.format(uuid=str(account_id))  # type: ignore
+
+    @staticmethod
+    def dump_row(account: Account) -> dict:
+        row = {}
+        for model_field, column in Account._meta.fields_db_projection.items():
+            if model_field in AccountCache.excluded_fields:
+                continue
+            value = getattr(account, model_field)
+            if isinstance(Account._meta.fields_map[model_field], TimestampField):
+                value = int(value.timestamp()) if value else 0
+            elif isinstance(value, Enum):
+                value = value.value
+            row[column] = value
+        return row
+
+    @classmethod
+    async def get(cls, account_id: Any) -> Account | None:  # ruff: noqa: ANN401
+        key = str(account_id)
+        row = cls.local.get(key)
+        if row is not None:
+            return Account._init_from_db(**row)
+
+        generation = cls.local.generation
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            cached = await r.get(cls._key(key))
+        if cached:
+            cls.redis_hits += 1
+            row = orjson.loads(cached)
+            # 兼容旧版本写入的含密码哈希的缓存
+            row.pop("password", None)
+            cls.local.set(key, row, generation)
+            return Account._init_from_db(**row)
+
+        cls.redis_misses += 1
+        account = await Account.get_or_none(id=account_id, deleted_at=0)
+        if not account:
+            return None
+        await cls.set(account)
+        return account
+
+    @classmethod
+    async def set(cls, account: Account) -> None:
+        """write-through: 写 redis 并广播失效其他 worker 的本地缓存"""
+        if account.deleted_at:
+            await cls.delete(account.id)
+            return
+        row = cls.dump_row(account)
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.set(cls._key(account.id), orjson.dumps(row), ex=ACCOUNT_BASE_INFO_EXPIRE_SECONDS)
+                # 账户 -> 角色权限集合指针, 随角色、管理员标识变化
+                pipe.set(UserCenterKey.AccountPermissionRef.format(uuid=str(account.id)), account.permission_ref())  # type: ignore
+                cls.local.publish_invalidate(pipe, str(account.id))
+                await pipe.execute()
+
+    @classmethod
+    async def delete(cls, *account_ids: Any) -> None:  # ruff: noqa: ANN401
+        if not account_ids:
+            return
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.delete(*[cls._key(i) for i in account_ids])
+                pipe.delete(*[UserCenterKey.AccountPermissionRef.format(uuid=str(i)) for i in account_ids])  # type: ignore
+                cls.local.publish_invalidate(pipe, *[str(i) for i in account_ids])
+                await pipe.execute()
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        return {
+            **cls.local.stats(),
+            "redis_hits": cls.redis_hits,
+            "redis_misses": cls.redis_misses,
+        }
+
+
+@on_model_write(Account)
+async def _account_crud_write(db_model: type[Model], saved: list[Model], deleted_pks: list[Any]) -> None:
+    for account in saved:
+        await AccountCache.set(account)  # type: ignore
+    await AccountCache.delete(*deleted_pks)
+
+
+@post_save(Account)
+async def _account_saved(
+    sender: type[Account],
+    instance: Account,
+    created: bool,
+    using_db: Any,  # ruff: noqa: ANN401
+    update_fields: list[str],
+) -> None:
+    # save() 路径: 修改密码、软删除等; 部分字段加载的实例直接失效
+    if instance._partial:
+        await AccountCache.delete(instance.id)
+        return
+    await AccountCache.set(instance)
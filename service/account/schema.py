@@ -3,7 +3,6 @@ from tortoise.contrib.pydantic import pydantic_model_creator
 
 from storages import enums
 from common.regex import PASSWORD_REGEX
-from common.encrypt import PasswordUtil
 from common.pydantic import as_query, optional
 from common.exceptions import ApiException
 from service.role.schema import RoleList
@@ -14,10 +13,11 @@ class AccountCreate(
     pydantic_model_creator(Account, name="AccountCreate", exclude=("last_login_at", "status"), exclude_readonly=True)
 ):
     @field_validator("password")
-    def encrypt_pwd(cls, v: str) -> str:
+    def validate_pwd(cls, v: str) -> str:
+        # 哈希在视图中通过 AsyncPasswordUtil 完成, 不阻塞事件循环
         if not PASSWORD_REGEX.match(v):
             raise ApiException("密码格式错误")
-        return PasswordUtil.get_password_hash(v)
+        return v
 
 
 @optional()
@@ -0,0 +1,88 @@
+"""外部 ApiKey 校验
+
+- ApiKeyCache: 密钥及接口权限集合的进程内近端缓存, 写入方修改后通过 invalidate 广播失效;
+  ApiKey:* 由外部管理端写入, 未调用 invalidate 时本地缓存最长滞后 redis.near_cache.ttl 秒
+- claim_signature: 时间窗口内已使用的签名(ApiKey:Replay), 同一 (api_key, timestamp, sign) 只放行一次
+"""
+
+from typing import NamedTuple
+from collections.abc import Sequence
+
+from redis.asyncio import Redis
+
+from configs.config import local_configs
+from storages.aredis.keys import RedisCacheKey
+from configs.defines import ConnectionNameEnum
+from storages.aredis.near_cache import NearCache
+
+
+class ApiKeyInfo(NamedTuple):
+    secret_key: str
+    permissions: frozenset[str]
+
+
+class ApiKeyCache:
+    """每个 redis 连接一个实例, 通过 ApiKeyCache.of 获取"""
+
+    _instances: dict[ConnectionNameEnum, "ApiKeyCache"] = {}
+
+    def __init__(self, conn_name: ConnectionNameEnum) -> None:
+        self.conn_name = conn_name
+        self.local: NearCache[ApiKeyInfo] = NearCache(f"ApiKey:{conn_name.value}", conn_name=conn_name)
+
+    @classmethod
+    def of(cls, conn_name: ConnectionNameEnum) -> "ApiKeyCache":
+        if conn_name not in cls._instances:
+            cls._instances[conn_name] = cls(conn_name)
+        return cls._instances[conn_name]
+
+    async def check(self, api_key: str, permission_codes: Sequence[str]) -> tuple[str | None, bool]:
+        """返回 (密钥, 是否拥有任一权限), ApiKey 不存在时密钥为 None"""
+        info = self.local.get(api_key)
+        if info is not None:
+            return info.secret_key, any(code in info.permissions for code in permission_codes)
+
+        secret_key_name = RedisCacheKey.ApiSecretKey.format(api_key=api_key)  # type: ignore
+        perm_key_name = RedisCacheKey.ApiKeyPermissionSet.format(api_key=api_key)  # type: ignore
+        async with Redis(
+            connection_pool=local_configs.redis.connection_pool(self.conn_name),
+            single_connection_client=True,
+        ) as r:
+            if not self.local.active:
+                # 订阅未建立时不缓存, 单次往返校验
+                async with r.pipeline() as pipe:
+                    pipe.get(secret_key_name)
+                    pipe.smismember(name=perm_key_name, values=permission_codes)  # type: ignore
+                    secret_key, is_ok = await pipe.execute()
+                return secret_key, any(is_ok)
+
+            generation = self.local.generation
+            async with r.pipeline() as pipe:
+                pipe.get(secret_key_name)
+                pipe.smembers(perm_key_name)
+                secret_key, permissions = await pipe.execute()
+        if not secret_key:
+            return None, False
+        info = ApiKeyInfo(secret_key, frozenset(permissions))
+        self.local.set(api_key, info, generation)
+        return secret_key, any(code in info.permissions for code in permission_codes)
+
+    async def invalidate(self, *api_keys: str) -> None:
+        """修改 ApiKey 密钥或权限后调用, 失效所有 worker 的本地缓存"""
+        await self.local.invalidate(*api_keys)
+
+
+async def claim_signature(
+    conn_name: ConnectionNameEnum,
+    api_key: str,
+    timestamp: int,
+    sign: str,
+    window: int,
+) -> bool:
+    """首次出现返回 True, 重放返回 False
+
+    时间戳允许误差 ±window 秒, 签名在 redis 中保留 2 * window 秒, 所有 worker 共用
+    """
+    key = RedisCacheKey.ApiKeyReplay.format(api_key=api_key, timestamp=timestamp, sign=sign)  # type: ignore
+    async with local_configs.redis.get_redis(conn_name) as r:
+        return bool(await r.set(key, 1, nx=True, ex=window * 2))
@@ -8,69 +8,46 @@
 import uuid
 
 from storages import enums
-from common.encrypt import PasswordUtil
+from common.encrypt import AsyncPasswordUtil
 from configs.config import local_configs
 from storages.aredis import keys
-from configs.defines import ConnectionNameEnum
+from configs.defines import TokenModeEnum, ConnectionNameEnum
 from common.exceptions import ApiException
 from storages.aredis.util import verify_captcha_code
+from service.auth.token import issue_access_token
+from storages.aredis.session import SessionIndex
 from service.auth.schema import CodeLoginSchema, PasswordLoginSchema
-from storages.relational.models.user_center import Account
+from storages.relational.models.user_center import Role, Account
 
 
 async def login_cache_redis(account: Account, scene: enums.TokenSceneTypeEnum) -> str:
-    token = uuid.uuid4().hex
+    signed = local_configs.server.token_mode == TokenModeEnum.jwt
+    if signed:
+        # 签名 token 无需 token -> account 映射, account -> jti 映射用于登出吊销
+        token, payload = issue_access_token(account, scene)
+        token_id = payload.jti
+    else:
+        token = token_id = uuid.uuid4().hex
     # account_info = AccountRedisInfo.model_validate(account).model_dump()
-    perms = await account.get_permission_codes()
     async with local_configs.redis.get_redis(ConnectionNameEnum.user_center) as r:
-        async with r.pipeline() as pipe:
-            # 设置 token -> account 映射
-            pipe.set(
-                keys.UserCenterKey.Token2AccountKey.format(token=token),
-                value=f"{str(account.id)}:{scene.value}",
-                ex=local_configs.server.token_expire_seconds,
-            )
-            # 设置 account -> token 映射
-            pipe.sadd(keys.UserCenterKey.Account2TokenKey.format(account_id=str(account.id), scene=scene), token)
-            # 设置 account -> token 过期时间
-            pipe.expire(
-                keys.UserCenterKey.Account2TokenKey.format(account_id=str(account.id), scene=scene),
-                local_configs.server.token_expire_seconds,
-            )
-
-            # 权限
-            pipe.delete(
-                keys.UserCenterKey.AccountApiPermissionSet.format(  # type: ignore
-                    uuid=str(account.id),
-                ),
-            )
-            if perms:
-                # 刷新接口权限
-                pipe.sadd(
-                    keys.UserCenterKey.AccountApiPermissionSet.format(  # type: ignore
-                        uuid=str(account.id),
-                    ),
-                    *perms,  # type: ignore
-                )
-            await pipe.execute()
+        # token -> account 映射(签名 token 不需要)、account -> token 会话索引及权限指针一次写入, 顺带清理过期会话
+        await SessionIndex.record(
+            r,
+            account.id,
+            scene,
+            token_id,
+            token_value="" if signed else f"{account.id}:{scene.value}",
+            perm_ref=account.permission_ref(),
+        )
+    if not account.is_super_admin:
+        # 角色权限集合不存在时重建, 通常命中近端缓存
+        await Role.get_cached_permission_codes(account.role_id, account.is_staff)  # type: ignore
     return token
 
 
-async def logout_cache_redis(account: Account, scene: enums.TokenSceneTypeEnum):
-    async with local_configs.redis.get_redis(ConnectionNameEnum.user_center) as r:
-        ks = []
-        async for k in r.sscan_iter(
-            keys.UserCenterKey.Account2TokenKey.format(account_id=str(account.id), scene=scene),
-        ):
-            ks.append(k)
-        if not ks:
-            return
-        async with r.pipeline() as pipe:
-            # 删除 token -> account 映射
-            pipe.srem(keys.UserCenterKey.Account2TokenKey.format(account_id=str(account.id), scene=scene), *ks)
-            for k in ks:
-                pipe.delete(keys.UserCenterKey.Token2AccountKey.format(token=k))
-            await pipe.execute()
+async def logout_cache_redis(account: Account, scene: enums.TokenSceneTypeEnum | None = None) -> list[str]:
+    """吊销账户会话, scene 为空时吊销所有场景"""
+    return await SessionIndex.revoke(account.id, scene)
 
 
 async def code_login(
@@ -104,7 +81,7 @@ async def password_login(
         raise ApiException(message="用户不存在")
 
     # 密码校验
-    if not account or not PasswordUtil.verify_password(
+    if not account or not await AsyncPasswordUtil.verify_password(
         login_data.password,
         account.password,
     ):
@@ -43,6 +43,10 @@ class LoginResponse(TokenResponse):
     account: AccountList
 
 
+class RevokeSessionsResp(BaseModel):
+    revoked: int = Field(description="吊销的会话数")
+
+
 class ResetPasswordIn(BaseModel):
     identifier: str = Field(description="唯一标识", max_length=255, min_length=6)
     code: str = Field(description="验证码", max_length=6, min_length=4)
@@ -0,0 +1,71 @@
+"""签名 access token (server.token_mode = jwt)
+
+token 携带 account_id、scene、jti, 各 worker 使用缓存的公钥本地验签,
+吊销通过 RevokedTokenFilter 判断
+"""
+
+import time
+import uuid
+from pathlib import Path
+from functools import cache
+
+from jose import JWTError
+from pydantic import BaseModel, ValidationError
+
+from storages import enums
+from common.encrypt import JwtUtil
+from configs.config import local_configs
+from storages.relational.models.user_center import Account
+
+
+class AccessTokenPayload(BaseModel):
+    sub: str  # account_id
+    scene: str
+    jti: str
+    iss: str
+    iat: int
+    exp: int
+
+
+@cache
+def _read_key(path: Path) -> str:
+    return path.read_text()
+
+
+def is_signed_token(token: str) -> bool:
+    return token.count(".") == 2
+
+
+def issue_access_token(account: Account, scene: enums.TokenSceneTypeEnum) -> tuple[str, AccessTokenPayload]:
+    """签发 token, 返回 (token, payload)"""
+    config = local_configs.server.jwt
+    now = int(time.time())
+    payload = AccessTokenPayload(
+        sub=str(account.id),
+        scene=scene.value,
+        jti=uuid.uuid4().hex,
+        iss=config.issuer,
+        iat=now,
+        exp=now + local_configs.server.token_expire_seconds,
+    )
+    token = JwtUtil.encode(
+        payload,
+        key=_read_key(config.private_key_path),  # type: ignore
+        algorithm=config.algorithm,
+    )
+    return token, payload
+
+
+def decode_access_token(token: str) -> AccessTokenPayload | None:
+    """验签并校验过期时间、签发方, 失败返回 None"""
+    config = local_configs.server.jwt
+    try:
+        return JwtUtil.decode(
+            AccessTokenPayload,
+            token,
+            key=_read_key(config.public_key_path),  # type: ignore
+            algorithms=config.algorithm,
+            issuer=config.issuer,
+        )
+    except (JWTError, ValidationError):
+        return None
@@ -1,21 +1,52 @@
 import re
 import uuid
 from typing import TypeVar
+from functools import cache
 from collections import defaultdict
+from collections.abc import Sequence
 
 from fastapi import Body, Query, Depends
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import Field, BaseModel
 from tortoise.models import Model
 from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+from tortoise.backends.base.schema_generator import BaseSchemaGenerator
 from tortoise.exceptions import IntegrityError
 from tortoise.expressions import Q
+from pypika_tortoise import Table
+from tortoise.backends.base.client import BaseDBAsyncClient
 from tortoise.contrib.pydantic.base import PydanticModel
 
+from common.enums import ExportFormatEnum, CountStrategyEnum
 from common.schemas import CRUDPager
 from common.pydantic import create_sub_fields_model
-from common.responses import Resp, PageData
+from common.responses import Resp, PageData, AesResponse
+from common.serializer import json_response, compile_json_plan
 from service.exceptions import ApiException
+from service.pagination import (
+    PageResult,
+    count_total,
+    keyset_order,
+    encode_cursor,
+    decode_cursor,
+    keyset_filter,
+    gather_queries,
+    enable_cached_count,
+)
+from service.export import export_response
+from service.prefetch import (
+    lookup_models,
+    schema_models,
+    relation_plan,
+    queryset_models,
+    prefetch_relations,
+)
 from service.dependencies import paginate
+from service.query_cache import cached_response, query_cache_ttl
+from storages.relational.base.search import get_search_backend
+from tasks.asynchronous.export import start_export_task
+from storages.relational.base.write_hooks import notify_model_write
 
 unique_error_msg_key_regex = re.compile(r"'(.*?)'")
 
@@ -32,113 +63,261 @@ def pagination_factory(
     list_schema: type[PydanticModel],
     max_limit: int | None = None,
     param_type: type[Query] | type[Body] = Query,
+    count_strategy: CountStrategyEnum = CountStrategyEnum.exact,
+    count_cache_ttl: int = 30,
 ) -> CRUDPager:
-    return Depends(paginate(db_model, search_fields, order_fields, list_schema, max_limit, param_type))  # type: ignore
+    """count_strategy: 总数统计策略, 大表或多表关联去重的列表可选 cached/estimated/skip"""
+    if count_strategy == CountStrategyEnum.cached:
+        enable_cached_count(db_model)
+    return Depends(
+        paginate(
+            db_model,
+            search_fields,
+            order_fields,
+            list_schema,
+            max_limit,
+            param_type,
+            count_strategy,
+            count_cache_ttl,
+        ),
+    )  # type: ignore
+
+
+def _page_schema(pagination: CRUDPager) -> type[PydanticModel]:
+    """列表实际使用的 schema, 指定 selected_fields 时为字段子集"""
+    if pagination.selected_fields:
+        return create_sub_fields_model(pagination.list_schema, pagination.selected_fields)  # type: ignore
+    return pagination.list_schema
+
+
+def _filter_queryset(queryset: QuerySet[ModelType], pagination: CRUDPager, *args: Q, **kwargs: dict) -> QuerySet:
+    """过滤条件及搜索关键字"""
+    queryset = queryset.filter(*args).filter(**kwargs)
+    search = pagination.search
+    if search and pagination.available_search_fields:
+        queryset = get_search_backend(queryset.model).apply(
+            queryset,
+            sorted(pagination.available_search_fields),
+            search,
+        )
+    return queryset
 
 
 async def get_all_obj(
     queryset: QuerySet[ModelType],  # type: ignore
     pagination: CRUDPager,
     *args: Q,
+    rows: bool = False,
     **kwargs: dict,
-) -> tuple[list, int]:  # type: ignore
-    queryset = queryset.filter(*args).filter(**kwargs).order_by(*pagination.order_by)
-
-    search = pagination.search
-    if search and pagination.available_search_fields:
-        sub_q_exps = []
-        for search_field in pagination.available_search_fields:
-            sub_q_exps.append(
-                Q(**{f"{search_field}__icontains": search}),
-            )
-        q_expression = Q(*sub_q_exps, join_type=Q.OR)
-        queryset = queryset.filter(q_expression)
-
-    list_schema = pagination.list_schema
-    if pagination.selected_fields:
-        list_schema = create_sub_fields_model(  # type: ignore
-            pagination.list_schema,
-            pagination.selected_fields,
+) -> PageResult:  # type: ignore
+    """rows: 返回 values() 取出的 dict(含排序字段), 不做 schema 校验, 要求 schema 字段均为数据库列"""
+    db_model = queryset.model
+    order_by = keyset_order(db_model, pagination.order_by)
+    queryset = _filter_queryset(queryset, pagination, *args, **kwargs)
+
+    list_schema = _page_schema(pagination)
+    projection = None
+    if pagination.selected_fields or rows:
+        # 排序字段用于生成下一页游标
+        select_fields = list(dict.fromkeys([*list_schema.model_fields, *(f.lstrip("-") for f in order_by)]))
+        if rows or db_model._meta.db_fields.issuperset(select_fields):
+            # 只含数据库列时下推到 SELECT, 直接取 dict 不构造模型实例
+            projection = select_fields
+        else:
+            queryset = queryset.only(*select_fields)
+
+    if pagination.cursor:
+        page_queryset = queryset.filter(
+            keyset_filter(db_model, order_by, decode_cursor(db_model, pagination.cursor, order_by)),
         )
-
-    data = await list_schema.from_queryset(
-        queryset.offset(pagination.offset).limit(pagination.limit),
+    else:
+        page_queryset = queryset.offset(pagination.offset)
+    # 多取一行判断是否有下一页
+    page_queryset = page_queryset.order_by(*order_by).limit(pagination.limit + 1)
+    plan = None if projection else relation_plan(db_model, list_schema)
+    objs, (total, count_strategy) = await gather_queries(
+        queryset._db or db_model._meta.db,
+        page_queryset.values(*projection) if projection else page_queryset.select_related(*plan.select_related),
+        count_total(queryset, pagination),
     )
-    total = await queryset.count()
-    return data, total
+    next_cursor = None
+    if len(objs) > pagination.limit:
+        objs = objs[: pagination.limit]
+        next_cursor = encode_cursor(objs[-1], order_by)
+    if plan:
+        await prefetch_relations(objs, plan)
+    if count_strategy == CountStrategyEnum.estimated:
+        # 估算值不应小于已读到的行数
+        seen = (0 if pagination.cursor else pagination.offset) + len(objs) + int(next_cursor is not None)
+        total = max(total, seen)
+    data = objs if rows else [list_schema.model_validate(obj) for obj in objs]
+    return PageResult(data, total, next_cursor, count_strategy)
 
 
 async def obj_prefetch_fields(obj: Model, schema: type[PydanticModelType]) -> Model:
-    db_model = obj.__class__
-    _db2fields = defaultdict(list)
-    for f in db_model._meta.fetch_fields.intersection(set(schema.model_fields.keys())):
-        _db2fields[db_model._meta.fields_map[f].related_model._meta.db].append(f)  # type: ignore
-
-    for db, fetch_fields in _db2fields.items():
-        await obj.fetch_related(
-            *fetch_fields,
-            using_db=db,
-        )
+    """为已查出的对象加载 schema 中的关系字段(含嵌套关系), 每个关系一次查询"""
+    await prefetch_relations([obj], relation_plan(obj.__class__, schema, join=False))
     return obj
 
 
-async def kwargs_clean(
-    data: dict,
+async def _clean_rows(
+    rows: Sequence[dict],
     model: type[ModelType],
-) -> tuple[dict, dict]:
+) -> tuple[list[tuple[dict, dict]], list[tuple[int, str]]]:
+    """拆分普通字段和 m2m 字段, 校验外键及 m2m 关联对象存在
+
+    所有行对同一关联模型的校验合并为一次 IN 查询
+    Returns:
+        ([(普通字段, m2m 字段)], [(行号, 错误信息)])
+    """
     fields_map = model._meta.fields_map
-    fk_fields = [f"{i}_id" for i in model._meta.fk_fields]
+    fk_fields = {f"{i}_id": i for i in model._meta.fk_fields}
     m2m_fields = model._meta.m2m_fields
 
-    simple_data = {}
-    m2m_fields_data: dict = defaultdict(list)
+    cleaned = []
+    # (关联模型, 关联字段) -> 待校验的值
+    pending: dict[tuple[type[Model], str], set] = defaultdict(set)
 
-    for key in data:
-        if key not in fields_map:
-            continue
-        if key in fk_fields:
-            if data[key]:
-                field = fields_map[key.split("_id")[0]]
-                obj = await field.related_model.get_or_none(  # type: ignore
-                    **{field.to_field: data[key]},  # type: ignore
+    for data in rows:
+        simple_data = {}
+        m2m_fields_data: dict = defaultdict(list)
+        for key, value in data.items():
+            if key not in fields_map:
+                continue
+            if key in fk_fields:
+                if value:
+                    field = fields_map[fk_fields[key]]
+                    pending[(field.related_model, field.to_field)].add(value)  # type: ignore
+                simple_data[key] = value
+                continue
+
+            if key in m2m_fields:
+                if value is None:
+                    m2m_fields_data[key] = None
+                    continue
+                related_model = fields_map[key].related_model  # type: ignore
+                pending[(related_model, related_model._meta.pk_attr)].update(
+                    i for i in value if not isinstance(i, Model)
                 )
-                if not obj:
-                    raise ApiException(
-                        f"ID为{data[key]}的{field.description}不存在",
-                    )
-            simple_data[key] = data[key]
+                m2m_fields_data[key] = list(value)
+                continue
+
+            simple_data[key] = value
+        cleaned.append((simple_data, m2m_fields_data))
+
+    loaded: dict[tuple[type[Model], str], dict[str, Model]] = {}
+    for (related_model, to_field), values in pending.items():
+        if not values:
             continue
+        objs = await related_model.filter(**{f"{to_field}__in": values})
+        loaded[(related_model, to_field)] = {str(getattr(obj, to_field)): obj for obj in objs}
 
-        if key in m2m_fields:
-            if data[key] is None:
-                m2m_fields_data[key] = None
+    errors = []
+    for row_index, (simple_data, m2m_fields_data) in enumerate(cleaned):
+        for key in simple_data.keys() & fk_fields.keys():
+            if not simple_data[key]:
                 continue
-            m2m_fields_data[key] = []
-            field = fields_map[key]
-            model = field.related_model  # type: ignore
-            for related_id in data[key]:
+            field = fields_map[fk_fields[key]]
+            if str(simple_data[key]) not in loaded[(field.related_model, field.to_field)]:  # type: ignore
+                errors.append((row_index, f"ID为{simple_data[key]}的{field.description}不存在"))
+
+        for key, values in m2m_fields_data.items():
+            if not values:
+                continue
+            related_model = fields_map[key].related_model  # type: ignore
+            objs = loaded.get((related_model, related_model._meta.pk_attr), {})
+            missing = []
+            for index, related_id in enumerate(values):
                 if isinstance(related_id, Model):
-                    m2m_fields_data[key].append(obj)
                     continue
-                obj = await model.get_or_none(
-                    **{model._meta.pk_attr: related_id},
-                )
-                if not obj:
-                    raise ApiException(
-                        f"id为{related_id}的{model._meta.table_description}不存在",
-                    )
-                m2m_fields_data[key].append(obj)
-            continue
+                obj = objs.get(str(related_id))
+                if obj is None:
+                    missing.append(str(related_id))
+                    continue
+                values[index] = obj
+            if missing:
+                errors.append((row_index, f"id为{','.join(missing)}的{related_model._meta.table_description}不存在"))
+
+    return cleaned, errors
+
+
+def _row_errors_message(errors: Sequence[tuple[int, str]], offset: int = 0) -> str:
+    """相同错误合并, 行号从 1 开始"""
+    grouped: dict[str, list[str]] = defaultdict(list)
+    for row_index, msg in errors:
+        grouped[msg].append(str(offset + row_index + 1))
+    return "; ".join(f"第{','.join(indexes)}行: {msg}" for msg, indexes in grouped.items())
 
-        simple_data[key] = data[key]
 
-    return simple_data, m2m_fields_data
+async def kwargs_clean(
+    data: dict,
+    model: type[ModelType],
+) -> tuple[dict, dict]:
+    """拆分普通字段和 m2m 字段, 校验外键及 m2m 关联对象存在, 不存在的 id 一并报错"""
+    cleaned, errors = await _clean_rows([data], model)
+    if errors:
+        raise ApiException("; ".join(msg for _, msg in errors))
+    return cleaned[0]
+
+
+@cache
+def _unique_constraints(db_model: type[Model]) -> dict[str, tuple[str, ...]]:
+    """唯一索引 -> 字段名
+
+    联合唯一索引以索引名末尾的哈希为 key(由表名和列名生成, 不同版本 tortoise 的索引名前缀截断方式不同),
+    单列唯一索引以列名为 key
+    """
+    fields_map = db_model._meta.fields_map
+    db_table = db_model._meta.db_table
+    constraints = {}
+    for field_names in db_model._meta.unique_together:
+        columns = tuple(fields_map[f].source_field or f for f in field_names)
+        constraints[BaseSchemaGenerator._make_hash(db_table, *columns, length=6)] = columns
+    for name, field in fields_map.items():
+        if field.unique and not field.pk and name in db_model._meta.db_fields:
+            constraints[field.source_field or name] = (name,)
+    return constraints
+
+
+def _integrity_error_message(
+    db_model: type[Model],
+    e: IntegrityError,
+    objs: Sequence[Model] = (),
+) -> tuple[str, list[int]]:
+    """唯一约束冲突时返回 (Meta.unique_error_messages 中的提示, objs 中冲突的下标)"""
+    # mysql: (1062, "Duplicate entry ..."); 其他驱动只有错误信息
+    msg = str(e.args[0].args[-1])
+    if "Duplicate" not in msg:
+        return msg, []
+    # Duplicate entry 'xxx-0' for key 'account.uid_account_username_4f1849'
+    msg_keys = unique_error_msg_key_regex.findall(msg)
+    if msg_keys and hasattr(db_model.Meta, "unique_error_messages") and db_model.Meta.unique_error_messages.get(msg_keys[-1]):
+        message = db_model.Meta.unique_error_messages.get(msg_keys[-1])
+    else:
+        message = f"{db_model._meta.table_description}已存在"
+
+    indexes = []
+    if objs and len(msg_keys) >= 2:
+        index_name = msg_keys[-1].split(".")[-1]
+        constraints = _unique_constraints(db_model)
+        fields = constraints.get(index_name) or constraints.get(index_name.rsplit("_", 1)[-1])
+        if fields:
+            fields_map = db_model._meta.fields_map
+            for index, obj in enumerate(objs):
+                values = [fields_map[f].to_db_value(getattr(obj, f), obj) for f in fields]
+                if "-".join(str(v) for v in values) == msg_keys[0]:
+                    indexes.append(index)
+    return message, indexes
 
 
 async def create_obj(
     db_model: type[ModelType],
     data: dict,
 ) -> Model:
+    """创建对象并触发写入回调
+
+    需与其它写入同一事务时使用 write_transaction 包裹, 直接用 in_transaction 时回调会先于提交执行
+    """
     data, m2m_data = await kwargs_clean(
         data,
         db_model,
@@ -147,26 +326,78 @@ async def create_obj(
     try:
         obj = await db_model.create(**data)
     except IntegrityError as e:
-        msg = e.args[0].args[1]
-        if "Duplicate" in msg:
-            msg_keys = unique_error_msg_key_regex.findall(msg)
-            if (
-                msg_keys
-                and hasattr(db_model.Meta, "unique_error_messages")
-                and db_model.Meta.unique_error_messages.get(msg_keys[-1])
-            ):
-                msg = db_model.Meta.unique_error_messages.get(msg_keys[-1])
-            else:
-                msg = f"{db_model._meta.table_description}已存在"
-        raise ApiException(message=msg) from e
+        raise ApiException(message=_integrity_error_message(db_model, e)[0]) from e
 
     for k, v in m2m_data.items():
         if v:
             await getattr(obj, k).add(*v)
 
+    await notify_model_write(db_model, saved=[obj])
     return obj
 
 
+async def sync_m2m(
+    obj: Model,
+    field_name: str,
+    related: Sequence,
+    using_db: BaseDBAsyncClient | None = None,
+) -> tuple[int, int]:
+    """将多对多关系同步为 related(对象或主键)
+
+    查询一次现有关联, 移除的一条 DELETE ... IN, 新增的一条多行 INSERT, 不变的关联不做改动
+    Returns:
+        (新增数, 移除数)
+    """
+    field = obj._meta.fields_map[field_name]
+    db = using_db or obj._meta.db
+    related_pk = field.related_model._meta.pk  # type: ignore
+    through = Table(field.through)  # type: ignore
+    backward_key, forward_key = field.backward_key, field.forward_key  # type: ignore
+    backward_field, forward_field = through[backward_key], through[forward_key]
+    pk_b = obj._meta.pk.to_db_value(obj.pk, obj)
+
+    target = list(
+        dict.fromkeys(
+            related_pk.to_db_value(i.pk if isinstance(i, Model) else related_pk.to_python_value(i), None)
+            for i in related
+        ),
+    )
+    _, rows = await db.execute_query(
+        *db.query_class.from_(through).where(backward_field == pk_b).select(forward_field).get_parameterized_sql(),
+    )
+    current = {row[forward_key] for row in rows}
+
+    removed = current.difference(target)
+    if removed:
+        await db.execute_query(
+            *db.query_class.from_(through)
+            .where((backward_field == pk_b) & forward_field.isin(list(removed)))
+            .delete()
+            .get_parameterized_sql(),
+        )
+    added = [pk_f for pk_f in target if pk_f not in current]
+    if added:
+        query = db.query_class.into(through).columns(forward_field, backward_field)
+        for pk_f in added:
+            query = query.insert(pk_f, pk_b)
+        await db.execute_query(*query.get_parameterized_sql())
+    return len(added), len(removed)
+
+
+def _apply_update(obj: Model, data: dict, m2m_data: dict) -> None:
+    """将已写入数据库的修改同步到对象, 代替 refresh_from_db"""
+    meta = obj._meta
+    obj.update_from_dict(data)
+    for name in meta.fk_fields | meta.o2o_fields:
+        # 外键变更后已加载的关联对象失效
+        if meta.fields_map[name].source_field in data and hasattr(obj, f"_{name}"):  # type: ignore
+            delattr(obj, f"_{name}")
+    for name, related in m2m_data.items():
+        if related is not None:
+            # kwargs_clean 已将主键替换为关联对象, 按主键去重与 sync_m2m 写入的结果一致
+            getattr(obj, name)._set_result_for_query(list({i.pk: i for i in related}.values()))
+
+
 async def update_obj(
     obj: Model,
     queryset: QuerySet[ModelType],
@@ -181,65 +412,261 @@ async def update_obj(
         db_model,
     )
 
-    if data:
-        try:
-            await queryset.filter(
-                **{
-                    db_model._meta.pk_attr: getattr(
-                        obj,
-                        db_model._meta.pk_attr,
-                    ),
-                },
-            ).update(**data)
-        except IntegrityError as e:
-            msg = e.args[0].args[1]
-            if "Duplicate" in msg:
-                msg_keys = unique_error_msg_key_regex.findall(msg)
-                if (
-                    msg_keys
-                    and hasattr(db_model.Meta, "unique_error_messages")
-                    and db_model.Meta.unique_error_messages.get(msg_keys[-1])
-                ):
-                    msg = db_model.Meta.unique_error_messages.get(msg_keys[-1])
-                else:
-                    msg = f"{db_model._meta.table_description}已存在"
-            raise ApiException(message=msg) from e
-    for k, v in m2m_data.items():
-        if v is None:
-            continue
-        await getattr(obj, k).clear()
-        if not v:
-            continue
-        await getattr(obj, k).add(*v)
-    await obj.refresh_from_db()
+    async with in_transaction(db_model._meta.default_connection) as conn:
+        if data:
+            try:
+                await (
+                    queryset.filter(
+                        **{
+                            db_model._meta.pk_attr: getattr(
+                                obj,
+                                db_model._meta.pk_attr,
+                            ),
+                        },
+                    )
+                    .using_db(conn)
+                    .update(**data)
+                )
+            except IntegrityError as e:
+                raise ApiException(message=_integrity_error_message(db_model, e)[0]) from e
+        for k, v in m2m_data.items():
+            if v is None:
+                continue
+            await sync_m2m(obj, k, v, using_db=conn)
+    _apply_update(obj, data, m2m_data)
+    await notify_model_write(db_model, saved=[obj])
     return obj  # type: ignore
 
 
+def _bulk_failed_message(message: str, done: int) -> str:
+    return f"{message}. 前{done}行已保存" if done else message
+
+
+async def bulk_create_objs(
+    db_model: type[ModelType],
+    rows: Sequence[dict],
+    chunk_size: int = 500,
+) -> int:
+    """批量创建, 每批一个事务, 一条多行 INSERT; 外键按批校验
+
+    不支持 m2m 字段; mysql 不回填自增主键, 写入回调不带对象
+    失败时之前的批次已提交, 错误信息中的行号为 rows 中的行号
+    """
+    db_model_label = db_model._meta.table_description
+    created = 0
+    try:
+        for start in range(0, len(rows), chunk_size):
+            cleaned, errors = await _clean_rows(rows[start : start + chunk_size], db_model)
+            errors.extend((i, f"批量创建{db_model_label}不支持关联字段") for i, (_, m2m) in enumerate(cleaned) if m2m)
+            if errors:
+                raise ApiException(_bulk_failed_message(_row_errors_message(errors, start), created))
+
+            objs = [db_model(**simple_data) for simple_data, _ in cleaned]
+            try:
+                async with in_transaction(db_model._meta.default_connection) as conn:
+                    await db_model.bulk_create(objs, using_db=conn)
+            except IntegrityError as e:
+                message, indexes = _integrity_error_message(db_model, e, objs)
+                if indexes:
+                    message = _row_errors_message([(i, message) for i in indexes], start)
+                raise ApiException(_bulk_failed_message(message, created)) from e
+            created += len(objs)
+    finally:
+        # 整个调用只回调一次, 失败时已提交的批次同样回调
+        if created:
+            await notify_model_write(db_model)
+    return created
+
+
+async def bulk_update_objs(
+    queryset: QuerySet[ModelType],
+    rows: Sequence[dict],
+    chunk_size: int = 500,
+) -> int:
+    """批量更新, 每行需包含主键; 每批一个事务, 锁定后一条 CASE WHEN UPDATE
+
+    不支持 m2m 字段; 失败时之前的批次已提交
+    """
+    db_model = queryset.model
+    db_model_label = db_model._meta.table_description
+    pk_attr = db_model._meta.pk_attr
+    updated = 0
+    saved: list[Model] = []
+    try:
+        for start in range(0, len(rows), chunk_size):
+            cleaned, errors = await _clean_rows(rows[start : start + chunk_size], db_model)
+            update_fields: set[str] = set()
+            for i, (simple_data, m2m) in enumerate(cleaned):
+                if simple_data.get(pk_attr) is None:
+                    errors.append((i, "缺少主键"))
+                if m2m:
+                    errors.append((i, f"批量更新{db_model_label}不支持关联字段"))
+                update_fields.update(simple_data.keys())
+            update_fields.discard(pk_attr)
+            if errors:
+                raise ApiException(_bulk_failed_message(_row_errors_message(errors, start), updated))
+            if not update_fields:
+                continue
+
+            row_objs: list[Model] = []
+            try:
+                async with in_transaction(db_model._meta.default_connection) as conn:
+                    objs = {
+                        str(obj.pk): obj
+                        for obj in await queryset.filter(
+                            **{f"{pk_attr}__in": [simple_data[pk_attr] for simple_data, _ in cleaned]},
+                        )
+                        .select_for_update()
+                        .using_db(conn)
+                    }
+                    for i, (simple_data, _) in enumerate(cleaned):
+                        obj = objs.get(str(simple_data[pk_attr]))
+                        if obj is None:
+                            errors.append((i, f"{db_model_label}不存在"))
+                            continue
+                        obj.update_from_dict({k: v for k, v in simple_data.items() if k != pk_attr})
+                        row_objs.append(obj)
+                    if errors:
+                        raise ApiException(_bulk_failed_message(_row_errors_message(errors, start), updated))
+                    await db_model.bulk_update(list(objs.values()), fields=update_fields, using_db=conn)
+            except IntegrityError as e:
+                message, indexes = _integrity_error_message(db_model, e, row_objs)
+                if indexes:
+                    message = _row_errors_message([(i, message) for i in indexes], start)
+                raise ApiException(_bulk_failed_message(message, updated)) from e
+            updated += len(cleaned)
+            saved.extend(objs.values())
+    finally:
+        # 整个调用只回调一次, 失败时已提交的批次同样回调
+        if saved:
+            await notify_model_write(db_model, saved=saved)
+    return updated
+
+
 async def list_view(
     queryset: QuerySet,
     filter: BaseModel,
     pager: CRUDPager,
-) -> Resp:
-    if pager.selected_fields:
-        queryset = queryset.only(*pager.selected_fields)
-    data, total = await get_all_obj(
-        queryset=queryset.distinct(),
-        pagination=pager,
-        **filter.model_dump(exclude_unset=True, exclude_none=True),
-    )
-    return Resp(
-        data=PageData(records=data, total_count=total, pager=pager),  # type: ignore
-    )
+) -> Resp | AesResponse:
+    """schema 只含数据库列时直接编码 values() 结果(common.serializer), 响应与常规路径一致;
+    涉及的模型均启用查询缓存时按查询条件缓存(service.query_cache)"""
+    schema = _page_schema(pager)
+    plan = compile_json_plan(schema)
+    filters = filter.model_dump(exclude_unset=True, exclude_none=True)
+
+    async def load() -> PageData | dict:
+        result = await get_all_obj(
+            queryset=queryset.distinct(),
+            pagination=pager,
+            rows=plan is not None,
+            **filters,
+        )
+        page_data = PageData(
+            records=[] if plan else result.records,
+            total_count=result.total_count,
+            pager=pager,
+            next_cursor=result.next_cursor,
+            has_more=result.next_cursor is not None,
+            count_strategy=result.count_strategy,
+        )
+        if plan:
+            data = page_data.model_dump(mode="json")
+            data["records"] = plan.records(result.records)
+            return data
+        return page_data
+
+    # 过滤/搜索/排序经过的关联表的写入同样影响结果
+    models = {
+        *schema_models(queryset.model, schema),
+        *queryset_models(queryset),
+        *lookup_models(
+            queryset.model,
+            [*filters, *pager.order_by, *(pager.available_search_fields or () if pager.search else ())],
+        ),
+    }
+    if query_cache_ttl(models) is not None:
+        key_parts = (
+            "list",
+            queryset.sql(params_inline=True),
+            filters,
+            f"{schema.__module__}.{schema.__qualname__}",
+            pager.limit,
+            pager.offset,
+            pager.order_by,
+            pager.cursor,
+            pager.search,
+            sorted(pager.selected_fields or ()),
+            pager.count_strategy,
+        )
+        return await cached_response(models, key_parts, load)
 
+    data = await load()
+    if plan:
+        return json_response(data)
+    return Resp(data=data)  # type: ignore
 
-async def detail_view(queryset: QuerySet, pk: str | int | uuid.UUID, resp_schema: type[PydanticModelType]) -> Resp:
-    obj = await queryset.get_or_none(
-        **{queryset.model._meta.pk_attr: pk},
-    )
-    if not obj:
-        raise ApiException("对象不存在")
-    obj = await obj_prefetch_fields(obj, resp_schema)
-    data = resp_schema.model_validate(obj)
+
+class ExportTaskResp(BaseModel):
+    task_id: str = Field(description="导出任务ID")
+
+
+async def export_view(
+    queryset: QuerySet,
+    filter: BaseModel,
+    pager: CRUDPager,
+    fmt: ExportFormatEnum,
+    filename: str,
+    background: bool = False,
+    owner_id: int | None = None,
+) -> StreamingResponse | Resp[ExportTaskResp]:
+    """按列表的过滤、搜索、排序及字段选择导出全部数据, 忽略分页; background 时上传 OSS 并返回任务ID,
+    owner_id 为当前账户ID, 后台导出必填, 仅创建人可查询结果"""
+    queryset = _filter_queryset(queryset.distinct(), pager, **filter.model_dump(exclude_unset=True, exclude_none=True))
+    schema = _page_schema(pager)
+    if background:
+        if owner_id is None:
+            raise ApiException("后台导出需登录")
+        task_id = await start_export_task(queryset, schema, pager.order_by, fmt, filename, owner_id)
+        return Resp(data=ExportTaskResp(task_id=task_id))
+    return export_response(queryset, schema, pager.order_by, fmt, filename)
+
+
+async def detail_view(
+    queryset: QuerySet,
+    pk: str | int | uuid.UUID,
+    resp_schema: type[PydanticModelType],
+) -> Resp | AesResponse:
+    plan = compile_json_plan(resp_schema)
+
+    async def load() -> PydanticModelType | dict:
+        if plan:
+            row = await queryset.filter(**{queryset.model._meta.pk_attr: pk}).first().values(*plan.columns)
+            if not row:
+                raise ApiException("对象不存在")
+            return plan.record(row)
+
+        rel_plan = relation_plan(queryset.model, resp_schema)
+        obj = await queryset.select_related(*rel_plan.select_related).get_or_none(
+            **{queryset.model._meta.pk_attr: pk},
+        )
+        if not obj:
+            raise ApiException("对象不存在")
+        await prefetch_relations([obj], rel_plan)
+        return resp_schema.model_validate(obj)
+
+    models = {*schema_models(queryset.model, resp_schema), *queryset_models(queryset)}
+    if query_cache_ttl(models) is not None:
+        key_parts = (
+            "detail",
+            queryset.sql(params_inline=True),
+            str(pk),
+            f"{resp_schema.__module__}.{resp_schema.__qualname__}",
+        )
+        return await cached_response(models, key_parts, load)
+
+    data = await load()
+    if plan:
+        return json_response(data)
     return Resp(
         data=data,  # type: ignore
     )
@@ -279,6 +706,7 @@ async def delete_view(id: str | uuid.UUID | int, queryset: QuerySet[ModelType])
         ).delete()
     if r < 1:
         return Resp.fail(message=f"{db_model_label}不存在或已被删除")
+    await notify_model_write(db_model, deleted_pks=[id])
     return Resp(data=DeleteResp(deleted=r))
 
 
@@ -296,4 +724,27 @@ async def batch_delete_view(
         ).delete()
     if r < 1:
         return Resp.fail(message=f"{db_model_label}不存在或已被删除")
+    await notify_model_write(db_model, deleted_pks=ids)
     return Resp(data=DeleteResp(deleted=r))
+
+
+class BulkResp(BaseModel):
+    count: int
+
+
+async def bulk_create_view(
+    db_model: type[ModelType],
+    schemas: Sequence[BaseModel],
+    chunk_size: int = 500,
+) -> Resp[BulkResp]:
+    count = await bulk_create_objs(db_model, [schema.model_dump(exclude_unset=True) for schema in schemas], chunk_size)
+    return Resp(data=BulkResp(count=count))
+
+
+async def bulk_update_view(
+    queryset: QuerySet[ModelType],
+    schemas: Sequence[BaseModel],
+    chunk_size: int = 500,
+) -> Resp[BulkResp]:
+    count = await bulk_update_objs(queryset, [schema.model_dump(exclude_unset=True) for schema in schemas], chunk_size)
+    return Resp(data=BulkResp(count=count))
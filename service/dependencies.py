@@ -1,26 +1,31 @@
+import hmac
 import time
-from uuid import UUID
 from typing import Annotated
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 
 from loguru import logger
 from fastapi import Body, Query, Header, Depends, Request
 from pydantic import PositiveInt
-from cachetools import TTLCache
 from redis.asyncio import Redis, ConnectionPool
 from tortoise.models import Model
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.security.utils import get_authorization_scheme_param
 from tortoise.contrib.pydantic import PydanticModel
 
-from common.enums import ResponseCodeEnum, RequestHeaderKeyEnum
+from common.enums import ResponseCodeEnum, CountStrategyEnum, RequestHeaderKeyEnum
 from common.utils import datetime_now
 from common.encrypt import HashUtil
 from common.schemas import Pager, CRUDPager
+from common.route_permission import get_route_permission_codes
 from configs.config import local_configs
 from storages.aredis import keys
-from configs.defines import ConnectionNameEnum
+from storages.aredis.scripts import AuthenticateScript, AuthenticateResultEnum
+from configs.defines import TokenModeEnum, ConnectionNameEnum
+from service.auth.token import is_signed_token, decode_access_token
+from service.auth.api_key import ApiKeyCache, claim_signature
 from service.exceptions import ApiException
+from service.account.helper import AccountCache
+from storages.aredis.revocation import RevokedTokenFilter
 from common.constant.messages import (
     ForbiddenMsg,
     AuthorizationHeaderInvalidMsg,
@@ -75,7 +80,9 @@ def paginate(
     list_schema: type[PydanticModel],
     max_limit: int | None,
     param_type: type[Query] | type[Body] = Query,
-) -> Callable[[PositiveInt, PositiveInt, str, set[str], set[str] | None], CRUDPager]:
+    count_strategy: CountStrategyEnum = CountStrategyEnum.exact,
+    count_cache_ttl: int = 30,
+) -> Callable[[PositiveInt, PositiveInt, str, list[str], set[str] | None, str | None], CRUDPager]:
     def get_pager(
         page: PositiveInt = param_type(default=1, examples=[1], description="第几页"),
         size: PositiveInt = param_type(default=10, examples=[10], description="每页数量"),
@@ -84,8 +91,8 @@ def paginate(
             description="搜索关键字."
             + (f" 匹配字段: {', '.join(search_fields)}" if search_fields else "无可匹配的字段"),  # ruff: noqa: E501
         ),
-        order_by: set[str] = param_type(
-            default=set(),
+        order_by: list[str] = param_type(
+            default=[],
             # examples=["-id"],
             description=(
                 "排序字段. 升序保持原字段名, 降序增加前缀-."
@@ -96,6 +103,10 @@ def paginate(
             default=set(),
             description=f"指定返回字段. 可选字段: {', '.join(list_schema.model_fields.keys())}",
         ),
+        cursor: str | None = param_type(
+            default=None,
+            description="分页游标, 取上一页返回的 next_cursor; 设置后忽略 page, 排序字段需与上一页一致",
+        ),
     ) -> CRUDPager:
         if max_limit is not None:
             size = min(size, max_limit)
@@ -126,105 +137,146 @@ def paginate(
         return CRUDPager(
             limit=size,
             offset=(page - 1) * size,
-            order_by=set(
-                filter(lambda i: i.split("-")[-1] in order_fields, order_by),
+            # 保持顺序并去重, 游标分页依赖稳定的排序
+            order_by=list(
+                dict.fromkeys(filter(lambda i: i.split("-")[-1] in order_fields, order_by)),
             ),
+            cursor=cursor or None,
             search=search,
             selected_fields=selected_fields,
             available_search_fields=search_fields,
             list_schema=list_schema,
+            count_strategy=count_strategy,
+            count_cache_ttl=count_cache_ttl,
         )
 
     return get_pager
 
 
-_account_cache = TTLCache(maxsize=256, ttl=60)
-
-
-async def _get_account_by_id(account_id: UUID) -> Account:
-    if account_id in _account_cache:
-        return _account_cache[account_id]
-    acc = await Account.get_or_none(id=account_id, deleted_at=0)
+async def _get_account_by_id(account_id: int | str) -> Account:
+    acc = await AccountCache.get(account_id)
     if not acc:
         raise ApiException(
             code=ResponseCodeEnum.unauthorized,
             message="Invalid Account",
         )
-    _account_cache[account_id] = acc
     return acc
 
 
+def _set_request_account(request: Request, account: Account, scene: str) -> None:
+    request.scope["user"] = account
+    request.scope["scene"] = scene
+    request.scope["is_staff"] = account.is_staff
+    request.scope["is_super_admin"] = account.is_super_admin
+
+
+async def _validate_signed_token(request: Request, credentials: str) -> Account:
+    """签名 token 本地验签, 吊销列表及账户信息命中本地缓存时无网络 IO"""
+    payload = decode_access_token(credentials)
+    if not payload or await RevokedTokenFilter.is_revoked(payload.jti):
+        logger.warning("token失效")
+        raise ApiException(
+            code=ResponseCodeEnum.unauthorized.value,
+            message="登录失效或已在其他地方登录",
+        )
+
+    front_scene = request.headers.get(RequestHeaderKeyEnum.front_scene.value)
+    if front_scene and front_scene != payload.scene:
+        logger.warning("token场景不匹配")
+        raise ApiException(
+            code=ResponseCodeEnum.unauthorized.value,
+            message="token异常使用",
+        )
+
+    account = await _get_account_by_id(payload.sub)
+    _set_request_account(request, account, payload.scene)
+    return account
+
+
 async def _validate_jwt_token(
     request: Request,
     token: HTTPAuthorizationCredentials,
     user_center_redis_conn_pool: ConnectionPool,
-) -> Account:
+    permission_codes: Sequence[str] | None = None,
+) -> tuple[Account, bool | None]:
+    """token、场景、权限码一次 redis 往返完成校验
+
+    签名 token 走本地验签, 权限由调用方通过 account.has_permission(近端缓存) 校验
+
+    Returns:
+        tuple[Account, bool | None]: 账户, 是否拥有 permission_codes 中任一权限(未校验时为None)
+    """
+    if local_configs.server.token_mode == TokenModeEnum.jwt and is_signed_token(token.credentials):
+        return await _validate_signed_token(request, token.credentials), None
+
     async with Redis(
         connection_pool=user_center_redis_conn_pool,
         single_connection_client=True,
         decode_responses=True,
     ) as redis:
-        token_identifier = await redis.get(
-            keys.UserCenterKey.Token2AccountKey.format(  # type: ignore
-                token=token.credentials,
-            ),
+        result = await AuthenticateScript(
+            redis,
+            keys=[keys.UserCenterKey.Token2AccountKey.format(token=token.credentials)],  # type: ignore
+            args=[
+                request.headers.get(RequestHeaderKeyEnum.front_scene.value) or "",
+                keys.UserCenterKey.AccountPermissionRef.format(uuid=""),  # type: ignore
+                *(permission_codes or []),
+            ],
         )
 
-        if not token_identifier:
-            logger.warning("token缓存失效")
-            raise ApiException(
-                code=ResponseCodeEnum.unauthorized.value,
-                message="登录失效或已在其他地方登录",
-            )
-
-        account_id, scene = token_identifier.split(":")
+    if result[0] == AuthenticateResultEnum.token_invalid:
+        logger.warning("token缓存失效")
+        raise ApiException(
+            code=ResponseCodeEnum.unauthorized.value,
+            message="登录失效或已在其他地方登录",
+        )
 
-        if request.headers.get(RequestHeaderKeyEnum.front_scene.value) and scene != request.headers.get(
-            RequestHeaderKeyEnum.front_scene.value,
-        ):
-            logger.warning("token场景不匹配")
-            raise ApiException(
-                code=ResponseCodeEnum.unauthorized.value,
-                message="token异常使用",
-            )
+    if result[0] == AuthenticateResultEnum.scene_mismatch:
+        logger.warning("token场景不匹配")
+        raise ApiException(
+            code=ResponseCodeEnum.unauthorized.value,
+            message="token异常使用",
+        )
 
-        account = await _get_account_by_id(account_id)
+    _, account_id, scene, permitted = result
+    account = await _get_account_by_id(account_id)
 
-        if not account:
-            logger.warning("token账户不存在")
-            raise ApiException(
-                code=ResponseCodeEnum.unauthorized.value,
-                message=AuthorizationHeaderInvalidMsg,
-            )
+    if not account:
+        logger.warning("token账户不存在")
+        raise ApiException(
+            code=ResponseCodeEnum.unauthorized.value,
+            message=AuthorizationHeaderInvalidMsg,
+        )
 
-        # set scope
-        request.scope["user"] = account
-        request.scope["scene"] = scene
-        request.scope["is_staff"] = account.is_staff
-        request.scope["is_super_admin"] = account.is_super_admin
-        return account
+    # set scope
+    _set_request_account(request, account, scene)
+    if permitted == AuthenticateResultEnum.permission_unchecked:
+        return account, None
+    return account, permitted == AuthenticateResultEnum.permission_granted
 
 
 class TokenRequired:
     def __init__(
         self,
-        user_center_redis_conn_pool: ConnectionPool,
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
     ) -> None:
-        self.user_center_redis_conn_pool = user_center_redis_conn_pool
+        # 连接池在 fork 之后按 worker 获取, 不在导入时创建
+        self.conn_name = conn_name
 
     async def __call__(
         self,
         request: Request,  # WebSocket
         token: Annotated[HTTPAuthorizationCredentials, Depends(auth_schema)],
     ) -> Account:
-        return await _validate_jwt_token(
+        account, _ = await _validate_jwt_token(
             request,
             token,
-            self.user_center_redis_conn_pool,
+            local_configs.redis.connection_pool(self.conn_name),
         )
+        return account
 
 
-token_required = TokenRequired(local_configs.redis.connection_pool(ConnectionNameEnum.user_center))
+token_required = TokenRequired(ConnectionNameEnum.user_center)
 
 
 class ApiPermissionCheck:
@@ -238,24 +290,25 @@ class ApiPermissionCheck:
         request: Request,
         token: Annotated[HTTPAuthorizationCredentials, Depends(auth_schema)],
     ) -> Account:
+        permission_codes = get_route_permission_codes(request).account
+
+        permitted: bool | None = None
         account: Account | None = request.scope.get("user")  # type: ignore
         if not account:
-            account = await token_required(request, token)
+            # token 与权限在同一次 redis 往返中校验
+            account, permitted = await _validate_jwt_token(
+                request,
+                token,
+                local_configs.redis.connection_pool(ConnectionNameEnum.user_center),
+                permission_codes,
+            )
 
         if account.is_super_admin:
             return account
 
-        method = request.method
-        root_path: str = request.scope["root_path"]
-        path: str = request.scope["route"].path
-
-        if await account.has_permission(
-            [
-                "*",
-                f"{request.app.code}:*",
-                f"{request.app.code}:{method}:{root_path}{path}",
-            ],
-        ):
+        if permitted is None:
+            permitted = await account.has_permission(permission_codes)
+        if permitted:
             return account
 
         raise ApiException(
@@ -322,13 +375,15 @@ staff_admin_required = StaffAdminRequired()
 class ApiKeyPermissionCheck:
     """外部api key权限校验"""
 
-    user_center_redis_conn_pool: ConnectionPool
+    conn_name: ConnectionNameEnum
 
     def __init__(
         self,
-        user_center_redis_conn_pool: ConnectionPool,
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
     ) -> None:
-        self.user_center_redis_conn_pool = user_center_redis_conn_pool
+        self.conn_name = conn_name
+        # 密钥及权限集合近端缓存, 需在订阅启动前(导入时)创建
+        self.cache = ApiKeyCache.of(conn_name)
 
     async def __call__(
         self,
@@ -340,36 +395,27 @@ class ApiKeyPermissionCheck:
             description="请求时间戳, 秒级时间戳, 允许误差+30s",
         ),
         x_sign: str = Header(
-            description='签名, 生成: hmac_sha256(secret_key, "api_key&timestamp")',
+            description='签名, 生成: hmac_sha256(secret_key, "api_key&timestamp"), 传入 nonce 时为 "api_key&timestamp&nonce"',
+        ),
+        x_nonce: str | None = Header(
+            None,
+            description="随机串, 同一秒内发起多个请求时需传入以区分签名",
+            min_length=8,
+            max_length=64,
         ),
     ) -> bool:
-        if abs(int(time.time()) - int(x_timestamp)) > 30:
+        if abs(int(time.time()) - int(x_timestamp)) > local_configs.server.api_key.timestamp_tolerance:
             raise ApiException(
                 message="请求时间戳过期",
                 code=ResponseCodeEnum.unauthorized.value,
             )
+        if x_nonce is None and local_configs.server.api_key.require_nonce:
+            raise ApiException(
+                message="缺少nonce",
+                code=ResponseCodeEnum.unauthorized.value,
+            )
 
-        redis_api_secret_key = keys.RedisCacheKey.ApiSecretKey.format(  # type: ignore
-            api_key=x_api_key,
-        )
-        redis_perm_key = keys.RedisCacheKey.ApiKeyPermissionSet.format(  # type: ignore
-            api_key=x_api_key,
-        )
-
-        async with Redis(
-            connection_pool=self.user_center_redis_conn_pool,
-            single_connection_client=True,
-        ) as r:
-            async with r.pipeline() as pipe:
-                pipe.get(redis_api_secret_key)
-                pipe.smismember(
-                    name=redis_perm_key,
-                    values=[
-                        f"{request.app.code}:*",
-                        f'{request.app.code}:{request.method}:{request.scope["root_path"]}{request.scope["route"].path}',
-                    ],
-                )
-                secret_key, is_ok = await pipe.execute()
+        secret_key, is_ok = await self.cache.check(x_api_key, get_route_permission_codes(request).api_key)
         if not secret_key:
             raise ApiException(
                 message="无效的ApiKey",
@@ -378,16 +424,29 @@ class ApiKeyPermissionCheck:
 
         result_sign = HashUtil.hmac_sha256_encode(
             k=secret_key,
-            s=f"{x_api_key}&{x_timestamp}",
+            s=f"{x_api_key}&{x_timestamp}" if x_nonce is None else f"{x_api_key}&{x_timestamp}&{x_nonce}",
         )
-        if result_sign != x_sign:
+        if not hmac.compare_digest(result_sign, x_sign):
             raise ApiException(
                 message="签名错误",
                 code=ResponseCodeEnum.unauthorized.value,
             )
 
+        # 签名通过后再记录, 避免伪造请求占用; 相同签名在时间戳允许误差内只放行一次
+        if not await claim_signature(
+            self.conn_name,
+            x_api_key,
+            x_timestamp,
+            x_sign,
+            local_configs.server.api_key.timestamp_tolerance,
+        ):
+            raise ApiException(
+                message="重复的请求",
+                code=ResponseCodeEnum.unauthorized.value,
+            )
+
         # 如果请求的接口，不在权限集合里
-        if not any(is_ok):
+        if not is_ok:
             raise ApiException(
                 message=ForbiddenMsg,
                 code=ResponseCodeEnum.forbidden.value,
@@ -400,6 +459,4 @@ class ApiKeyPermissionCheck:
         return True
 
 
-external_api_key_permission_check = ApiKeyPermissionCheck(
-    local_configs.redis.connection_pool(ConnectionNameEnum.user_center)
-)
+external_api_key_permission_check = ApiKeyPermissionCheck(ConnectionNameEnum.user_center)
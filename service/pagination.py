@@ -0,0 +1,253 @@
+"""列表分页
+
+- 游标(keyset)分页: 游标为排序字段 + 主键(兜底, 保证顺序唯一)在上一页最后一行的取值,
+  下一页通过 WHERE (排序字段, 主键) 在该行之后 代替 OFFSET, 查询代价与翻页深度无关
+- 总数统计策略(CountStrategyEnum):
+    - exact: 每次 COUNT
+    - cached: 按 COUNT 语句摘要缓存到 redis, 模型写入(notify_model_write)后版本号递增使缓存失效;
+      过滤条件关联的其他表写入时不失效, 由短 TTL 兜底
+    - estimated: mysql 按 information_schema / EXPLAIN 估算, 其他数据库退化为 exact
+    - skip: 不计数, 仅返回 has_more
+- 分页与计数查询并发执行(gather_queries), 每次最多占用 list_query_concurrency 个连接;
+  第一个之外的连接进程内共用上限(连接池 maxsize 的一半), 且只在连接池有空闲时占用, 否则串行
+"""
+
+import time
+import base64
+import asyncio
+import hashlib
+import binascii
+from typing import Any, TypeVar, NamedTuple
+from weakref import WeakKeyDictionary
+from collections.abc import Awaitable
+
+import orjson
+from loguru import logger
+from tortoise.models import Model
+from redis.exceptions import RedisError
+from tortoise.queryset import QuerySet
+from tortoise.expressions import Q
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from common.enums import CountStrategyEnum
+from common.schemas import CRUDPager
+from configs.config import local_configs
+from storages.aredis.keys import RedisCacheKey
+from configs.defines import ConnectionNameEnum
+from service.exceptions import ApiException
+from storages.relational.base.write_hooks import on_model_write
+
+# ListCount hash 中的写入版本字段
+COUNT_VERSION_FIELD = "_v"
+# 版本号保留时间, 需大于各列表的缓存时间
+COUNT_VERSION_TTL = 24 * 60 * 60
+
+T = TypeVar("T")
+
+# 连接池 -> 并发查询额外占用的连接数限制, 进程内共用, 首次使用时创建
+_extra_connections: "WeakKeyDictionary[Any, asyncio.Semaphore]" = WeakKeyDictionary()
+
+# 使用 cached 策略的模型, 其他模型写入时无需递增版本
+_cached_count_models: set[type[Model]] = set()
+
+
+class PageResult(NamedTuple):
+    records: list
+    total_count: int | None
+    # 下一页游标, 没有下一页时为空
+    next_cursor: str | None
+    count_strategy: CountStrategyEnum
+
+
+def keyset_order(model: type[Model], order_by: list[str]) -> list[str]:
+    """实际排序: 未指定时使用模型默认排序, 末尾补充主键"""
+    if not order_by:
+        order_by = [f"-{f}" if o.value == "DESC" else f for f, o in model._meta.ordering]  # type: ignore
+    pk_attr = model._meta.pk_attr
+    if pk_attr not in (f.lstrip("-") for f in order_by):
+        order_by = [*order_by, pk_attr]
+    return order_by
+
+
+def encode_cursor(obj: Model | dict, order_by: list[str]) -> str:
+    if isinstance(obj, dict):
+        values = [obj[f.lstrip("-")] for f in order_by]
+    else:
+        values = [getattr(obj, f.lstrip("-")) for f in order_by]
+    raw = orjson.dumps({"o": order_by, "v": values}, default=str)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(model: type[Model], cursor: str, order_by: list[str]) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = orjson.loads(raw)
+        if data["o"] != order_by or len(data["v"]) != len(order_by):
+            raise ValueError
+        fields_map = model._meta.fields_map
+        return [
+            None if v is None else fields_map[f.lstrip("-")].to_python_value(v)
+            for f, v in zip(order_by, data["v"], strict=True)
+        ]
+    except (binascii.Error, orjson.JSONDecodeError, ValueError, KeyError, TypeError) as e:
+        raise ApiException("分页游标无效或与排序字段不匹配") from e
+
+
+def keyset_filter(model: type[Model], order_by: list[str], values: list[Any]) -> Q:
+    """(f1, f2, ..., pk) 在游标之后的条件
+
+    按 mysql 的 NULL 排序规则: 升序时 NULL 在前, 降序时 NULL 在后
+    """
+    fields_map = model._meta.fields_map
+    branches = []
+    equals: list[Q] = []
+    for field, value in zip(order_by, values, strict=True):
+        desc = field.startswith("-")
+        name = field.lstrip("-")
+        if value is None:
+            after = None if desc else Q(**{f"{name}__isnull": False})
+            equal = Q(**{f"{name}__isnull": True})
+        else:
+            after = Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+            if desc and fields_map[name].null:
+                after = Q(after, Q(**{f"{name}__isnull": True}), join_type=Q.OR)
+            equal = Q(**{name: value})
+        if after is not None:
+            branches.append(Q(*equals, after) if equals else after)
+        equals.append(equal)
+    return Q(*branches, join_type=Q.OR)
+
+
+def enable_cached_count(model: type[Model]) -> None:
+    _cached_count_models.add(model)
+
+
+def _count_cache_location(model: type[Model]) -> tuple[ConnectionNameEnum, str]:
+    return (
+        ConnectionNameEnum(model._meta.default_connection),
+        RedisCacheKey.ListCount.format(table=model._meta.db_table),  # type: ignore
+    )
+
+
+async def _cached_count(queryset: QuerySet, ttl: int) -> int:
+    conn_name, key = _count_cache_location(queryset.model)
+    digest = hashlib.sha1(queryset.count().sql(params_inline=True).encode()).hexdigest()  # noqa: S324
+    async with local_configs.redis.get_redis(conn_name) as r:
+        version, cached = await r.hmget(key, [COUNT_VERSION_FIELD, digest])
+    version = version or "0"
+    if cached:
+        cached_version, expires_at, total = cached.split(":")
+        if cached_version == version and int(expires_at) > time.time():
+            return int(total)
+
+    # 先读版本再计数, 计数期间发生写入时版本已变, 写入的缓存不会命中
+    total = await queryset.count()
+    async with local_configs.redis.get_redis(conn_name) as r:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hset(key, digest, f"{version}:{int(time.time()) + ttl}:{total}")
+            pipe.expire(key, COUNT_VERSION_TTL)
+            await pipe.execute()
+    return total
+
+
+async def _estimated_count(queryset: QuerySet) -> int | None:
+    """mysql 行数估算, 无过滤条件时取 information_schema, 否则取 EXPLAIN 驱动表的 rows * filtered
+
+    无索引的等值条件 filtered 按经验值(约 10%)估算, 带软删除等固定条件的列表偏差可达一个数量级, 应使用 cached
+    """
+    db_model = queryset.model
+    db = db_model._meta.db
+    if db.capabilities.dialect != "mysql":
+        return None
+    sql = queryset.sql(params_inline=True)
+    if " WHERE " not in sql:
+        rows = await db.execute_query_dict(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [db_model._meta.db_table],
+        )
+        return int(rows[0]["TABLE_ROWS"] or 0) if rows else None
+    plan = await db.execute_query_dict(f"EXPLAIN {sql}")
+    if not plan or plan[0].get("rows") is None:
+        return None
+    return int(plan[0]["rows"] * float(plan[0].get("filtered") or 100) / 100)
+
+
+async def count_total(
+    queryset: QuerySet,
+    pagination: CRUDPager,
+) -> tuple[int | None, CountStrategyEnum]:
+    """按分页配置的策略统计总数, 返回 (总数, 实际使用的策略)"""
+    strategy = pagination.count_strategy
+    if strategy == CountStrategyEnum.skip:
+        return None, strategy
+
+    if strategy == CountStrategyEnum.cached:
+        try:
+            return await _cached_count(queryset, pagination.count_cache_ttl), strategy
+        except RedisError as e:
+            logger.warning(f"列表总数缓存不可用: {e}")
+
+    elif strategy == CountStrategyEnum.estimated:
+        estimate = await _estimated_count(queryset)
+        if estimate is not None:
+            return estimate, strategy
+
+    return await queryset.count(), CountStrategyEnum.exact
+
+
+def _extra_semaphore(pool: Any) -> asyncio.Semaphore:  # ruff: noqa: ANN401
+    semaphore = _extra_connections.get(pool)
+    if semaphore is None:
+        # 其余连接留给单连接执行的请求
+        semaphore = _extra_connections[pool] = asyncio.Semaphore(max(1, pool.maxsize // 2))
+    return semaphore
+
+
+async def _limited(semaphore: asyncio.Semaphore, aw: Awaitable[T]) -> T:
+    async with semaphore:
+        return await aw
+
+
+async def gather_queries(db: BaseDBAsyncClient, *aws: Awaitable[Any]) -> list[Any]:
+    """并发执行互不依赖的只读查询, 每个查询从连接池单独取连接
+
+    事务内(TransactionWrapper)及 sqlite 等没有连接池的客户端共用一个连接, 串行执行;
+    额外连接达到进程内上限或连接池空闲连接不足时不等待, 减少并发直至串行
+    """
+    pool = getattr(db, "_pool", None)
+    if pool is None or local_configs.server.list_query_concurrency <= 1 or len(aws) <= 1:
+        return [await aw for aw in aws]
+
+    extra = _extra_semaphore(pool)
+    wanted = min(local_configs.server.list_query_concurrency, len(aws)) - 1
+    # 空闲及可新建的连接数, 需先满足第一个查询
+    available = pool.freesize + pool.maxsize - pool.size - 1
+    acquired = 0
+    # 未锁定时 acquire 立即返回
+    while acquired < min(wanted, available) and not extra.locked():
+        await extra.acquire()
+        acquired += 1
+    if not acquired:
+        return [await aw for aw in aws]
+    try:
+        semaphore = asyncio.Semaphore(acquired + 1)
+        return await asyncio.gather(*(_limited(semaphore, aw) for aw in aws))
+    finally:
+        for _ in range(acquired):
+            extra.release()
+
+
+@on_model_write(Model)
+async def _bump_count_version(db_model: type[Model], saved: list[Model], deleted_pks: list[Any]) -> None:
+    if db_model not in _cached_count_models:
+        return
+    conn_name, key = _count_cache_location(db_model)
+    try:
+        async with local_configs.redis.get_redis(conn_name) as r:
+            async with r.pipeline(transaction=False) as pipe:
+                pipe.hincrby(key, COUNT_VERSION_FIELD, 1)
+                pipe.expire(key, COUNT_VERSION_TTL)
+                await pipe.execute()
+    except RedisError as e:
+        # 不影响写入, 缓存由 TTL 兜底
+        logger.warning(f"列表总数缓存失效失败: {e}")
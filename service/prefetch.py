@@ -0,0 +1,156 @@
+"""按响应 schema 批量加载关联对象
+
+根据 schema 中出现的关系字段生成加载计划(relation_plan):
+- 同库的正向外键/一对一: select_related, 与主查询 JOIN 一次取回
+- 多对多、反向关系及跨库关系: 查询结果返回后对整页对象每个关系一次 IN 查询(嵌套关系每层一次)
+查询次数只与 schema 中的关系数有关, 与每页行数无关
+"""
+
+import types
+from typing import Any, Union, NamedTuple, get_args, get_origin
+from functools import lru_cache
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+from tortoise.expressions import Q
+from tortoise.contrib.pydantic import PydanticModel
+
+from common.pydantic import SUB_FIELDS_MODEL_CACHE_SIZE
+
+
+class RelationPlan(NamedTuple):
+    # 需 JOIN 的正向关系路径
+    select_related: tuple[str, ...]
+    # (JOIN 路径, 该路径上的模型, 需批量查询的关系), JOIN 路径为空时为主模型
+    prefetch: tuple[tuple[tuple[str, ...], type[Model], tuple[str, ...]], ...]
+
+
+def _nested_schema(annotation: Any) -> type[PydanticModel] | None:  # ruff: noqa: ANN401
+    if get_origin(annotation) in (Union, types.UnionType, list):
+        for arg in get_args(annotation):
+            schema = _nested_schema(arg)
+            if schema is not None:
+                return schema
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, PydanticModel):
+        return annotation
+    return None
+
+
+def _fetch_paths(db_model: type[Model], schema: type[PydanticModel] | None) -> list[str]:
+    """schema 中的关系字段及其嵌套关系, 用于 fetch_related 的 a__b 路径"""
+    if schema is None:
+        return []
+    paths = []
+    for name, field in schema.model_fields.items():
+        if name not in db_model._meta.fetch_fields:
+            continue
+        nested = _nested_schema(field.annotation)
+        related_model = db_model._meta.fields_map[name].related_model  # type: ignore
+        sub_paths = _fetch_paths(related_model, nested)
+        paths.extend([f"{name}__{p}" for p in sub_paths] or [name])
+    return paths
+
+
+def _plan(
+    db_model: type[Model],
+    schema: type[PydanticModel],
+    path: tuple[str, ...],
+    join: bool,
+    select_related: list[str],
+    prefetch: list[tuple[tuple[str, ...], type[Model], tuple[str, ...]]],
+) -> None:
+    meta = db_model._meta
+    forward_fields = meta.fk_fields | meta.o2o_fields
+    fetch = []
+    for name, field in schema.model_fields.items():
+        if name not in meta.fetch_fields:
+            continue
+        nested = _nested_schema(field.annotation)
+        related_model = meta.fields_map[name].related_model  # type: ignore
+        if join and name in forward_fields and related_model._meta.default_connection == meta.default_connection:
+            select_related.append("__".join((*path, name)))
+            if nested is not None:
+                _plan(related_model, nested, (*path, name), join, select_related, prefetch)
+        else:
+            fetch.extend([f"{name}__{p}" for p in _fetch_paths(related_model, nested)] or [name])
+    if fetch:
+        prefetch.append((path, db_model, tuple(fetch)))
+
+
+@lru_cache(maxsize=SUB_FIELDS_MODEL_CACHE_SIZE)
+def relation_plan(db_model: type[Model], schema: type[PydanticModel], join: bool = True) -> RelationPlan:
+    """join: 是否可对主查询使用 select_related, 对已查出的对象补充加载时为 False"""
+    select_related: list[str] = []
+    prefetch: list[tuple[tuple[str, ...], type[Model], tuple[str, ...]]] = []
+    _plan(db_model, schema, (), join, select_related, prefetch)
+    return RelationPlan(tuple(select_related), tuple(prefetch))
+
+
+def _objects_at(objs: Sequence[Model], path: tuple[str, ...]) -> list[Model]:
+    """沿 JOIN 路径取出已加载的关联对象, 去重"""
+    for name in path:
+        seen: dict[int, Model] = {}
+        for obj in objs:
+            related = getattr(obj, f"_{name}", None)
+            if isinstance(related, Model):
+                seen.setdefault(id(related), related)
+        objs = list(seen.values())
+    return list(objs)
+
+
+async def prefetch_relations(objs: Sequence[Model], plan: RelationPlan) -> None:
+    """对整页对象按计划批量加载 select_related 以外的关系"""
+    if not objs:
+        return
+    for path, db_model, fetch in plan.prefetch:
+        targets = _objects_at(objs, path)
+        if not targets:
+            continue
+        # 关联模型在其他库时需在对应库查询
+        db2fields = defaultdict(list)
+        for f in fetch:
+            related_model = db_model._meta.fields_map[f.split("__", 1)[0]].related_model  # type: ignore
+            db2fields[related_model._meta.db].append(f)
+        for db, fields in db2fields.items():
+            await db_model.fetch_for_list(targets, *fields, using_db=db)
+
+
+@lru_cache(maxsize=SUB_FIELDS_MODEL_CACHE_SIZE)
+def schema_models(db_model: type[Model], schema: type[PydanticModel]) -> frozenset[type[Model]]:
+    """schema 涉及的模型, 含嵌套的关联模型"""
+    models = {db_model}
+    for name, field in schema.model_fields.items():
+        if name not in db_model._meta.fetch_fields:
+            continue
+        related_model = db_model._meta.fields_map[name].related_model  # type: ignore
+        nested = _nested_schema(field.annotation)
+        models.update(schema_models(related_model, nested) if nested else (related_model,))
+    return frozenset(models)
+
+
+def lookup_models(db_model: type[Model], lookups: Iterable[str]) -> set[type[Model]]:
+    """过滤/搜索/排序条件(a__b__c)经过的关联模型"""
+    models: set[type[Model]] = set()
+    for lookup in lookups:
+        model = db_model
+        for part in lookup.lstrip("-").split("__"):
+            if part not in model._meta.fetch_fields:
+                break
+            model = model._meta.fields_map[part].related_model  # type: ignore
+            models.add(model)
+    return models
+
+
+def _q_lookups(q: Q) -> list[str]:
+    return [*q.filters, *(lookup for child in q.children for lookup in _q_lookups(child))]
+
+
+def queryset_models(queryset: QuerySet) -> set[type[Model]]:
+    """queryset 已有过滤条件涉及的模型, 含主模型"""
+    return {
+        queryset.model,
+        *lookup_models(queryset.model, (lookup for q in queryset._q_objects for lookup in _q_lookups(q))),
+    }
@@ -0,0 +1,164 @@
+"""查询结果缓存
+
+读多写少的模型在 Meta 中设置 query_cache_ttl(秒) 启用, 接口响应的 data 按 (涉及的模型, 查询参数) 缓存为 json bytes:
+- 两级: 进程内 NearCache -> redis(QueryCache:Data:{digest}) -> 数据库
+- 每个模型一个版本号(QueryCache:Version), 缓存 key 的摘要包含涉及的全部模型的当前版本, 调用方需传入
+  schema 中的关联模型及过滤/搜索/排序条件经过的关联模型(service.prefetch.lookup_models/queryset_models);
+  模型写入(notify_model_write)后版本递增并广播, 旧版本的缓存不会再被读取, 由 TTL 清理
+- 查询前先读版本, 回源期间发生的写入只会使结果落在旧版本下
+- 涉及的模型有未启用缓存的(其写入不递增版本)或跨 redis 连接时不缓存
+"""
+
+import hashlib
+from typing import Any
+from collections.abc import Iterable, Sequence, Callable, Awaitable
+
+import orjson
+from loguru import logger
+from tortoise.models import Model
+from redis.exceptions import RedisError
+
+from configs.config import local_configs
+from common.responses import AesResponse
+from common.serializer import encode_data, json_response
+from storages.aredis.keys import RedisCacheKey
+from configs.defines import ConnectionNameEnum
+from storages.aredis.near_cache import NearCache
+from storages.relational.base.write_hooks import on_model_write
+
+
+def query_cache_ttl(models: Iterable[type[Model]]) -> int | None:
+    """全部模型启用缓存且在同一连接时返回最短的缓存时间"""
+    models = list(models)
+    ttls = [getattr(getattr(model, "Meta", None), "query_cache_ttl", None) for model in models]
+    if not models or not all(ttls) or len({model._meta.default_connection for model in models}) > 1:
+        return None
+    return min(ttls)  # type: ignore
+
+
+class QueryCache:
+    """每个 redis 连接一个实例, 通过 QueryCache.of 获取"""
+
+    _instances: dict[ConnectionNameEnum, "QueryCache"] = {}
+
+    def __init__(self, conn_name: ConnectionNameEnum) -> None:
+        self.conn_name = conn_name
+        # 表名 -> 版本号, 写入时广播失效
+        self.versions: NearCache[str] = NearCache(f"QueryCacheVersion:{conn_name.value}", conn_name=conn_name)
+        # 摘要 -> data json, 摘要含版本号, 无需失效
+        self.local: NearCache[bytes] = NearCache(f"QueryCache:{conn_name.value}", conn_name=conn_name)
+        self.redis_hits = 0
+        self.redis_misses = 0
+
+    @classmethod
+    def of(cls, conn_name: ConnectionNameEnum) -> "QueryCache":
+        if conn_name not in cls._instances:
+            cls._instances[conn_name] = cls(conn_name)
+        return cls._instances[conn_name]
+
+    async def _versions(self, tables: Sequence[str]) -> list[str]:
+        versions = {table: self.versions.get(table) for table in tables}
+        missing = [table for table, version in versions.items() if version is None]
+        if missing:
+            generation = self.versions.generation
+            async with local_configs.redis.get_redis(self.conn_name) as r:
+                fetched = await r.hmget(RedisCacheKey.QueryCacheVersion, missing)  # type: ignore
+            for table, version in zip(missing, fetched, strict=True):
+                versions[table] = version or "0"
+                self.versions.set(table, versions[table], generation)
+        return [versions[table] for table in tables]  # type: ignore
+
+    async def get_or_set(
+        self,
+        models: Iterable[type[Model]],
+        key_parts: Sequence[Any],
+        ttl: int,
+        producer: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        tables = sorted({model._meta.db_table for model in models})
+        versions = await self._versions(tables)
+        digest = hashlib.sha1(  # noqa: S324
+            orjson.dumps([tables, versions, key_parts], default=str, option=orjson.OPT_SORT_KEYS),
+        ).hexdigest()
+        data = self.local.get(digest)
+        if data is not None:
+            return data
+
+        generation = self.local.generation
+        key = RedisCacheKey.QueryCacheData.format(digest=digest)  # type: ignore
+        async with local_configs.redis.get_redis(self.conn_name) as r:
+            cached = await r.get(key)
+        if cached:
+            self.redis_hits += 1
+            data = cached.encode() if isinstance(cached, str) else cached
+            self.local.set(digest, data, generation)
+            return data
+
+        self.redis_misses += 1
+        data = await producer()
+        async with local_configs.redis.get_redis(self.conn_name) as r:
+            await r.set(key, data, ex=ttl)
+        self.local.set(digest, data, generation)
+        return data
+
+    async def bump(self, *tables: str) -> None:
+        async with local_configs.redis.get_redis(self.conn_name) as r:
+            async with r.pipeline(transaction=False) as pipe:
+                for table in tables:
+                    pipe.hincrby(RedisCacheKey.QueryCacheVersion, table, 1)  # type: ignore
+                self.versions.publish_invalidate(pipe, *tables)
+                await pipe.execute()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+        }
+
+
+async def cached_response(
+    models: Iterable[type[Model]],
+    key_parts: Sequence[Any],
+    producer: Callable[[], Awaitable[Any]],
+) -> AesResponse:
+    """producer 返回响应 data, 结果按 Resp 常规序列化的格式缓存; 不满足缓存条件或 redis 不可用时直接回源"""
+    models = set(models)
+
+    async def produce() -> bytes:
+        return encode_data(await producer())
+
+    ttl = query_cache_ttl(models)
+    if ttl is None:
+        return json_response(orjson.Fragment(await produce()))
+    cache = QueryCache.of(ConnectionNameEnum(next(iter(models))._meta.default_connection))
+    try:
+        data = await cache.get_or_set(models, key_parts, ttl, produce)
+    except RedisError as e:
+        logger.warning(f"查询结果缓存不可用: {e}")
+        data = await produce()
+    return json_response(orjson.Fragment(data))
+
+
+async def invalidate_query_cache(*models: type[Model]) -> None:
+    """递增模型的缓存版本; 不经过 service.crud 直接写库(脚本等)后调用"""
+    tables_of: dict[ConnectionNameEnum, list[str]] = {}
+    for model in models:
+        if query_cache_ttl((model,)) is not None:
+            conn_name = ConnectionNameEnum(model._meta.default_connection)
+            tables_of.setdefault(conn_name, []).append(model._meta.db_table)
+    for conn_name, tables in tables_of.items():
+        await QueryCache.of(conn_name).bump(*tables)
+
+
+@on_model_write(Model)
+async def _bump_query_cache_version(db_model: type[Model], saved: list[Model], deleted_pks: list[Any]) -> None:
+    try:
+        await invalidate_query_cache(db_model)
+    except RedisError as e:
+        # 不影响写入, 缓存由 TTL 兜底
+        logger.warning(f"查询结果缓存失效失败: {e}")
+
+
+# 需在 NearCacheSubscriber.start 之前注册, 其他连接首次使用时创建, 本地缓存在订阅建立前不生效
+QueryCache.of(ConnectionNameEnum.user_center)
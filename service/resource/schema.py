@@ -1,4 +1,4 @@
-from pydantic import Field
+from pydantic import Field, BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from storages.relational.models.user_center import Resource
@@ -11,6 +11,14 @@ class OverridePydanticMeta:
 class ResourceCreateSchema(pydantic_model_creator(Resource, name="ResourceCreateSchema", exclude_readonly=True)): ...
 
 
+class ResourceOrderUpdate(BaseModel):
+    """批量调整菜单顺序/层级"""
+
+    id: int = Field(description="资源ID")
+    parent_id: int | None = Field(None, description="父级ID, 为空时移动到顶层")
+    order_num: int | None = Field(None, description="排列序号")
+
+
 class ResourceLevelTreeBaseNode(
     pydantic_model_creator(
         Resource,
@@ -0,0 +1,65 @@
+from loguru import logger
+
+from configs.config import local_configs
+from storages.aredis.keys import UserCenterKey
+from configs.defines import ConnectionNameEnum
+from storages.relational.models.user_center import SUPER_ADMIN_PERMISSION_REF, Role, Account
+
+
+async def rebuild_all_permission_cache(
+    chunk_size: int = 2000,
+    conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
+) -> tuple[int, int]:
+    """分批重建全部角色权限集合及账户权限指针, 按主键 keyset 分页, 每批一次查询 + 一次 pipeline
+
+    Returns:
+        tuple[int, int]: (角色数, 账户数)
+    """
+    role_count = 0
+    last_id = 0
+    while True:
+        role_ids: list[int] = (
+            await Role.filter(deleted_at=0, id__gt=last_id).order_by("id").limit(chunk_size).values_list("id", flat=True)
+        )  # type: ignore
+        if not role_ids:
+            break
+        await Role.rebuild_permission_cache(role_ids, conn_name)
+        role_count += len(role_ids)
+        last_id = role_ids[-1]
+        logger.info(f"已重建角色权限: {role_count}")
+
+    account_count = 0
+    last_id = 0
+    async with local_configs.redis.get_redis(conn_name) as r:
+        while True:
+            rows = await Account.filter(deleted_at=0, id__gt=last_id).order_by("id").limit(chunk_size).values_list(
+                "id",
+                "role_id",
+                "is_staff",
+                "is_super_admin",
+            )
+            if not rows:
+                break
+            async with r.pipeline(transaction=False) as pipe:
+                for account_id, role_id, is_staff, is_super_admin in rows:
+                    pipe.set(
+                        UserCenterKey.AccountPermissionRef.format(uuid=str(account_id)),  # type: ignore
+                        SUPER_ADMIN_PERMISSION_REF if is_super_admin else Role.permission_set_key(role_id, is_staff),
+                    )
+                await pipe.execute()
+            account_count += len(rows)
+            last_id = rows[-1][0]
+            logger.info(f"已重建账户权限指针: {account_count}")
+
+        # 清理旧版按账户存储的权限集合
+        legacy_keys = []
+        legacy_pattern = UserCenterKey.AccountApiPermissionSet.format(uuid="*")  # type: ignore
+        async for key in r.scan_iter(match=legacy_pattern, count=chunk_size):
+            legacy_keys.append(key)
+            if len(legacy_keys) >= chunk_size:
+                await r.unlink(*legacy_keys)
+                legacy_keys.clear()
+        if legacy_keys:
+            await r.unlink(*legacy_keys)
+
+    return role_count, account_count
@@ -0,0 +1,198 @@
+"""请求 SQL 执行计划采样
+
+开启 server.sql_explain 后按 sample_rate 采样请求(SqlExplainPlugin), 记录请求内执行的 mysql SELECT(按语句形状去重),
+响应后在后台逐条执行 EXPLAIN FORMAT=JSON, 检出全表扫描、全索引扫描、filesort 及临时表:
+- 按路由汇总在进程内(每个 worker 独立), 见 /v1/common/sql-explain
+- 有问题的语句记录警告日志
+"""
+
+import random
+import asyncio
+from typing import Any
+from datetime import datetime
+from collections.abc import Sequence
+
+import orjson
+from loguru import logger
+from pydantic import Field, BaseModel
+from tortoise import Tortoise
+from starlette.types import Message, Scope
+from starlette_context import context
+from starlette.requests import Request, HTTPConnection
+from starlette.responses import Response
+from starlette_context.plugins import Plugin
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from common.enums import ContextKeyEnum, ExplainIssueEnum
+from common.utils import datetime_now
+from configs.config import local_configs
+from storages.relational.base.instrument import normalize_sql, on_sql_execute
+
+
+class SqlExplainIssue(BaseModel):
+    kind: ExplainIssueEnum = Field(description=f"问题类型, {ExplainIssueEnum._dict}")  # type: ignore
+    table: str | None = Field(None, description="表名")
+
+
+class SqlExplainStatement(BaseModel):
+    sql: str = Field(description="语句形状")
+    issues: list[SqlExplainIssue] = Field(description="执行计划问题")
+    samples: int = Field(0, description="采样次数")
+    last_seen: datetime = Field(description="最近采样时间")
+
+
+class SqlExplainRoute(BaseModel):
+    route: str = Field(description="路由")
+    samples: int = Field(0, description="采样请求数")
+    statements: dict[str, SqlExplainStatement] = Field({}, description="语句形状 -> 采样结果")
+
+
+# 路由 -> 采样结果
+_reports: dict[str, SqlExplainRoute] = {}
+
+# 持有运行中任务的引用, 避免被回收
+_running_tasks: set[asyncio.Task] = set()
+
+
+class SqlCapture:
+    """单个采样请求内执行的 SELECT"""
+
+    __slots__ = ("scope", "active", "statements")
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        # 响应后关闭, 后台 EXPLAIN 等不再记录
+        self.active = True
+        # 语句形状 -> (连接名, sql, 参数)
+        self.statements: dict[str, tuple[str, str, Sequence | None]] = {}
+
+
+@on_sql_execute
+def _capture_select(client: BaseDBAsyncClient, query: str, values: Sequence | None, elapsed: float) -> None:
+    if not context.exists():
+        return
+    capture: SqlCapture | None = context.get(ContextKeyEnum.sql_explain.value)
+    if (
+        capture is None
+        or not capture.active
+        or len(capture.statements) >= local_configs.server.sql_explain.max_statements
+        or client.capabilities.dialect != "mysql"
+        or query.lstrip()[:6].upper() != "SELECT"
+    ):
+        return
+    capture.statements.setdefault(normalize_sql(query), (client.connection_name, query, values))
+
+
+def _walk_plan(node: Any, issues: list[SqlExplainIssue]) -> None:  # ruff: noqa: ANN401
+    if isinstance(node, list):
+        for item in node:
+            _walk_plan(item, issues)
+        return
+    if not isinstance(node, dict):
+        return
+    table = node.get("table_name")
+    access_type = node.get("access_type")
+    if table and access_type == "ALL":
+        issues.append(SqlExplainIssue(kind=ExplainIssueEnum.full_scan, table=table))
+    elif table and access_type == "index":
+        issues.append(SqlExplainIssue(kind=ExplainIssueEnum.full_index_scan, table=table))
+    # filesort/临时表标记在 ordering_operation/grouping_operation 等节点上, 不一定有表名
+    if node.get("using_filesort") is True:
+        issues.append(SqlExplainIssue(kind=ExplainIssueEnum.filesort, table=table))
+    if node.get("using_temporary_table") is True:
+        issues.append(SqlExplainIssue(kind=ExplainIssueEnum.temporary, table=table))
+    for value in node.values():
+        if isinstance(value, dict | list):
+            _walk_plan(value, issues)
+
+
+def explain_issues(plan: dict) -> list[SqlExplainIssue]:
+    """EXPLAIN FORMAT=JSON 结果中的问题"""
+    issues: list[SqlExplainIssue] = []
+    _walk_plan(plan, issues)
+    return issues
+
+
+def route_name(scope: Scope) -> str | None:
+    route = scope.get("route")
+    if route is None:
+        return None
+    return f"{scope['method']} {scope.get('root_path', '')}{route.path}"
+
+
+async def explain_capture(route: str, capture: SqlCapture) -> None:
+    config = local_configs.server.sql_explain
+    report = _reports.setdefault(route, SqlExplainRoute(route=route))
+    report.samples += 1
+    for shape, (conn_name, query, values) in capture.statements.items():
+        statement = report.statements.get(shape)
+        if statement is None and len(report.statements) >= config.max_statements:
+            continue
+        try:
+            _, rows = await Tortoise.get_connection(conn_name).execute_query(f"EXPLAIN FORMAT=JSON {query}", values)
+            plan = orjson.loads(next(iter(rows[0].values())))
+        except Exception as e:
+            logger.warning(f"EXPLAIN 失败: {e}; {shape}")
+            continue
+        issues = explain_issues(plan)
+        if statement is None:
+            statement = report.statements[shape] = SqlExplainStatement(
+                sql=shape,
+                issues=issues,
+                last_seen=datetime_now(),
+            )
+        statement.issues = issues
+        statement.samples += 1
+        statement.last_seen = datetime_now()
+        if issues:
+            logger.warning(
+                f"{route} 执行计划: "
+                f"{', '.join(f'{i.kind.label}({i.table})' if i.table else i.kind.label for i in issues)}; {shape}",
+            )
+
+
+def explain_report(flagged_only: bool = True) -> list[SqlExplainRoute]:
+    """当前进程的采样结果, flagged_only 时只返回有问题的语句"""
+    result = []
+    for report in _reports.values():
+        statements = {
+            shape: statement
+            for shape, statement in report.statements.items()
+            if statement.issues or not flagged_only
+        }
+        if statements or not flagged_only:
+            result.append(report.model_copy(update={"statements": statements}))
+    return sorted(result, key=lambda r: len(r.statements), reverse=True)
+
+
+def clear_explain_report() -> None:
+    _reports.clear()
+
+
+class SqlExplainPlugin(Plugin):
+    """按比例采样请求, 响应后在后台 EXPLAIN 请求内的 SELECT"""
+
+    key = ContextKeyEnum.sql_explain.value
+
+    async def process_request(
+        self,
+        request: Request | HTTPConnection,
+    ) -> SqlCapture | None:
+        if random.random() >= local_configs.server.sql_explain.sample_rate:  # noqa: S311
+            return None
+        return SqlCapture(request.scope)
+
+    async def enrich_response(
+        self,
+        response: Response | Message,
+    ) -> None:
+        capture: SqlCapture | None = context.get(self.key)
+        if capture is None or not capture.active:
+            return
+        capture.active = False
+        route = route_name(capture.scope)
+        if route is None or not capture.statements:
+            return
+        task = asyncio.create_task(explain_capture(route, capture))
+        _running_tasks.add(task)
+        task.add_done_callback(_running_tasks.discard)
@@ -0,0 +1,98 @@
+"""请求级 SQL 统计
+
+通过 storages.relational.base.instrument 记录每个请求执行的语句数、数据库耗时及各语句形状的执行次数(SqlStatsPlugin):
+- 语句数/耗时写入请求日志(sql_count/sql_time), 开启 response_headers 时同时返回响应头
+- 同一语句形状在单个请求内执行超过 repeat_threshold 次时记录警告, 通常为逐行查询关联对象(N+1)
+并发执行的查询(如列表分页与计数)耗时按各自执行时间累加
+"""
+
+from collections import Counter
+from collections.abc import Sequence
+
+from loguru import logger
+from starlette.types import Scope, Message
+from starlette_context import context
+from starlette.requests import Request, HTTPConnection
+from starlette.responses import Response
+from starlette.datastructures import MutableHeaders
+from starlette_context.plugins import Plugin
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from common.enums import ContextKeyEnum, ResponseHeaderKeyEnum
+from configs.config import local_configs
+from service.sql_explain import route_name
+from storages.relational.base.instrument import normalize_sql, on_sql_execute
+
+
+class SqlStats:
+    """单个请求内执行的语句"""
+
+    __slots__ = ("scope", "active", "count", "elapsed", "shapes")
+
+    def __init__(self, scope: Scope) -> None:
+        self.scope = scope
+        # 响应后关闭, 后台任务等不再计入
+        self.active = True
+        self.count = 0
+        # 秒
+        self.elapsed = 0.0
+        # 语句形状 -> 执行次数
+        self.shapes: Counter[str] = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+@on_sql_execute
+def _count_sql(client: BaseDBAsyncClient, query: str, values: Sequence | None, elapsed: float) -> None:
+    if not context.exists():
+        return
+    stats: SqlStats | None = context.get(ContextKeyEnum.sql_stats.value)
+    if stats is None or not stats.active:
+        return
+    stats.count += 1
+    stats.elapsed += elapsed
+    stats.shapes[normalize_sql(query)] += 1
+
+
+class SqlStatsPlugin(Plugin):
+    """需在 RequestProcessInfoPlugin 之前, 统计结果随请求日志输出"""
+
+    key = ContextKeyEnum.sql_stats.value
+
+    async def process_request(
+        self,
+        request: Request | HTTPConnection,
+    ) -> SqlStats:
+        return SqlStats(request.scope)
+
+    async def enrich_response(
+        self,
+        response: Response | Message,
+    ) -> None:
+        stats: SqlStats | None = context.get(self.key)
+        if stats is None or not stats.active:
+            return
+        stats.active = False
+        config = local_configs.server.sql_stats
+        sql_time = stats.elapsed * 1000  # ms
+
+        if config.response_headers:
+            if isinstance(response, Response):
+                response.headers[ResponseHeaderKeyEnum.sql_count.value] = str(stats.count)
+                response.headers[ResponseHeaderKeyEnum.sql_time.value] = str(sql_time)
+            elif response["type"] == "http.response.start":
+                headers = MutableHeaders(scope=response)
+                headers.append(ResponseHeaderKeyEnum.sql_count.value, str(stats.count))
+                headers.append(ResponseHeaderKeyEnum.sql_time.value, str(sql_time))
+
+        info_dict = context.get(ContextKeyEnum.process_time.value)
+        if isinstance(info_dict, dict):
+            info_dict["sql_count"] = stats.count
+            info_dict["sql_time"] = sql_time
+
+        repeated = stats.repeated(config.repeat_threshold)
+        if repeated:
+            route = route_name(stats.scope) or stats.scope.get("path")
+            for shape, count in repeated:
+                logger.warning(f"{route} 疑似 N+1 查询: 同一语句执行 {count} 次; {shape}")
@@ -3,11 +3,15 @@ from enum import Enum, unique
 
 @unique
 class UserCenterKey(str, Enum):
-    AccountApiPermissionSet = "UC:Account:Apis:{uuid}"
+    AccountApiPermissionSet = "UC:Account:Apis:{uuid}"  # 已废弃, 由 RolePermissionSet 取代, 仅用于清理
+    AccountPermissionRef = "UC:Account:PermRef:{uuid}"  # 账户 -> 角色权限集合 key, 超级管理员为 *
+    RolePermissionSet = "UC:Role:Apis:{role_id}:{scope}"  # scope: staff/member
     Token2AccountKey = "UC:Token:{token}"  # Authorization 拼接key， 存储的 acount_id:scene
-    Account2TokenKey = "UC:Account:{account_id}:{scene}"  # 存储的 token:account_id
+    Account2TokenKey = "UC:Account:{account_id}:{scene}"  # 会话索引 zset, member: token(签名 token 为 jti), score: 过期时间
     AccountBaseInfo = "UC:Account:BaseInfo:{uuid}"
+    RevokedTokenSet = "UC:Token:Revoked"  # 已吊销的签名 token zset, member: jti, score: 吊销时间(ms)
     CodeUniqueKey = "UC:Code:{scene}:{identifier}"
+    SessionIndexCompactorLock = "UC:Lock:SessionIndexCompactor"
 
 
 @unique
@@ -17,4 +21,10 @@ class RedisCacheKey(str, Enum):
     ForwardDelay: str = "ForwardDelay:{platform_id}:{hour}"  # 每小时转发延迟 hset
     ApiSecretKey: str = "ApiKey:SecretKey:{api_key}"  # ApiKey 密钥
     ApiKeyPermissionSet = "ApiKey:Apis:{api_key}"  # ApiKey接口权限
+    ApiKeyReplay = "ApiKey:Replay:{api_key}:{timestamp}:{sign}"  # 已使用的签名, 防重放
     WhiteListLocations = "WhiteList:{whitelist_id}"  # 白名单 里面是set 关联的location集合
+    NearCacheInvalidateChannel = "NearCache:Invalidate:{name}"  # 进程内近端缓存失效广播频道
+    ListCount = "ListCount:{table}"  # 列表总数缓存 hset, _v: 写入版本, 过滤条件摘要 -> 版本:过期时间:总数
+    QueryCacheVersion = "QueryCache:Version"  # 查询结果缓存版本 hset, 表名 -> 版本号
+    QueryCacheData = "QueryCache:Data:{digest}"  # 查询结果缓存, 响应 data 的 json
+    ExportTask = "ExportTask:{task_id}"  # 后台导出任务 hset, status/count/url/message
@@ -0,0 +1,159 @@
+"""进程内近端缓存
+
+每个 worker 在本地缓存热点数据 (LRU + TTL), 写入方通过 redis pub/sub 广播失效通知:
+    - 订阅未建立(脚本、lifespan 未执行、redis 断开)时缓存不生效, 直接回源 redis
+    - 订阅(重新)建立时清空本地缓存, 避免断开期间遗漏的失效通知
+"""
+
+import asyncio
+from typing import Any, Generic, TypeVar
+
+import orjson
+from loguru import logger
+from cachetools import TTLCache
+from redis.asyncio.client import Pipeline
+
+from configs.config import local_configs
+from storages.aredis.keys import RedisCacheKey
+from configs.defines import ConnectionNameEnum
+
+T = TypeVar("T")
+
+
+class NearCache(Generic[T]):
+    """进程内近端缓存, key 统一为 str"""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int | None = None,
+        ttl: float | None = None,
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
+    ) -> None:
+        self.name = name
+        self.conn_name = conn_name
+        self.channel = RedisCacheKey.NearCacheInvalidateChannel.format(name=name)  # type: ignore
+        self._cache: TTLCache = TTLCache(
+            maxsize=maxsize or local_configs.redis.near_cache.maxsize,
+            ttl=ttl or local_configs.redis.near_cache.ttl,
+        )
+        # 每次失效递增, 回源期间发生失效时放弃写入本地缓存
+        self.generation = 0
+        self.active = False
+        self.hits = 0
+        self.misses = 0
+        NearCacheSubscriber.register(self)
+
+    def get(self, key: str) -> T | None:
+        if not self.active:
+            return None
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: T, generation: int) -> None:
+        """generation 为回源前读取的 self.generation"""
+        if self.active and generation == self.generation:
+            self._cache[key] = value
+
+    def invalidate_local(self, *keys: str) -> None:
+        """keys 为空时清空"""
+        self.generation += 1
+        if not keys:
+            self._cache.clear()
+            return
+        for key in keys:
+            self._cache.pop(key, None)
+
+    def publish_invalidate(self, pipe: Pipeline, *keys: str) -> None:
+        """在 pipeline 中追加失效广播, 其他 worker 通过订阅收到"""
+        self.invalidate_local(*keys)
+        pipe.publish(self.channel, orjson.dumps(keys))
+
+    async def invalidate(self, *keys: str) -> None:
+        async with local_configs.redis.get_redis(self.conn_name) as r:
+            async with r.pipeline(transaction=False) as pipe:
+                self.publish_invalidate(pipe, *keys)
+                await pipe.execute()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class NearCacheSubscriber:
+    """每个 worker 每个 redis 连接一个订阅任务"""
+
+    _caches: dict[str, NearCache] = {}
+    _tasks: dict[ConnectionNameEnum, asyncio.Task] = {}
+
+    @classmethod
+    def register(cls, cache: NearCache) -> None:
+        if cache.channel in cls._caches:
+            raise ValueError(f"NearCache {cache.name} already registered")
+        cls._caches[cache.channel] = cache
+
+    @classmethod
+    def _set_active(cls, channels: list[str], active: bool) -> None:
+        for channel in channels:
+            cache = cls._caches[channel]
+            cache.invalidate_local()
+            cache.active = active
+
+    @classmethod
+    async def _listen(cls, conn_name: ConnectionNameEnum) -> None:
+        channels = [c for c, cache in cls._caches.items() if cache.conn_name == conn_name]
+        while True:
+            try:
+                async with local_configs.redis.get_redis(conn_name) as r:
+                    async with r.pubsub() as pubsub:
+                        await pubsub.subscribe(*channels)
+                        async for message in pubsub.listen():
+                            match message["type"]:
+                                case "subscribe":
+                                    cls._set_active([message["channel"]], True)
+                                case "message":
+                                    cache = cls._caches.get(message["channel"])
+                                    if cache:
+                                        cache.invalidate_local(*orjson.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # ruff: noqa: BLE001
+                logger.warning(f"NearCache订阅中断[{conn_name.value}]: {e}")
+            finally:
+                cls._set_active(channels, False)
+            await asyncio.sleep(1)
+
+    @classmethod
+    async def start(cls) -> None:
+        if not local_configs.redis.near_cache.enabled:
+            return
+        conn_names = {cache.conn_name for cache in cls._caches.values()}
+        for conn_name in conn_names:
+            task = cls._tasks.get(conn_name)
+            if task and not task.done():
+                continue
+            cls._tasks[conn_name] = asyncio.create_task(cls._listen(conn_name))
+
+    @classmethod
+    async def stop(cls) -> None:
+        for task in cls._tasks.values():
+            task.cancel()
+        for task in cls._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        cls._tasks.clear()
+
+    @classmethod
+    def stats(cls) -> list[dict[str, Any]]:
+        return [cache.stats() for cache in cls._caches.values()]
@@ -0,0 +1,133 @@
+"""Redis 连接池注册表
+
+连接池按 (连接名称, 进程PID) 维护:
+    - gunicorn fork 之后由各 worker 自行创建, 不复用父进程中创建的连接
+    - 在 lifespan 中预热、关闭
+    - 统计使用中/空闲连接数及获取连接的等待耗时, 用于监控
+"""
+
+import os
+import time
+import asyncio
+from typing import Any
+from collections.abc import Callable
+
+from loguru import logger
+from pydantic import BaseModel
+from redis.asyncio import BlockingConnectionPool
+from redis.exceptions import ConnectionError
+
+
+class RedisPoolStats(BaseModel):
+    """连接池统计信息"""
+
+    name: str
+    pid: int
+    max_connections: int
+    in_use: int
+    idle: int
+    wait_count: int
+    wait_timeout_count: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class StatsBlockingConnectionPool(BlockingConnectionPool):
+    """带等待耗时统计的阻塞连接池
+
+    连接耗尽时阻塞等待 `timeout` 秒, 超时抛出 ConnectionError
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # ruff: noqa: ANN401
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_timeout_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def get_connection(self, command_name: str, *keys: Any, **options: Any):  # type: ignore # ruff: noqa: ANN401
+        start = time.perf_counter()
+        try:
+            async with self._condition:
+                async with asyncio.timeout(self.timeout):
+                    await self._condition.wait_for(self.can_get_connection)
+                    connection = super().get_available_connection()
+        except TimeoutError as err:
+            self.wait_timeout_count += 1
+            raise ConnectionError("No connection available.") from err
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        try:
+            await self.ensure_connection(connection)
+            return connection
+        except BaseException:
+            await self.release(connection)
+            raise
+
+    async def prewarm(self, size: int) -> None:
+        """预先建立 size 个连接"""
+        connections = []
+        try:
+            for _ in range(min(size, self.max_connections)):
+                connections.append(await self.get_connection("PING"))
+        finally:
+            for connection in connections:
+                await self.release(connection)
+
+    def stats(self, name: str, pid: int) -> RedisPoolStats:
+        return RedisPoolStats(
+            name=name,
+            pid=pid,
+            max_connections=self.max_connections,
+            in_use=len(self._in_use_connections),
+            idle=len(self._available_connections),
+            wait_count=self.wait_count,
+            wait_timeout_count=self.wait_timeout_count,
+            wait_seconds_total=round(self.wait_seconds_total, 6),
+            wait_seconds_max=round(self.wait_seconds_max, 6),
+        )
+
+
+class RedisPoolRegistry:
+    """进程级连接池注册表, key: (连接名称, 进程PID)"""
+
+    _pools: dict[tuple[str, int], StatsBlockingConnectionPool] = {}
+
+    @classmethod
+    def get(
+        cls,
+        name: str,
+        factory: Callable[[], StatsBlockingConnectionPool],
+    ) -> StatsBlockingConnectionPool:
+        key = (name, os.getpid())
+        pool = cls._pools.get(key)
+        if pool is None:
+            pool = cls._pools[key] = factory()
+        return pool
+
+    @classmethod
+    async def prewarm(cls, name: str, factory: Callable[[], StatsBlockingConnectionPool], size: int) -> None:
+        if size <= 0:
+            return
+        try:
+            await cls.get(name, factory).prewarm(size)
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"Redis连接池[{name}]预热失败: {e}")
+
+    @classmethod
+    async def close(cls) -> None:
+        """关闭当前进程的连接池; fork 前父进程遗留的连接池只丢弃引用, 不操作其 socket"""
+        pid = os.getpid()
+        for key in list(cls._pools):
+            pool = cls._pools.pop(key)
+            if key[1] == pid:
+                await pool.disconnect()
+
+    @classmethod
+    def stats(cls) -> list[RedisPoolStats]:
+        pid = os.getpid()
+        return [pool.stats(name, _pid) for (name, _pid), pool in cls._pools.items() if _pid == pid]
@@ -0,0 +1,111 @@
+"""签名 token 吊销过滤器
+
+吊销记录保存在 redis 有序集合 UC:Token:Revoked(member: jti, score: 吊销时间ms):
+    - 各 worker 周期性按 score 增量同步到本地, 常规请求只查本地集合
+    - 超过 revocation_max_staleness 未同步成功时, 逐个回源 redis 校验
+    - 吊销记录只由会话吊销脚本(SessionIndex.revoke)写入, 吊销时间早于 token 最长有效期的记录已无意义, 写入时顺带清理
+"""
+
+import time
+import asyncio
+from typing import Any
+
+from loguru import logger
+
+from configs.config import local_configs
+from storages.aredis.keys import UserCenterKey
+from configs.defines import TokenModeEnum, ConnectionNameEnum
+
+# 增量同步时回看的毫秒数, 容忍各实例之间的时钟偏差
+SYNC_OVERLAP_MS = 2000
+
+
+class RevokedTokenFilter:
+    """每个 worker 一份本地吊销集合"""
+
+    conn_name = ConnectionNameEnum.user_center
+    key: str = UserCenterKey.RevokedTokenSet.value
+
+    _revoked: dict[str, float] = {}  # jti -> 吊销时间(ms)
+    _cursor: float | None = None  # 已同步的最大 score
+    _synced_at: float | None = None  # 最近一次同步成功的 monotonic 时间
+    _task: asyncio.Task | None = None
+
+    @staticmethod
+    def expired_before_ms() -> float:
+        return (time.time() - local_configs.server.token_expire_seconds) * 1000
+
+    @classmethod
+    def is_fresh(cls) -> bool:
+        return (
+            cls._synced_at is not None
+            and time.monotonic() - cls._synced_at <= local_configs.server.jwt.revocation_max_staleness
+        )
+
+    @classmethod
+    async def is_revoked(cls, jti: str) -> bool:
+        if jti in cls._revoked:
+            return True
+        if cls.is_fresh():
+            return False
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            return await r.zscore(cls.key, jti) is not None
+
+    @classmethod
+    def add_local(cls, revoked_at_ms: float, *jtis: str) -> None:
+        """已写入 redis 的吊销记录, 本 worker 立即生效"""
+        for jti in jtis:
+            cls._revoked[jti] = revoked_at_ms
+
+    @classmethod
+    async def sync(cls) -> None:
+        start = "-inf" if cls._cursor is None else cls._cursor - SYNC_OVERLAP_MS
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            items = await r.zrange(cls.key, start, "+inf", byscore=True, withscores=True)  # type: ignore
+        for jti, score in items:
+            cls._revoked[jti] = score
+            if cls._cursor is None or score > cls._cursor:
+                cls._cursor = score
+
+        expired_before = cls.expired_before_ms()
+        for jti in [jti for jti, score in cls._revoked.items() if score < expired_before]:
+            cls._revoked.pop(jti, None)
+        cls._synced_at = time.monotonic()
+
+    @classmethod
+    async def _loop(cls) -> None:
+        while True:
+            try:
+                await cls.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # ruff: noqa: BLE001
+                logger.warning(f"token吊销列表同步失败: {e}")
+            await asyncio.sleep(local_configs.server.jwt.revocation_sync_interval)
+
+    @classmethod
+    async def start(cls) -> None:
+        if local_configs.server.token_mode != TokenModeEnum.jwt:
+            return
+        if cls._task and not cls._task.done():
+            return
+        cls._task = asyncio.create_task(cls._loop())
+
+    @classmethod
+    async def stop(cls) -> None:
+        if not cls._task:
+            return
+        cls._task.cancel()
+        try:
+            await cls._task
+        except asyncio.CancelledError:
+            pass
+        cls._task = None
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        return {
+            "size": len(cls._revoked),
+            "fresh": cls.is_fresh(),
+            "cursor": cls._cursor,
+        }
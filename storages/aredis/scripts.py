@@ -0,0 +1,198 @@
+"""Redis Lua 脚本
+
+启动时通过 SCRIPT LOAD 注册, 调用时使用 EVALSHA; redis 重启等导致脚本丢失(NOSCRIPT)时自动重新加载
+"""
+
+import hashlib
+from typing import Any
+from collections.abc import Sequence
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError, ConnectionError
+
+from configs.config import local_configs
+from configs.defines import ConnectionNameEnum
+
+
+class LuaScript:
+    _registry: list["LuaScript"] = []
+
+    def __init__(self, name: str, source: str) -> None:
+        self.name = name
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()  # noqa: S324
+        self._registry.append(self)
+
+    async def __call__(
+        self,
+        client: Redis,
+        keys: Sequence[str] = (),
+        args: Sequence[Any] = (),
+    ) -> Any:  # ruff: noqa: ANN401
+        try:
+            return await client.evalsha(self.sha, len(keys), *keys, *args)  # type: ignore
+        except NoScriptError:
+            await client.script_load(self.source)
+            return await client.evalsha(self.sha, len(keys), *keys, *args)  # type: ignore
+
+    @classmethod
+    async def load_all(cls, conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center) -> None:
+        """启动时预加载; 失败不影响启动, 调用时遇到 NOSCRIPT 会再加载"""
+        try:
+            async with local_configs.redis.get_redis(conn_name) as r:
+                for script in cls._registry:
+                    await r.script_load(script.source)
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"Redis脚本预加载失败: {e}")
+
+
+class AuthenticateResultEnum:
+    """AuthenticateScript 返回的状态"""
+
+    token_invalid = 0
+    ok = 1
+    scene_mismatch = -1
+
+    # 权限校验结果
+    permission_unchecked = -1
+    permission_denied = 0
+    permission_granted = 1
+
+
+# KEYS[1]: token key
+# ARGV[1]: 请求头中的场景, 为空时不校验
+# ARGV[2]: 账户权限指针 key 前缀, 拼接 account_id; 指针指向角色权限集合 key, 超级管理员为 *
+# ARGV[3...]: 候选权限码, 任一命中即通过; 为空时不校验权限, 指针或角色权限集合不存在时返回未校验
+# return: {状态, account_id, scene, 权限校验结果}
+AuthenticateScript = LuaScript(
+    "authenticate",
+    """
+local identifier = redis.call('GET', KEYS[1])
+if not identifier then
+    return {0}
+end
+local sep = string.find(identifier, ':', 1, true)
+if not sep then
+    -- 旧格式或损坏的映射按 token 无效处理
+    return {0}
+end
+local account_id = string.sub(identifier, 1, sep - 1)
+local scene = string.sub(identifier, sep + 1)
+if ARGV[1] ~= '' and ARGV[1] ~= scene then
+    return {-1, account_id, scene, -1}
+end
+if #ARGV < 3 then
+    return {1, account_id, scene, -1}
+end
+local perm_ref = redis.call('GET', ARGV[2] .. account_id)
+if not perm_ref or (perm_ref ~= '*' and redis.call('EXISTS', perm_ref) == 0) then
+    return {1, account_id, scene, -1}
+end
+for i = 3, #ARGV do
+    if (perm_ref == '*' and ARGV[i] == '*') or (perm_ref ~= '*' and redis.call('SISMEMBER', perm_ref, ARGV[i]) == 1) then
+        return {1, account_id, scene, 1}
+    end
+end
+return {1, account_id, scene, 0}
+""",
+)
+
+
+# 会话索引 UC:Account:{account_id}:{scene}: zset, member: token(签名 token 为 jti), score: 过期时间(秒)
+# 旧版本为 set, 读写前原地转换: token 映射仍存在时取其剩余有效期, 不存在时
+# drop_missing=1(opaque) 直接丢弃, 否则(签名 token 无映射) 以索引 key 的剩余有效期为上限
+_SESSION_INDEX_CONVERT = """
+local function convert_session_index(index_key, token_prefix, now, drop_missing)
+    if redis.call('TYPE', index_key)['ok'] ~= 'set' then
+        return
+    end
+    local members = redis.call('SMEMBERS', index_key)
+    local index_ttl = redis.call('TTL', index_key)
+    redis.call('DEL', index_key)
+    for _, member in ipairs(members) do
+        local ttl = redis.call('TTL', token_prefix .. member)
+        if ttl < 0 and drop_missing == '0' and index_ttl > 0 then
+            ttl = index_ttl
+        end
+        if ttl > 0 then
+            redis.call('ZADD', index_key, now + ttl, member)
+        end
+    end
+    if index_ttl > 0 then
+        redis.call('EXPIRE', index_key, index_ttl)
+    end
+end
+"""
+
+# KEYS[1]: 会话索引 key, KEYS[2]: 新 token 的映射 key, KEYS[3]: 账户权限指针 key
+# ARGV[1]: token 映射 key 前缀, ARGV[2]: 当前时间(秒), ARGV[3]: drop_missing
+# ARGV[4]: 新 token, ARGV[5]: 有效期(秒)
+# ARGV[6]: token 映射的值, 为空时不写入(签名 token); ARGV[7]: 权限指针, 为空时不写入
+# return: 清理的过期会话数
+SessionLoginScript = LuaScript(
+    "session_login",
+    _SESSION_INDEX_CONVERT
+    + """
+local now = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[5])
+if ARGV[6] ~= '' then
+    redis.call('SET', KEYS[2], ARGV[6], 'EX', ttl)
+end
+if ARGV[7] ~= '' then
+    redis.call('SET', KEYS[3], ARGV[7])
+end
+convert_session_index(KEYS[1], ARGV[1], now, ARGV[3])
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[4])
+local removed = redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('EXPIRE', KEYS[1], ttl)
+return removed
+""",
+)
+
+# KEYS[1...]: 会话索引 key, 可跨多个场景
+# ARGV[1]: token 映射 key 前缀, ARGV[2]: 当前时间(秒), ARGV[3]: drop_missing
+# ARGV[4]: 吊销 zset key, 为空时不记录吊销(opaque token 删除映射即失效)
+# ARGV[5]: 吊销时间(ms), ARGV[6]: 吊销记录清理的截止时间(ms)
+# return: 吊销的未过期 token 列表
+SessionRevokeScript = LuaScript(
+    "session_revoke",
+    _SESSION_INDEX_CONVERT
+    + """
+local now = tonumber(ARGV[2])
+local revoked = {}
+for _, index_key in ipairs(KEYS) do
+    convert_session_index(index_key, ARGV[1], now, ARGV[3])
+    local members = redis.call('ZRANGEBYSCORE', index_key, '(' .. now, '+inf')
+    for _, member in ipairs(members) do
+        redis.call('DEL', ARGV[1] .. member)
+        if ARGV[4] ~= '' then
+            redis.call('ZADD', ARGV[4], ARGV[5], member)
+        end
+        revoked[#revoked + 1] = member
+    end
+    redis.call('DEL', index_key)
+end
+if ARGV[4] ~= '' and #revoked > 0 then
+    redis.call('ZREMRANGEBYSCORE', ARGV[4], '-inf', ARGV[6])
+end
+return revoked
+""",
+)
+
+# KEYS[1]: 会话索引 key
+# ARGV[1]: token 映射 key 前缀, ARGV[2]: 当前时间(秒), ARGV[3]: drop_missing
+# return: 压缩后剩余的会话数
+SessionCompactScript = LuaScript(
+    "session_compact",
+    _SESSION_INDEX_CONVERT
+    + """
+local now = tonumber(ARGV[2])
+convert_session_index(KEYS[1], ARGV[1], now, ARGV[3])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+return redis.call('ZCARD', KEYS[1])
+""",
+)
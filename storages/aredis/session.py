@@ -0,0 +1,136 @@
+"""登录会话索引
+
+UC:Account:{account_id}:{scene} 为 zset(member: token, 签名 token 为 jti; score: 过期时间):
+    - 登录时与 token 映射、账户权限指针一起写入, 并清理已过期的会话
+    - 吊销(可跨全部场景)在一个脚本中完成
+    - 后台压缩任务清理长期未登录账户的索引, 并将旧版 set 格式的索引转换为 zset
+"""
+
+import time
+import asyncio
+
+from loguru import logger
+from redis.asyncio import Redis
+
+from storages import enums
+from configs.config import local_configs
+from storages.aredis.keys import UserCenterKey
+from configs.defines import TokenModeEnum, ConnectionNameEnum
+from storages.aredis.scripts import SessionLoginScript, SessionRevokeScript, SessionCompactScript
+from storages.aredis.revocation import RevokedTokenFilter
+
+
+class SessionIndex:
+    conn_name = ConnectionNameEnum.user_center
+
+    _compactor: asyncio.Task | None = None
+
+    @staticmethod
+    def _key(account_id: int | str, scene: enums.TokenSceneTypeEnum) -> str:
+        return UserCenterKey.Account2TokenKey.format(account_id=str(account_id), scene=scene.value)  # type: ignore
+
+    @staticmethod
+    def _common_args() -> list[str | int]:
+        # opaque token 映射不存在即已过期; 签名 token 没有映射
+        drop_missing = "0" if local_configs.server.token_mode == TokenModeEnum.jwt else "1"
+        return [UserCenterKey.Token2AccountKey.format(token=""), int(time.time()), drop_missing]  # type: ignore
+
+    @classmethod
+    async def record(
+        cls,
+        r: Redis,
+        account_id: int | str,
+        scene: enums.TokenSceneTypeEnum,
+        token: str,
+        token_value: str = "",
+        perm_ref: str = "",
+    ) -> None:
+        """token_value: opaque token -> 账户映射的值; perm_ref: 账户权限指针; 为空时不写入, 与会话索引一次写入"""
+        await SessionLoginScript(
+            r,
+            keys=[
+                cls._key(account_id, scene),
+                UserCenterKey.Token2AccountKey.format(token=token),  # type: ignore
+                UserCenterKey.AccountPermissionRef.format(uuid=str(account_id)),  # type: ignore
+            ],
+            args=[*cls._common_args(), token, local_configs.server.token_expire_seconds, token_value, perm_ref],
+        )
+
+    @classmethod
+    async def revoke(
+        cls,
+        account_id: int | str,
+        scene: enums.TokenSceneTypeEnum | None = None,
+    ) -> list[str]:
+        """吊销账户的全部会话, scene 为空时吊销所有场景; 返回吊销的 token"""
+        scenes = [scene] if scene else list(enums.TokenSceneTypeEnum)
+        signed = local_configs.server.token_mode == TokenModeEnum.jwt
+        now_ms = time.time() * 1000
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            revoked = await SessionRevokeScript(
+                r,
+                keys=[cls._key(account_id, s) for s in scenes],
+                args=[
+                    *cls._common_args(),
+                    RevokedTokenFilter.key if signed else "",
+                    now_ms,
+                    RevokedTokenFilter.expired_before_ms(),
+                ],
+            )
+        if signed:
+            RevokedTokenFilter.add_local(now_ms, *revoked)
+        return revoked
+
+    @classmethod
+    async def compact(cls) -> tuple[int, int]:
+        """清理全部会话索引, 返回 (扫描的索引数, 清空的索引数)"""
+        scenes = {s.value for s in enums.TokenSceneTypeEnum}
+        pattern = UserCenterKey.Account2TokenKey.format(account_id="*", scene="*")  # type: ignore
+        scanned = emptied = 0
+        async with local_configs.redis.get_redis(cls.conn_name) as r:
+            async for key in r.scan_iter(match=pattern, count=500):
+                # 排除 UC:Account:Apis:{id} 等同前缀的 key
+                _, _, account_id, *scene = key.split(":")
+                if not account_id.isdigit() or ":".join(scene) not in scenes:
+                    continue
+                scanned += 1
+                # 全部过期时 zset 被 redis 自动删除
+                if await SessionCompactScript(r, keys=[key], args=cls._common_args()) == 0:
+                    emptied += 1
+        return scanned, emptied
+
+    @classmethod
+    async def _compact_loop(cls) -> None:
+        interval = local_configs.server.session_compact_interval
+        while True:
+            try:
+                # 多个 worker 之间每个周期只执行一次
+                async with local_configs.redis.get_redis(cls.conn_name) as r:
+                    acquired = await r.set(UserCenterKey.SessionIndexCompactorLock.value, 1, nx=True, ex=interval)
+                if acquired:
+                    scanned, emptied = await cls.compact()
+                    logger.info(f"会话索引压缩完成: 扫描 {scanned}, 清空 {emptied}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # ruff: noqa: BLE001
+                logger.warning(f"会话索引压缩失败: {e}")
+            await asyncio.sleep(interval)
+
+    @classmethod
+    async def start_compactor(cls) -> None:
+        if local_configs.server.session_compact_interval <= 0:
+            return
+        if cls._compactor and not cls._compactor.done():
+            return
+        cls._compactor = asyncio.create_task(cls._compact_loop())
+
+    @classmethod
+    async def stop_compactor(cls) -> None:
+        if not cls._compactor:
+            return
+        cls._compactor.cancel()
+        try:
+            await cls._compactor
+        except asyncio.CancelledError:
+            pass
+        cls._compactor = None
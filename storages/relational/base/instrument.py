@@ -0,0 +1,63 @@
+"""数据库执行埋点
+
+包装 tortoise 客户端的 execute_query/execute_insert/execute_many, 每条语句执行后(含失败)回调已注册的监听器,
+供请求级 SQL 采样、统计使用; 由 common.monkey_patch.patch 对 mysql 客户端启用
+监听器在执行路径上同步调用, 需足够轻量且不抛出异常
+"""
+
+import re
+import time
+from typing import Any
+from functools import wraps
+from collections.abc import Callable, Sequence
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+# (客户端, sql, 参数, 耗时秒)
+SqlListener = Callable[[BaseDBAsyncClient, str, Sequence | None, float], None]
+
+_listeners: list[SqlListener] = []
+
+_EXECUTE_METHODS = ("execute_query", "execute_insert", "execute_many")
+
+# 字符串/数字字面量及占位符
+_literal_re = re.compile(r"'(?:[^'\\]|\\.|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+# 长度不定的 IN 列表
+_in_list_re = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+
+
+def on_sql_execute(listener: SqlListener) -> SqlListener:
+    _listeners.append(listener)
+    return listener
+
+
+def normalize_sql(query: str) -> str:
+    """语句形状: 字面量替换为 ?, IN 列表折叠为 (...), 空白合并"""
+    shape = _in_list_re.sub("IN (...)", _literal_re.sub("?", query))
+    return " ".join(shape.split())
+
+
+def _instrument(func: Callable) -> Callable:
+    @wraps(func)
+    async def wrapper(self: BaseDBAsyncClient, query: str, *args: Any) -> Any:  # ruff: noqa: ANN401
+        start = time.perf_counter()
+        try:
+            return await func(self, query, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            values = args[0] if args else None
+            for listener in _listeners:
+                listener(self, query, values, elapsed)
+
+    wrapper.__instrumented__ = True  # type: ignore
+    return wrapper
+
+
+def instrument_client(*client_classes: type[BaseDBAsyncClient]) -> None:
+    """只包装类自身定义的方法, 子类覆盖的方法需单独传入子类"""
+    for client_class in client_classes:
+        for name in _EXECUTE_METHODS:
+            func = client_class.__dict__.get(name)
+            if func is None or getattr(func, "__instrumented__", False):
+                continue
+            setattr(client_class, name, _instrument(func))
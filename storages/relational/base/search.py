@@ -0,0 +1,68 @@
+"""列表搜索后端
+
+模型通过 Meta.search_backend 指定, 未指定时使用 LikeSearchBackend; 通用 CRUD 的 get_all_obj 在传入 search 时自动选择
+"""
+
+from collections.abc import Sequence
+
+from tortoise.models import Model
+from tortoise.queryset import QuerySet
+from pypika_tortoise.terms import Field, ValueWrapper
+from tortoise.expressions import Q
+from tortoise.contrib.mysql.search import Mode, SearchCriterion
+
+
+class SearchBackend:
+    def apply(self, queryset: QuerySet, fields: Sequence[str], keyword: str) -> QuerySet:
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """各字段 LIKE '%keyword%' 取或, 无法使用索引"""
+
+    def apply(self, queryset: QuerySet, fields: Sequence[str], keyword: str) -> QuerySet:
+        return queryset.filter(
+            Q(*[Q(**{f"{field}__icontains": keyword}) for field in fields], join_type=Q.OR),
+        )
+
+
+class FullTextSearchBackend(SearchBackend):
+    """mysql FULLTEXT 索引(ngram 分词) 短语匹配
+
+    columns 需与 FULLTEXT 索引的列一致, 接口的搜索字段与之不一致、非 mysql 或关键字短于 ngram_token_size 时退化为 LIKE;
+    ngram 分词仍受 InnoDB 停用词表影响, 需要时关闭 innodb_ft_enable_stopword
+    """
+
+    # 布尔模式下短语内无法转义的字符
+    _strip_chars = str.maketrans("", "", '"')
+
+    def __init__(self, columns: Sequence[str], ngram_token_size: int = 2) -> None:
+        self.columns = tuple(columns)
+        self.ngram_token_size = ngram_token_size
+        self.fallback = LikeSearchBackend()
+
+    def apply(self, queryset: QuerySet, fields: Sequence[str], keyword: str) -> QuerySet:
+        db_model = queryset.model
+        phrase = keyword.translate(self._strip_chars).strip()
+        if (
+            set(fields) != set(self.columns)
+            or len(phrase) < self.ngram_token_size
+            or db_model._meta.db.capabilities.dialect != "mysql"
+        ):
+            return self.fallback.apply(queryset, fields, keyword)
+
+        table = db_model._meta.basetable
+        return queryset.annotate(
+            _search_score=SearchCriterion(
+                *[Field(column, table=table) for column in self.columns],
+                expr=ValueWrapper(f'"{phrase}"'),
+                mode=Mode.BOOL_MODE,
+            ),
+        ).filter(_search_score__gt=0)
+
+
+_default_backend = LikeSearchBackend()
+
+
+def get_search_backend(model: type[Model]) -> SearchBackend:
+    return getattr(getattr(model, "Meta", None), "search_backend", None) or _default_backend
@@ -0,0 +1,81 @@
+"""模型写入回调
+
+通用 CRUD 层(service.crud)通过 queryset.update()/批量删除写库时不会触发 tortoise signals,
+写入完成后统一调用 notify_model_write, 供缓存做 write-through 或失效;
+在 write_transaction 内的写入, 回调推迟到最外层事务提交后执行
+"""
+
+from typing import Any
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Awaitable, AsyncIterator
+
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+# (db_model, 写入后的对象列表, 删除的主键列表)
+ModelWriteHook = Callable[[type[Model], list[Model], list[Any]], Awaitable[None]]
+
+_hooks: dict[type[Model], list[ModelWriteHook]] = defaultdict(list)
+# 事务内待执行的回调参数, None 表示不在 write_transaction 内
+_pending: ContextVar[list[tuple[type[Model], list[Model], list[Any]]] | None] = ContextVar(
+    "pending_model_writes",
+    default=None,
+)
+
+
+def on_model_write(*models: type[Model]) -> Callable[[ModelWriteHook], ModelWriteHook]:
+    """注册写入回调, 注册到 Model 时对全部模型生效"""
+
+    def deco(hook: ModelWriteHook) -> ModelWriteHook:
+        for model in models:
+            _hooks[model].append(hook)
+        return hook
+
+    return deco
+
+
+async def notify_model_write(
+    db_model: type[Model],
+    saved: Iterable[Model] = (),
+    deleted_pks: Iterable[Any] = (),
+) -> None:
+    saved, deleted_pks = list(saved), list(deleted_pks)
+    pending = _pending.get()
+    if pending is not None:
+        pending.append((db_model, saved, deleted_pks))
+        return
+    await _run_hooks(db_model, saved, deleted_pks)
+
+
+async def _run_hooks(db_model: type[Model], saved: list[Model], deleted_pks: list[Any]) -> None:
+    for model, hooks in list(_hooks.items()):
+        if not issubclass(db_model, model):
+            continue
+        for hook in hooks:
+            await hook(db_model, saved, deleted_pks)
+
+
+@asynccontextmanager
+async def write_transaction(connection_name: str | None = None) -> AsyncIterator[BaseDBAsyncClient]:
+    """包裹多个 service.crud 写入的事务, 提交后才执行写入回调, 回滚时丢弃
+
+    直接使用 in_transaction 包裹时回调在提交前执行, 缓存可能被并发请求以旧数据回填
+    """
+    if _pending.get() is not None:
+        # 嵌套时由最外层提交后统一执行
+        async with in_transaction(connection_name) as conn:
+            yield conn
+        return
+
+    pending: list[tuple[type[Model], list[Model], list[Any]]] = []
+    token = _pending.set(pending)
+    try:
+        async with in_transaction(connection_name) as conn:
+            yield conn
+    finally:
+        _pending.reset(token)
+    for db_model, saved, deleted_pks in pending:
+        await _run_hooks(db_model, saved, deleted_pks)
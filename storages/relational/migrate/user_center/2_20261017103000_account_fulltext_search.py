@@ -0,0 +1,11 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `account` ADD FULLTEXT INDEX `ft_account_search` (`username`, `phone`, `email`) WITH PARSER ngram;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `account` DROP INDEX `ft_account_search`;"""
@@ -1,6 +1,8 @@
 from typing import Self
+from collections.abc import Sequence
 
 from tortoise import fields, models
+from tortoise.contrib.mysql.indexes import FullTextIndex
 
 from storages import enums
 from common.regex import EMAIL_REGEX, PHONE_REGEX_CN, ACCOUNT_USERNAME_REGEX
@@ -9,6 +11,9 @@ from storages.oss import OssProxy
 from configs.config import local_configs
 from configs.defines import ConnectionNameEnum
 from storages.aredis.keys import UserCenterKey
+from storages.aredis.near_cache import NearCache
+from storages.relational.base.search import FullTextSearchBackend
+from storages.relational.base.write_hooks import on_model_write
 from storages.relational.base.fields import FileField
 from storages.relational.base.models import (
     BaseModel,
@@ -20,6 +25,17 @@ from storages.relational.base.validators import RegexValidator, MinLengthValidat
 
 UserCenterConnection = ConnectionNameEnum.user_center.value
 
+# 角色接口权限集合的进程内缓存, key: 角色权限集合 redis key
+role_permission_near_cache: NearCache[frozenset[str]] = NearCache("RoleApis")
+
+# 超级管理员不经过角色, 权限指针固定为 *
+SUPER_ADMIN_PERMISSION_REF = "*"
+# redis 无法保存空集合, 无权限的角色写入占位成员
+EMPTY_PERMISSION_PLACEHOLDER = "-"
+
+# 账户列表搜索字段, 与 ft_account_search 索引列一致
+ACCOUNT_SEARCH_FIELDS = ("username", "phone", "email")
+
 
 class Account(BaseModel):
     """用户
@@ -107,36 +123,33 @@ class Account(BaseModel):
             return None
         return (datetime_now() - self.last_login_at).days
 
+    def permission_ref(self) -> str:
+        """账户解析到的角色权限集合 key, 超级管理员为 *"""
+        if self.is_super_admin:
+            return SUPER_ADMIN_PERMISSION_REF
+        return Role.permission_set_key(self.role_id, self.is_staff)  # type: ignore
+
     async def has_permission(
         self,
-        apis: list[str],
+        apis: Sequence[str],
         conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
     ) -> bool:
         # OR
-        async with local_configs.redis.get_redis(service=conn_name) as _redis:
-            result = await _redis.smismember(
-                name=UserCenterKey.AccountApiPermissionSet.format(uuid=str(self.id)),  # type: ignore
-                values=apis,
-            )
-        if 1 in result:
-            return True
-        return False
+        if self.is_super_admin:
+            perms = frozenset([SUPER_ADMIN_PERMISSION_REF])
+        else:
+            perms = await Role.get_cached_permission_codes(self.role_id, self.is_staff, conn_name)  # type: ignore
+        return any(api in perms for api in apis)
 
     async def update_cache_permissions(
         self,
         conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
     ) -> None:
-        perms = await self.get_permission_codes()
+        """刷新账户 -> 角色权限集合指针, 角色权限集合不存在时重建"""
         async with local_configs.redis.get_redis(conn_name) as r:
-            async with r.pipeline() as pipe:
-                pipe.delete(UserCenterKey.AccountApiPermissionSet.format(uuid=str(self.id)))
-                if perms:
-                    # 刷新接口权限
-                    pipe.sadd(
-                        UserCenterKey.AccountApiPermissionSet.format(uuid=str(self.id)),  # type: ignore
-                        *perms,  # type: ignore
-                    )
-                await pipe.execute()
+            await r.set(UserCenterKey.AccountPermissionRef.format(uuid=str(self.id)), self.permission_ref())  # type: ignore
+        if not self.is_super_admin:
+            await Role.get_cached_permission_codes(self.role_id, self.is_staff, conn_name)  # type: ignore
 
     async def get_permission_codes(self) -> list[str]:
         """获取用户的全部permission codes
@@ -197,7 +210,10 @@ class Account(BaseModel):
             ("phone", "deleted_at"),
             ("email", "deleted_at"),
         )
+        indexes = (FullTextIndex(fields=ACCOUNT_SEARCH_FIELDS, name="ft_account_search", parser_name="ngram"),)
         manager = NotDeletedManager()
+        # 列表搜索走 FULLTEXT 索引
+        search_backend = FullTextSearchBackend(ACCOUNT_SEARCH_FIELDS)
         unique_error_messages = {
             "account.uid_account_username_4f1849": "用户名已存在",
             "account.uid_account_phone_9b9e7e": "手机号已存在",
@@ -213,10 +229,93 @@ class Role(BaseModel):
     accounts: fields.ReverseRelation[Account]
     resources: fields.ManyToManyRelation["Resource"]
 
+    @staticmethod
+    def permission_set_key(role_id: int, is_staff: bool) -> str:
+        """后台管理员可使用全部可用资源, 普通用户仅可使用可分配资源"""
+        return UserCenterKey.RolePermissionSet.format(  # type: ignore
+            role_id=role_id,
+            scope="staff" if is_staff else "member",
+        )
+
+    @classmethod
+    async def load_permission_codes(cls, role_ids: Sequence[int]) -> dict[str, frozenset[str]]:
+        """一次关联查询获取角色的权限码, key 为角色权限集合 key"""
+        result: dict[str, set[str]] = {}
+        for role_id in role_ids:
+            result[cls.permission_set_key(role_id, True)] = set()
+            result[cls.permission_set_key(role_id, False)] = set()
+        rows = await Permission.filter(
+            resources__roles__id__in=role_ids,
+            resources__enabled=True,
+        ).values_list("resources__roles__id", "resources__assignable", "code")
+        for role_id, assignable, code in rows:
+            result[cls.permission_set_key(role_id, True)].add(code)
+            if assignable:
+                result[cls.permission_set_key(role_id, False)].add(code)
+        return {k: frozenset(v) for k, v in result.items()}
+
+    @classmethod
+    async def rebuild_permission_cache(
+        cls,
+        role_ids: Sequence[int],
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
+    ) -> dict[str, frozenset[str]]:
+        """重建角色权限集合: 一次查询 + 一次 pipeline, 并广播失效各 worker 本地缓存"""
+        if not role_ids:
+            return {}
+        perms_map = await cls.load_permission_codes(role_ids)
+        async with local_configs.redis.get_redis(conn_name) as r:
+            async with r.pipeline() as pipe:
+                for key, perms in perms_map.items():
+                    pipe.delete(key)
+                    pipe.sadd(key, *(perms or [EMPTY_PERMISSION_PLACEHOLDER]))
+                role_permission_near_cache.publish_invalidate(pipe, *perms_map)
+                await pipe.execute()
+        return perms_map
+
+    @classmethod
+    async def delete_permission_cache(
+        cls,
+        role_ids: Sequence[int],
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
+    ) -> None:
+        keys = [cls.permission_set_key(role_id, is_staff) for role_id in role_ids for is_staff in (True, False)]
+        if not keys:
+            return
+        async with local_configs.redis.get_redis(conn_name) as r:
+            async with r.pipeline() as pipe:
+                pipe.delete(*keys)
+                role_permission_near_cache.publish_invalidate(pipe, *keys)
+                await pipe.execute()
+
+    @classmethod
+    async def get_cached_permission_codes(
+        cls,
+        role_id: int,
+        is_staff: bool,
+        conn_name: ConnectionNameEnum = ConnectionNameEnum.user_center,
+    ) -> frozenset[str]:
+        key = cls.permission_set_key(role_id, is_staff)
+        perms = role_permission_near_cache.get(key)
+        if perms is not None:
+            return perms
+
+        generation = role_permission_near_cache.generation
+        async with local_configs.redis.get_redis(conn_name) as r:
+            members = await r.smembers(key)  # type: ignore
+        if members:
+            perms = frozenset(members) - {EMPTY_PERMISSION_PLACEHOLDER}
+        else:
+            perms = (await cls.rebuild_permission_cache([role_id], conn_name))[key]
+        role_permission_near_cache.set(key, perms, generation)
+        return perms
+
     class Meta:
         table_description = "角色"
         ordering = ["-id"]
         app = UserCenterConnection
+        # 查询结果缓存时间(秒), 见 service.query_cache
+        query_cache_ttl = 600
         unique_together = (("label", "deleted_at"),)
 
 
@@ -237,6 +336,8 @@ class Permission(models.Model):
         table_description = "权限"
         ordering = ["-code"]
         app = UserCenterConnection
+        # 查询结果缓存时间(秒), 见 service.query_cache
+        query_cache_ttl = 600
 
 
 class Resource(BigIntegerIDPrimaryKeyModel, CreateOnlyModel):
@@ -306,6 +407,8 @@ class Resource(BigIntegerIDPrimaryKeyModel, CreateOnlyModel):
         ordering = ["order_num"]
         unique_together = (("code", "parent", "scene"),)
         app = UserCenterConnection
+        # 查询结果缓存时间(秒), 见 service.query_cache
+        query_cache_ttl = 600
 
 
 class Config(models.Model):
@@ -317,6 +420,8 @@ class Config(models.Model):
         table_description = "系统配置"
         ordering = ["-id"]
         app = UserCenterConnection
+        # 查询结果缓存时间(秒), 见 service.query_cache
+        query_cache_ttl = 600
 
 
 # class OSSFile(models.Model):
@@ -399,3 +504,28 @@ class Config(models.Model):
 #         table_description = "操作记录"
 #         ordering = ["-id"]
 #         app = _app
+
+
+@on_model_write(Role)
+async def _role_write(db_model: type[models.Model], saved: list[models.Model], deleted_pks: list) -> None:
+    await Role.rebuild_permission_cache([obj.pk for obj in saved])
+    await Role.delete_permission_cache(deleted_pks)
+
+
+@on_model_write(Resource, Permission)
+async def _role_resource_write(db_model: type[models.Model], saved: list[models.Model], deleted_pks: list) -> None:
+    if deleted_pks:
+        # 删除后关联已不存在, 无法查出受影响的角色, 重建全部角色
+        role_ids = await Role.filter(deleted_at=0).values_list("id", flat=True)
+    elif saved:
+        # 一次关联查询得到受影响的角色; 批量创建(无主键回填)的资源尚无关联角色
+        # 注意: 从资源一侧移除角色关联时被移除的角色查不到, 角色授权应通过更新角色完成
+        lookup = "resources__id__in" if db_model is Resource else f"resources__permissions__{db_model._meta.pk_attr}__in"
+        role_ids = await Role.filter(deleted_at=0, **{lookup: [obj.pk for obj in saved]}).distinct().values_list(
+            "id",
+            flat=True,
+        )
+    else:
+        return
+    if role_ids:
+        await Role.rebuild_permission_cache(role_ids)  # type: ignore
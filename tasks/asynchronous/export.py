@@ -0,0 +1,95 @@
+"""后台导出
+
+导出内容逐批写入本地临时文件后上传 OSS, 任务状态记录在 user_center redis(RedisCacheKey.ExportTask), 供创建人轮询下载地址;
+任务在当前进程的事件循环中执行, 进程退出时未完成的任务丢失, 状态停留在 running 直至过期
+"""
+
+import uuid
+import asyncio
+import tempfile
+
+from loguru import logger
+from pydantic import BaseModel
+from tortoise.queryset import QuerySet
+
+from common.enums import ExportFormatEnum, ExportStatusEnum
+from common.utils import datetime_now
+from configs.config import local_configs
+from storages.oss import OssProxy
+from service.export import export_stream, get_export_writer
+from storages.aredis.keys import RedisCacheKey
+from configs.defines import ConnectionNameEnum
+from storages.oss.provider.file import OssBase
+
+# 任务状态保留时间
+EXPORT_TASK_TTL = 24 * 60 * 60
+# 任务状态统一存放的 redis 连接, 与导出的模型所在库无关
+EXPORT_TASK_CONN = ConnectionNameEnum.user_center
+
+# 持有运行中任务的引用, 避免被回收
+_running_tasks: set[asyncio.Task] = set()
+
+
+async def set_export_task(task_id: str, **mapping: str | int) -> None:
+    key = RedisCacheKey.ExportTask.format(task_id=task_id)  # type: ignore
+    async with local_configs.redis.get_redis(EXPORT_TASK_CONN) as r:
+        async with r.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=mapping)  # type: ignore
+            pipe.expire(key, EXPORT_TASK_TTL)
+            await pipe.execute()
+
+
+async def get_export_task(task_id: str) -> dict | None:
+    async with local_configs.redis.get_redis(EXPORT_TASK_CONN) as r:
+        return await r.hgetall(RedisCacheKey.ExportTask.format(task_id=task_id)) or None  # type: ignore
+
+
+async def export_to_oss(
+    task_id: str,
+    queryset: QuerySet,
+    schema: type[BaseModel],
+    order_by: list[str],
+    fmt: ExportFormatEnum,
+    filename: str,
+) -> None:
+    await set_export_task(task_id, status=ExportStatusEnum.running.value)
+    writer = get_export_writer(schema, fmt)
+    try:
+        with tempfile.NamedTemporaryFile(suffix=f".{writer.suffix}") as fp:
+            async for data in export_stream(queryset, schema, order_by, writer):
+                await asyncio.to_thread(fp.write, data)
+            await asyncio.to_thread(fp.flush)
+
+            oss = OssProxy.client()
+            filepath = (
+                f"export/{datetime_now().strftime('%Y%m%d')}/"
+                f"{OssBase.get_random_filename(f'{filename}.{writer.suffix}')}"
+            )
+            success, message = await asyncio.to_thread(oss.create_file_from_local, filepath, fp.name)
+            if not success:
+                raise RuntimeError(message)
+        success, url = await asyncio.to_thread(oss.get_download_url, filepath, local_configs.oss.expire_time)
+        if not success:
+            raise RuntimeError(url)
+    except Exception as e:
+        logger.exception(f"导出任务 {task_id} 失败")
+        await set_export_task(task_id, status=ExportStatusEnum.failed.value, message=str(e))
+        return
+    await set_export_task(task_id, status=ExportStatusEnum.success.value, count=writer.count, url=url)
+
+
+async def start_export_task(
+    queryset: QuerySet,
+    schema: type[BaseModel],
+    order_by: list[str],
+    fmt: ExportFormatEnum,
+    filename: str,
+    owner_id: int,
+) -> str:
+    """创建后台导出任务, 返回任务ID; owner_id 为创建人账户ID, 仅创建人可查询结果"""
+    task_id = uuid.uuid4().hex
+    await set_export_task(task_id, status=ExportStatusEnum.pending.value, owner_id=owner_id)
+    task = asyncio.create_task(export_to_oss(task_id, queryset, schema, order_by, fmt, filename))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return task_id
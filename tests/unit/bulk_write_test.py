@@ -0,0 +1,71 @@
+import pytest
+from tortoise.exceptions import IntegrityError
+
+from service.crud import bulk_create_objs, bulk_update_objs, _integrity_error_message
+from service.exceptions import ApiException
+from storages.relational.models.user_center import Role, Account
+
+
+def duplicate_error(entry: str, key: str) -> IntegrityError:
+    """mysql 驱动的唯一约束冲突"""
+    return IntegrityError(Exception(1062, f"Duplicate entry '{entry}' for key '{key}'"))
+
+
+@pytest.mark.anyio
+class TestIntegrityErrorMessage:
+    async def test_duplicate_rows(self):
+        accounts = [Account(username=name, deleted_at=0) for name in ("dupa", "dupb", "dupb")]
+        message, indexes = _integrity_error_message(
+            Account,
+            duplicate_error("dupb-0", "account.uid_account_username_4f1849"),
+            accounts,
+        )
+        assert message == "用户名已存在"
+        assert indexes == [1, 2]
+
+        # 未配置提示的索引按表描述提示; 无法解析的索引不定位行
+        message, indexes = _integrity_error_message(Role, duplicate_error("x", "role.unknown_index"), accounts)
+        assert (message, indexes) == (f"{Role._meta.table_description}已存在", [])
+
+    async def test_other_errors(self):
+        assert _integrity_error_message(Role, IntegrityError(Exception(1452, "foreign key fails"))) == (
+            "foreign key fails",
+            [],
+        )
+        assert _integrity_error_message(Role, IntegrityError(Exception("UNIQUE constraint failed"))) == (
+            "UNIQUE constraint failed",
+            [],
+        )
+
+
+@pytest.mark.anyio
+class TestChunkedBulk:
+    async def test_create_update(self):
+        rows = [{"label": f"bulk-{i}", "unknown": i} for i in range(5)]
+        assert await bulk_create_objs(Role, rows, chunk_size=2) == 5
+        roles = await Role.filter(label__startswith="bulk-").order_by("id")
+        assert [r.label for r in roles] == [f"bulk-{i}" for i in range(5)]
+
+        rows = [{"id": r.id, "remark": f"remark-{i}"} for i, r in enumerate(roles)]
+        assert await bulk_update_objs(Role.all(), rows, chunk_size=2) == 5
+        assert await Role.filter(label__startswith="bulk-").order_by("id").values_list("remark", flat=True) == [
+            f"remark-{i}" for i in range(5)
+        ]
+
+    async def test_partial_failure(self):
+        rows = [{"label": f"bulk-fail-{i}"} for i in range(3)] + [{"label": "bulk-fail-1"}]
+        with pytest.raises(ApiException) as exc:
+            await bulk_create_objs(Role, rows, chunk_size=2)
+        # 第二批失败, 第一批已提交
+        assert exc.value.message.endswith("前2行已保存")
+        assert await Role.filter(label__startswith="bulk-fail-").count() == 2
+
+        role = await Role.get(label="bulk-fail-0")
+        rows = [{"id": role.id, "remark": "ok"}, {"remark": "x"}, {"id": -1, "remark": "x"}]
+        with pytest.raises(ApiException) as exc:
+            await bulk_update_objs(Role.all(), rows, chunk_size=1)
+        assert exc.value.message == "第2行: 缺少主键. 前1行已保存"
+        with pytest.raises(ApiException) as exc:
+            await bulk_update_objs(Role.all(), rows[2:], chunk_size=1)
+        assert exc.value.message == f"第1行: {Role._meta.table_description}不存在"
+        assert (await Role.get(id=role.id)).remark == "ok"
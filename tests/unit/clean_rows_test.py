@@ -0,0 +1,77 @@
+import pytest
+from tortoise.models import Model
+
+from service.crud import _clean_rows, kwargs_clean, _row_errors_message
+from common.enums import TokenSceneTypeEnum
+from service.exceptions import ApiException
+from storages.enums import SystemResourceTypeEnum, SystemResourceSubTypeEnum
+from storages.relational.models.user_center import Resource, Permission
+
+
+def resource_row(code: str, **kwargs: object) -> dict:
+    return {
+        "code": code,
+        "label": code,
+        "resource_type": SystemResourceTypeEnum.menu,
+        "sub_resource_type": SystemResourceSubTypeEnum.add_tab,
+        "scene": TokenSceneTypeEnum.general,
+        **kwargs,
+    }
+
+
+@pytest.fixture
+def queried(monkeypatch: pytest.MonkeyPatch) -> list[type[Model]]:
+    """记录关联校验查询的模型"""
+    calls: list[type[Model]] = []
+    for model in (Resource, Permission):
+        original = model.filter
+
+        def filter_(*args, __model=model, __original=original, **kwargs):  # type: ignore
+            calls.append(__model)
+            return __original(*args, **kwargs)
+
+        monkeypatch.setattr(model, "filter", filter_)
+    return calls
+
+
+@pytest.mark.anyio
+class TestCleanRows:
+    async def test_batched_lookup(self, queried: list[type[Model]]):
+        parents = [await Resource.create(**resource_row(f"clean-p{i}")) for i in range(2)]
+        permissions = [await Permission.create(code=f"clean:{i}", label=f"clean-{i}") for i in range(2)]
+        queried.clear()
+
+        rows = [
+            resource_row("clean-a", parent_id=parents[0].id, permissions=["clean:0"], unknown=1),
+            resource_row("clean-b", parent_id=parents[1].id, permissions=[permissions[1], "clean:0"]),
+            resource_row("clean-c", parent_id=None, permissions=None),
+        ]
+        cleaned, errors = await _clean_rows(rows, Resource)
+        assert errors == []
+        # 每个关联模型一次 IN 查询
+        assert sorted(m.__name__ for m in queried) == ["Permission", "Resource"]
+
+        simple_data, m2m = cleaned[0]
+        assert "unknown" not in simple_data and "permissions" not in simple_data
+        assert simple_data["parent_id"] == parents[0].id
+        assert [p.code for p in m2m["permissions"]] == ["clean:0"]
+        assert [p.code for p in cleaned[1][1]["permissions"]] == ["clean:1", "clean:0"]
+        assert cleaned[2][1] == {"permissions": None}
+
+    async def test_errors(self):
+        parent = await Resource.create(**resource_row("clean-err"))
+        rows = [
+            resource_row("a", parent_id=-1),
+            resource_row("b", parent_id=parent.id, permissions=["clean:missing", "clean:gone"]),
+            resource_row("c", parent_id=-1),
+        ]
+        _, errors = await _clean_rows(rows, Resource)
+        parent_error = f"ID为-1的{Resource._meta.fields_map['parent'].description}不存在"
+        permission_error = f"id为clean:missing,clean:gone的{Permission._meta.table_description}不存在"
+        assert errors == [(0, parent_error), (1, permission_error), (2, parent_error)]
+        # 相同错误合并, 行号含批次偏移
+        assert _row_errors_message(errors, 10) == f"第11,13行: {parent_error}; 第12行: {permission_error}"
+
+        with pytest.raises(ApiException) as exc:
+            await kwargs_clean(resource_row("d", parent_id=-1, permissions=["clean:missing"]), Resource)
+        assert parent_error in exc.value.message and "clean:missing" in exc.value.message
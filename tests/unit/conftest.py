@@ -0,0 +1,44 @@
+"""不依赖外部服务的测试: 每个测试模块一个 sqlite 内存库及 fakeredis"""
+
+import copy
+
+import pytest
+from tortoise import Tortoise
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from configs.config import local_configs
+from configs.defines import RedisConfig, ConnectionNameEnum
+from storages.relational.models.user_center import Account
+
+
+@pytest.fixture(scope="module")
+def redis_server():
+    """所有 redis 连接共用一个 fakeredis 服务端"""
+    server = FakeServer()
+    pool = FakeRedis(server=server, decode_responses=True).connection_pool
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(RedisConfig, "connection_pool", lambda self, service: pool)
+        yield server
+
+
+@pytest.fixture(scope="module", autouse=True)
+async def initialize_tests(redis_server: FakeServer):
+    """覆盖根目录 conftest 的 mysql 初始化"""
+    config = copy.deepcopy(local_configs.relational.tortoise_orm_config)
+    config["connections"] = {name: "sqlite://:memory:" for name in config["connections"]}
+    with pytest.MonkeyPatch.context() as mp:
+        # sqlite 不支持 FULLTEXT 索引, 仅建表期间移除
+        mp.setattr(Account._meta, "indexes", ())
+        await Tortoise.init(config=config)
+        await Tortoise.generate_schemas()
+    try:
+        yield
+    finally:
+        await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def redis(redis_server: FakeServer):
+    async with local_configs.redis.get_redis(ConnectionNameEnum.user_center) as r:
+        yield r
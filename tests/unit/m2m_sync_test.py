@@ -0,0 +1,47 @@
+import pytest
+
+from common.enums import TokenSceneTypeEnum
+from service.crud import sync_m2m, update_obj
+from storages.enums import SystemResourceTypeEnum, SystemResourceSubTypeEnum
+from storages.relational.models.user_center import Role, Resource, Permission
+
+
+async def create_resource(code: str) -> Resource:
+    return await Resource.create(
+        code=code,
+        label=code,
+        resource_type=SystemResourceTypeEnum.menu,
+        sub_resource_type=SystemResourceSubTypeEnum.add_tab,
+        scene=TokenSceneTypeEnum.general,
+    )
+
+
+@pytest.mark.anyio
+class TestSyncM2M:
+    async def test_add_remove_clear(self):
+        permissions = [await Permission.create(code=f"m2m:{i}", label=f"m2m-{i}") for i in range(4)]
+        resource = await create_resource("m2m")
+
+        async def codes() -> set[str]:
+            return set(await resource.permissions.all().values_list("code", flat=True))
+
+        # 主键与对象混用, 重复的只写入一次
+        assert await sync_m2m(resource, "permissions", [permissions[0], "m2m:1", "m2m:1"]) == (2, 0)
+        assert await codes() == {"m2m:0", "m2m:1"}
+
+        assert await sync_m2m(resource, "permissions", ["m2m:1", "m2m:2", permissions[3]]) == (2, 1)
+        assert await codes() == {"m2m:1", "m2m:2", "m2m:3"}
+
+        # 不变时不写入
+        assert await sync_m2m(resource, "permissions", ["m2m:1", "m2m:2", "m2m:3"]) == (0, 0)
+
+        assert await sync_m2m(resource, "permissions", []) == (0, 3)
+        assert await codes() == set()
+
+    async def test_update_obj_dedupes_related(self):
+        role = await Role.create(label="m2m-role")
+        resources = [await create_resource(f"m2m-r{i}") for i in range(2)]
+
+        await update_obj(role, Role.all(), {"resources": [resources[0].id, resources[1].id, resources[0].id]})
+        assert [r.id for r in role.resources] == [resources[0].id, resources[1].id]
+        assert await role.resources.all().count() == 2
@@ -0,0 +1,95 @@
+import pytest
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from service import pagination
+from common.enums import CountStrategyEnum
+from common.schemas import CRUDPager
+from service.crud import create_obj, get_all_obj
+from service.pagination import COUNT_VERSION_FIELD, enable_cached_count
+from storages.aredis.keys import RedisCacheKey
+from service.exceptions import ApiException
+from service.role.schema import RoleList
+from storages.relational.models.user_center import Role
+
+
+async def page_through(order_by: list[str], limit: int) -> list[int]:
+    ids = []
+    pager = CRUDPager(limit=limit, order_by=order_by, list_schema=RoleList)
+    while True:
+        result = await get_all_obj(Role.filter(label__startswith="cursor-"), pager)
+        ids.extend(r.id for r in result.records)
+        if result.next_cursor is None:
+            return ids
+        pager = pager.model_copy(update={"cursor": result.next_cursor})
+
+
+@pytest.mark.anyio
+class TestCursorPagination:
+    async def test_nullable_order_field(self):
+        remarks = ["b", None, "a", None, "b", "c", None]
+        for i, remark in enumerate(remarks):
+            await Role.create(label=f"cursor-{i}", remark=remark)
+
+        for order_by in (["remark"], ["-remark"]):
+            expected = await Role.filter(label__startswith="cursor-").order_by(order_by[0], "id").values_list(
+                "id",
+                flat=True,
+            )
+            for limit in (1, 2, 3):
+                assert await page_through(order_by, limit) == expected
+
+    async def test_cursor_order_mismatch(self):
+        await Role.create(label="cursor-x")
+        pager = CRUDPager(limit=1, order_by=["remark"], list_schema=RoleList)
+        result = await get_all_obj(Role.filter(label__startswith="cursor-"), pager)
+        assert result.next_cursor
+
+        with pytest.raises(ApiException):
+            await get_all_obj(
+                Role.all(),
+                pager.model_copy(update={"cursor": result.next_cursor, "order_by": ["created_at"]}),
+            )
+        with pytest.raises(ApiException):
+            await get_all_obj(Role.all(), pager.model_copy(update={"cursor": "not-a-cursor"}))
+
+
+@pytest.mark.anyio
+class TestCountStrategy:
+    @staticmethod
+    async def total(strategy: CountStrategyEnum) -> tuple[int | None, CountStrategyEnum]:
+        pager = CRUDPager(limit=1, count_strategy=strategy, list_schema=RoleList)
+        result = await get_all_obj(Role.filter(label__startswith="count-"), pager)
+        return result.total_count, result.count_strategy
+
+    async def test_strategies(self):
+        for i in range(3):
+            await Role.create(label=f"count-{i}")
+        assert await self.total(CountStrategyEnum.exact) == (3, CountStrategyEnum.exact)
+        assert await self.total(CountStrategyEnum.skip) == (None, CountStrategyEnum.skip)
+        # sqlite 不支持估算, 退化为精确计数
+        assert await self.total(CountStrategyEnum.estimated) == (3, CountStrategyEnum.exact)
+
+    async def test_cached_invalidation(self, redis: Redis):
+        enable_cached_count(Role)
+        for i in range(3, 5):
+            await Role.create(label=f"count-{i}")
+        expected = await Role.filter(label__startswith="count-").count()
+        assert await self.total(CountStrategyEnum.cached) == (expected, CountStrategyEnum.cached)
+
+        # 绕过 service.crud 的写入不递增版本, 命中缓存
+        await Role.create(label="count-raw")
+        assert (await self.total(CountStrategyEnum.cached))[0] == expected
+
+        await create_obj(Role, {"label": "count-crud"})
+        assert (await self.total(CountStrategyEnum.cached))[0] == expected + 2
+        assert await redis.hget(RedisCacheKey.ListCount.format(table="role"), COUNT_VERSION_FIELD)  # type: ignore
+
+    async def test_cached_redis_unavailable(self, monkeypatch: pytest.MonkeyPatch):
+        async def unavailable(*args: object) -> int:
+            raise RedisConnectionError
+
+        monkeypatch.setattr(pagination, "_cached_count", unavailable)
+        total, strategy = await self.total(CountStrategyEnum.cached)
+        assert total == await Role.filter(label__startswith="count-").count()
+        assert strategy == CountStrategyEnum.exact
@@ -0,0 +1,58 @@
+import pytest
+from redis.asyncio import Redis
+from starlette_context import request_cycle_context
+
+from service.crud import create_obj
+from service.query_cache import cached_response
+from storages.aredis.keys import RedisCacheKey
+from storages.relational.base.write_hooks import write_transaction
+from storages.relational.models.user_center import Role
+
+
+async def version(redis: Redis) -> str | None:
+    return await redis.hget(RedisCacheKey.QueryCacheVersion, Role._meta.db_table)  # type: ignore
+
+
+@pytest.mark.anyio
+class TestQueryCache:
+    @staticmethod
+    async def labels(calls: list[int]) -> bytes:
+        async def load() -> list[str]:
+            calls.append(1)
+            return await Role.filter(label__startswith="qc-").order_by("id").values_list("label", flat=True)
+
+        with request_cycle_context({}):
+            return (await cached_response((Role,), ("qc-labels",), load)).body
+
+    async def test_version_invalidation(self, redis: Redis):
+        calls: list[int] = []
+        await Role.create(label="qc-a")
+        first = await self.labels(calls)
+        assert await self.labels(calls) == first
+        assert len(calls) == 1
+
+        # 绕过 service.crud 的写入不递增版本, 读到旧结果
+        await Role.create(label="qc-raw")
+        assert await self.labels(calls) == first
+
+        before = await version(redis)
+        await create_obj(Role, {"label": "qc-b"})
+        assert await version(redis) != before
+        assert b"qc-b" in await self.labels(calls)
+        assert len(calls) == 2
+
+    async def test_write_transaction_defers_hooks(self, redis: Redis):
+        before = await version(redis)
+        async with write_transaction(Role.Meta.app):
+            await create_obj(Role, {"label": "qc-tx"})
+            # 提交前不递增, 避免并发请求以未提交前的数据回填新版本
+            assert await version(redis) == before
+        assert await version(redis) != before
+
+        before = await version(redis)
+        with pytest.raises(RuntimeError):
+            async with write_transaction(Role.Meta.app):
+                await create_obj(Role, {"label": "qc-rollback"})
+                raise RuntimeError
+        assert await version(redis) == before
+        assert not await Role.filter(label="qc-rollback").exists()
@@ -0,0 +1,61 @@
+import pytest
+
+from common.enums import TokenSceneTypeEnum
+from service.crud import update_obj, bulk_update_objs
+from storages.enums import SystemResourceTypeEnum, SystemResourceSubTypeEnum
+from storages.relational.models.user_center import Role, Resource, Permission
+
+
+@pytest.fixture
+def rebuilt(monkeypatch: pytest.MonkeyPatch) -> list[set[int]]:
+    """记录每次重建的角色"""
+    calls: list[set[int]] = []
+
+    async def rebuild(role_ids, *args: object) -> None:
+        calls.append(set(role_ids))
+
+    monkeypatch.setattr(Role, "rebuild_permission_cache", rebuild)
+    return calls
+
+
+async def create_resource(code: str, order_num: int = 0) -> Resource:
+    return await Resource.create(
+        code=code,
+        label=code,
+        order_num=order_num,
+        resource_type=SystemResourceTypeEnum.menu,
+        sub_resource_type=SystemResourceSubTypeEnum.add_tab,
+        scene=TokenSceneTypeEnum.general,
+    )
+
+
+@pytest.mark.anyio
+class TestRoleResourceWrite:
+    async def test_affected_roles_only(self, rebuilt: list[set[int]]):
+        permission = await Permission.create(code="rp:read", label="rp-read")
+        linked, other = await Role.create(label="rp-linked"), await Role.create(label="rp-other")
+        resource = await create_resource("rp-a")
+        await resource.permissions.add(permission)
+        await linked.resources.add(resource)
+        await other.resources.add(await create_resource("rp-b"))
+
+        await update_obj(resource, Resource.all(), {"label": "rp-a2"})
+        assert rebuilt == [{linked.id}]
+
+        rebuilt.clear()
+        await update_obj(permission, Permission.all(), {"label": "rp-read2"})
+        assert rebuilt == [{linked.id}]
+
+        # 未关联角色的资源不重建
+        rebuilt.clear()
+        await update_obj(await create_resource("rp-c"), Resource.all(), {"label": "rp-c2"})
+        assert rebuilt == []
+
+    async def test_bulk_update_once(self, rebuilt: list[set[int]]):
+        role = await Role.create(label="rp-bulk")
+        resources = [await create_resource(f"rp-bulk-{i}") for i in range(5)]
+        await role.resources.add(*resources)
+
+        rows = [{"id": r.id, "order_num": i} for i, r in enumerate(resources)]
+        assert await bulk_update_objs(Resource.all(), rows, chunk_size=2) == 5
+        assert rebuilt == [{role.id}]
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+from redis.asyncio import Redis
+
+from common.enums import TokenSceneTypeEnum
+from configs.config import local_configs
+from configs.defines import TokenModeEnum
+from storages.aredis.keys import UserCenterKey
+from storages.aredis.scripts import AuthenticateScript, AuthenticateResultEnum
+from storages.aredis.session import SessionIndex
+from storages.aredis.revocation import RevokedTokenFilter
+
+TOKEN_KEY = UserCenterKey.Token2AccountKey.format(token="t1")  # type: ignore
+PERM_REF_PREFIX = UserCenterKey.AccountPermissionRef.format(uuid="")  # type: ignore
+
+
+async def authenticate(redis: Redis, scene: str = "", *codes: str) -> list:
+    return await AuthenticateScript(redis, keys=[TOKEN_KEY], args=[scene, PERM_REF_PREFIX, *codes])
+
+
+@pytest.mark.anyio
+class TestAuthenticateScript:
+    async def test_permission(self, redis: Redis):
+        await redis.set(TOKEN_KEY, "7:Web")
+        assert await authenticate(redis) == [AuthenticateResultEnum.ok, "7", "Web", -1]
+        # 权限指针不存在时未校验
+        assert (await authenticate(redis, "", "uc:read"))[3] == AuthenticateResultEnum.permission_unchecked
+
+        await redis.set(f"{PERM_REF_PREFIX}7", "UC:Role:Apis:1:member")
+        await redis.sadd("UC:Role:Apis:1:member", "uc:read")
+        assert (await authenticate(redis, "Web", "uc:write", "uc:read"))[3] == AuthenticateResultEnum.permission_granted
+        assert (await authenticate(redis, "Web", "uc:write"))[3] == AuthenticateResultEnum.permission_denied
+
+    async def test_invalid(self, redis: Redis):
+        await redis.delete(TOKEN_KEY)
+        assert await authenticate(redis) == [AuthenticateResultEnum.token_invalid]
+
+        await redis.set(TOKEN_KEY, "7:Web")
+        assert (await authenticate(redis, "Mobile"))[0] == AuthenticateResultEnum.scene_mismatch
+
+        # 旧格式或损坏的映射
+        await redis.set(TOKEN_KEY, "7")
+        assert await authenticate(redis, "Web", "uc:read") == [AuthenticateResultEnum.token_invalid]
+
+
+def token_key(token: str) -> str:
+    return UserCenterKey.Token2AccountKey.format(token=token)  # type: ignore
+
+
+@pytest.fixture
+def token_mode(monkeypatch: pytest.MonkeyPatch):
+    def set_mode(mode: TokenModeEnum) -> None:
+        monkeypatch.setattr(local_configs.server, "token_mode", mode)
+        monkeypatch.setattr(RevokedTokenFilter, "_revoked", {})
+
+    return set_mode
+
+
+@pytest.mark.anyio
+class TestSessionScripts:
+    async def test_login_revoke(self, redis: Redis, token_mode):
+        token_mode(TokenModeEnum.opaque)
+        index_key = SessionIndex._key(101, TokenSceneTypeEnum.web)
+        await redis.zadd(index_key, {"expired": time.time() - 10})
+        perm_ref = UserCenterKey.AccountPermissionRef.format(uuid="101")  # type: ignore
+
+        for token in ("s1", "s2"):
+            await SessionIndex.record(redis, 101, TokenSceneTypeEnum.web, token, "101:Web", "UC:Role:Apis:1:member")
+        # 登录时清理过期会话
+        assert await redis.zrange(index_key, 0, -1) == ["s1", "s2"]
+        assert await redis.get(token_key("s1")) == "101:Web"
+        assert await redis.get(perm_ref) == "UC:Role:Apis:1:member"
+        assert 0 < await redis.ttl(index_key) <= local_configs.server.token_expire_seconds
+
+        await SessionIndex.record(redis, 101, TokenSceneTypeEnum.mobile, "s3", "101:Mobile")
+        assert sorted(await SessionIndex.revoke(101, TokenSceneTypeEnum.web)) == ["s1", "s2"]
+        assert not await redis.exists(index_key, token_key("s1"), token_key("s2"))
+        assert await redis.get(token_key("s3")) == "101:Mobile"
+
+        # 不指定场景时吊销全部场景; opaque token 不记录吊销
+        assert await SessionIndex.revoke(101) == ["s3"]
+        assert not await redis.exists(RevokedTokenFilter.key)
+        assert await SessionIndex.revoke(101) == []
+
+    async def test_revoke_signed(self, redis: Redis, token_mode):
+        token_mode(TokenModeEnum.jwt)
+        await SessionIndex.record(redis, 102, TokenSceneTypeEnum.web, "jti-1")
+        assert not await redis.exists(token_key("jti-1"))
+
+        assert await SessionIndex.revoke(102) == ["jti-1"]
+        assert await redis.zscore(RevokedTokenFilter.key, "jti-1") is not None
+        assert await RevokedTokenFilter.is_revoked("jti-1")
+
+    async def test_compact_legacy_index(self, redis: Redis, token_mode):
+        token_mode(TokenModeEnum.opaque)
+        legacy_key = SessionIndex._key(103, TokenSceneTypeEnum.web)
+        empty_key = SessionIndex._key(104, TokenSceneTypeEnum.web)
+        await redis.sadd(legacy_key, "live", "missing")
+        await redis.expire(legacy_key, 600)
+        await redis.set(token_key("live"), "103:Web", ex=300)
+        await redis.sadd(empty_key, "missing")
+        await redis.sadd(UserCenterKey.Account2TokenKey.format(account_id="Apis", scene="1"), "x")  # type: ignore
+
+        scanned, emptied = await SessionIndex.compact()
+        assert (scanned, emptied) == (2, 1)
+        # 旧版 set 转换为 zset, 映射不存在的 opaque token 丢弃
+        assert await redis.type(legacy_key) == "zset"
+        assert await redis.zrange(legacy_key, 0, -1) == ["live"]
+        assert 290 < await redis.zscore(legacy_key, "live") - time.time() <= 300
+        assert not await redis.exists(empty_key)
@@ -0,0 +1,112 @@
+from uuid import UUID
+from decimal import Decimal
+from datetime import date, datetime, timedelta
+
+import orjson
+import pytest
+from pydantic import Field, computed_field, field_validator
+from fastapi.encoders import jsonable_encoder
+from starlette_context import request_cycle_context
+
+from common.enums import CountStrategyEnum
+from common.schemas import Pager
+from common.responses import Resp, PageData, AesResponse
+from common.serializer import dump_resp, encode_data, json_response, compile_json_plan
+from service.role.schema import RoleList, RoleDetail, RoleFilterSchema
+from service.account.schema import AccountList
+from storages.relational.models.user_center import Role, Account
+
+
+def baseline(resp: Resp) -> bytes:
+    """原 serialize_response: model_dump + jsonable_encoder, 再由 AesResponse 编码"""
+    return AesResponse(
+        content=jsonable_encoder(
+            resp.model_dump(by_alias=True),
+            by_alias=True,
+            custom_encoder=resp.model_config.get("json_encoders"),
+        ),
+    ).body
+
+
+class Point:
+    """orjson 不支持, 退回 jsonable_encoder"""
+
+    def __init__(self, x: int, y: int) -> None:
+        self.x = x
+        self.y = y
+
+
+@pytest.mark.anyio
+class TestSinglePassSerialization:
+    async def test_page(self):
+        await Role.create(label="json-a", remark=None)
+        await Role.create(label="json-b", remark="备注")
+        records = [RoleList.model_validate(r) for r in await Role.filter(label__startswith="json-").order_by("id")]
+        with request_cycle_context({}):
+            page = PageData(records=records, total_count=len(records), pager=Pager(limit=10, offset=0))
+            expected = baseline(Resp(data=page))
+
+            assert AesResponse(content=dump_resp(Resp(data=page), by_alias=True)).body == expected
+            assert json_response(page.model_dump(by_alias=True)).body == expected
+            assert json_response(orjson.Fragment(encode_data(page))).body == expected
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"amount": Decimal("1.10"), "count": Decimal("3"), "at": datetime(2024, 1, 2, 3, 4, 5)},
+            {"day": date(2024, 1, 2), "elapsed": timedelta(seconds=90), "tags": {"a"}, "raw": b"x"},
+            {"id": UUID(int=1), "strategy": CountStrategyEnum.cached, "nested": [{"n": None}]},
+            {"point": Point(1, 2)},
+        ],
+    )
+    async def test_types(self, data: dict):
+        with request_cycle_context({}):
+            assert json_response(data).body == baseline(Resp(data=data))
+
+
+class RenamedRoleList(RoleList):
+    label: str = Field(serialization_alias="name")
+
+
+class ValidatedRoleList(RoleList):
+    @field_validator("label")
+    @classmethod
+    def strip_label(cls, value: str) -> str:
+        return value.strip()
+
+
+class ComputedRoleList(RoleList):
+    @computed_field
+    def title(self) -> str:
+        return self.label.upper()
+
+
+@pytest.mark.anyio
+class TestJsonFieldPlan:
+    @pytest.mark.parametrize("schema", [RoleList, RenamedRoleList, AccountList])
+    async def test_equivalence(self, schema: type[RoleList]):
+        role, created = await Role.get_or_create(label="plan-a")
+        if created:
+            await Account.create(
+                username="plana",
+                phone="13800000001",
+                email="plan@example.com",
+                password="x",
+                role=role,
+            )
+        db_model = schema.model_config["orig_model"]
+        plan = compile_json_plan(schema)
+        assert plan is not None
+        assert plan.renamed == (schema is RenamedRoleList)
+
+        queryset = db_model.all().order_by("id")
+        rows = await queryset.values(*plan.columns)
+        objs = [schema.model_validate(obj) for obj in await queryset]
+        with request_cycle_context({}):
+            assert json_response(plan.records(rows)).body == baseline(Resp(data=objs))
+            assert json_response(plan.record(rows[0])).body == baseline(Resp(data=objs[0]))
+
+    @pytest.mark.parametrize("schema", [RoleDetail, RoleFilterSchema, ValidatedRoleList, ComputedRoleList])
+    async def test_unsupported(self, schema: type):
+        # 关系字段/非 tortoise schema/自定义校验器/计算字段走常规路径
+        assert compile_json_plan(schema) is None